@@ -1,11 +1,87 @@
-from services.salon_data import SalonData
-from gui.admin_gui import AdminGUI
-
-
-def main():
-    data = SalonData()
-    app = AdminGUI(data)
-    app.mainloop()
-
-if __name__ == '__main__':
+# perf первым: от его импорта отсчитываются этапы запуска (--startup-timing)
+from services import perf
+
+import argparse
+import sys
+from typing import Optional
+
+from services.salon_data import SalonData
+from services.persistence import BackgroundStorage
+from services.storage import JournalStorage, JsonStorage
+
+
+def create_data(backend: str, sync_writes: bool = False, shared: bool = False,
+                branches: Optional[str] = None, branch: Optional[str] = None) -> SalonData:
+    path, masters = SalonData.DATA_FILE, None
+    if branch:
+        if backend == 'sqlite':
+            raise SystemExit('--branch работает только с --backend journal или json')
+        from services.branches import branch_location
+        try:
+            path, masters = branch_location(branches, branch)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    if backend == 'sqlite':
+        from services.sqlite_data import SqliteSalonData
+        return SqliteSalonData()
+    if shared:
+        if backend != 'journal':
+            raise SystemExit('--shared работает только с --backend journal или sqlite')
+        from services.locking import SharedJournalStorage
+        return SalonData(storage=SharedJournalStorage(path), masters=masters)
+    if backend == 'json':
+        storage = JsonStorage(path)
+    else:
+        storage = JournalStorage(path)
+    if not sync_writes:
+        storage = BackgroundStorage(storage)
+    return SalonData(storage=storage, masters=masters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Salon Admin — запись')
+    parser.add_argument('--backend', choices=['journal', 'json', 'sqlite'], default='journal',
+                        help='способ хранения данных (по умолчанию journal)')
+    parser.add_argument('--sync-writes', action='store_true',
+                        help='писать на диск сразу в потоке интерфейса')
+    parser.add_argument('--shared', action='store_true',
+                        help='каталог данных общий для нескольких программ (блокировка файла, запись сразу)')
+    parser.add_argument('--serve', action='store_true', help='вместо окна запустить HTTP/JSON API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--branches', default='branches', help='каталог сети филиалов (по умолчанию branches)')
+    parser.add_argument('--branch', help='открыть данные этого филиала из --branches')
+    parser.add_argument('--startup-timing', action='store_true',
+                        help='замерить запуск окна до готовности к работе, вывести этапы и выйти')
+    args = parser.parse_args()
+    perf.mark('импорт ядра')
+    if args.serve:
+        # Сервер пишет сам, пачками, поэтому фоновый поток записи ему не нужен
+        from services.server import serve
+        data = create_data(args.backend, sync_writes=True, shared=args.shared,
+                           branches=args.branches, branch=args.branch)
+        try:
+            serve(data, args.host, args.port)
+        finally:
+            data.close()
+        return
+    # Окно импортируется только здесь: серверу tkinter и customtkinter не нужны
+    from gui.admin_gui import AdminGUI
+    perf.mark('импорт окна')
+    on_ready = None
+    if args.startup_timing:
+        def on_ready():
+            sys.stderr.write(perf.startup_text())
+            perf.dump_startup()
+            app.after(0, app.destroy)
+    # Данные загружаются, когда окно уже на экране
+    app = AdminGUI(lambda: create_data(args.backend, args.sync_writes, args.shared,
+                                          args.branches, args.branch), on_ready)
+    try:
+        app.mainloop()
+    finally:
+        if app.data is not None:
+            app.data.close()
+
+if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""Автозапись листа ожидания: качество раскладки и время.
+
+На один день у мастеров график 9:00–21:00 и немного уже занятых записей,
+лист ожидания длиннее, чем помещается. Раскладка services.autoschedule
+сравнивается с тем, как записывают вручную — по очереди, каждую заявку
+на самое раннее свободное время, — и с верхней оценкой: сумма по всем
+заявкам или по ёмкости свободного времени (для выручки — дробный рюкзак),
+смотря что меньше.
+
+Запуск из папки salon:
+    python -m benchmarks.bench_autoschedule --requests 200 --masters 5
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.harness import make_data_class
+from services.autoschedule import (GRANULARITY, OBJECTIVES, WaitlistRequest, _free_minutes, _jobs, _Packer,
+                                   apply, plan)
+from services.storage import JournalStorage
+
+
+def make_salon(path: str, args, rng: random.Random):
+    data = make_data_class(args.masters)(storage=JournalStorage(path))
+    day = date.today() + timedelta(days=7)
+    with data.batch():
+        for i in range(args.requests):
+            data.add_client(f'Клиент {i}', f'+7900{i:07d}', f'c{i}@example.com')
+        for master in data.masters:
+            data.add_schedule(master.id, day.isoformat(), '9:00', '21:00')
+        service_ids = [s.id for s in data.services]
+        for master in data.masters:
+            for _ in range(args.booked):
+                start = datetime(day.year, day.month, day.day, 9) + timedelta(minutes=15 * rng.randrange(44))
+                try:
+                    data.add_appointment(1, master.id, rng.choice(service_ids), start)
+                except ValueError:
+                    pass
+    return data, day
+
+
+def make_requests(data, day: date, count: int, rng: random.Random):
+    opening = datetime(day.year, day.month, day.day, 9)
+    masters = [m.id for m in data.masters]
+    requests = []
+    for i in range(count):
+        service = rng.choice(data.services)
+        width = rng.choice((2, 3, 4, 6, 12)) * 60
+        earliest = opening + timedelta(minutes=15 * rng.randrange((12 * 60 - service.duration_min) // 15 + 1))
+        latest = min(earliest + timedelta(minutes=max(width, service.duration_min)), opening + timedelta(hours=12))
+        master_id = rng.choice(masters) if rng.random() < 0.3 else None
+        requests.append(WaitlistRequest(i + 1, service.id, earliest, latest, master_id,
+                                        strict=master_id is not None and rng.random() < 0.3))
+    return requests
+
+
+def first_fit(data, requests, objective: str) -> float:
+    """Как при записи вручную: по очереди, каждую на самое раннее свободное время"""
+    total = 0.0
+    for day, jobs in _jobs(data, requests, objective, []).items():
+        packer = _Packer(_free_minutes(data, day, jobs), GRANULARITY)
+        for job in jobs:
+            spots = []
+            for rank, master_id in enumerate(job.masters):
+                for start, end in packer.free.get(master_id, ()):
+                    at = -(-max(start, job.lo) // GRANULARITY) * GRANULARITY
+                    if at + job.duration <= min(end, job.hi):
+                        spots.append((rank > 0 and job.preferred is not None, at, master_id))
+                        break
+            if spots:
+                _, at, master_id = min(spots)
+                packer.take(job, master_id, at)
+                total += job.value
+    return total
+
+
+def upper_bound(data, requests, objective: str) -> float:
+    bound = 0.0
+    for day, jobs in _jobs(data, requests, objective, []).items():
+        free = _free_minutes(data, day, jobs)
+        capacity = sum(e - s for intervals in free.values() for s, e in intervals)
+        everything = sum(j.value for j in jobs)
+        fractional = 0.0
+        for job in sorted(jobs, key=lambda j: -j.value / j.duration):
+            used = min(job.duration, capacity)
+            fractional += job.value * used / job.duration
+            capacity -= used
+            if not capacity:
+                break
+        bound += min(everything, fractional)
+    return bound
+
+
+def value(schedule, objective: str) -> float:
+    return schedule.booked_minutes if objective == 'minutes' else schedule.revenue
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='salon-autoschedule-')
+    try:
+        data, day = make_salon(os.path.join(workdir, 'salon_data.json'), args, rng)
+        requests = make_requests(data, day, args.requests, rng)
+        print(f'{args.requests} заявок, {args.masters} мастеров, {day.isoformat()}')
+        for objective in OBJECTIVES:
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                schedule = plan(data, requests, objective)
+                times.append(time.perf_counter() - t0)
+            bound = upper_bound(data, requests, objective)
+            greedy, manual = value(schedule, objective), first_fit(data, requests, objective)
+            unit = 'мин' if objective == 'minutes' else '₽'
+            print(f'{objective:>8}: раскладка {greedy:>9.0f} {unit} ({greedy / bound:.1%} оценки, '
+                  f'{len(schedule.placed)} заявок) | по очереди {manual:>9.0f} {unit} ({manual / bound:.1%}) | '
+                  f'оценка {bound:.0f} | время {min(times) * 1000:.1f} мс (лучшее из {args.repeat})')
+
+        before = len(data.appointments_on(day.isoformat()))
+        t0 = time.perf_counter()
+        apply(data, schedule)
+        elapsed = time.perf_counter() - t0
+        data.close()
+        reopened = make_data_class(args.masters)(storage=JournalStorage(os.path.join(workdir, 'salon_data.json')))
+        saved = len(reopened.appointments_on(day.isoformat())) - before
+        assert saved == len(schedule.placed), 'записано не столько, сколько в плане'
+        print(f'запись плана ({saved} записей одной пачкой): {elapsed * 1000:.1f} мс')
+        reopened.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк автозаписи листа ожидания')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--masters', type=int, default=5)
+    parser.add_argument('--booked', type=int, default=3, help='уже занятых записей на мастера')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    run(parser.parse_args(argv))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Сеть филиалов: загрузка и сохранение по филиалам против одного файла на всю сеть.
+
+Строится сеть из нескольких филиалов с историей за несколько месяцев и,
+для сравнения, один файл с теми же объёмами на всех мастеров сразу.
+Замеряются: загрузка всего одним файлом, первая запись в один филиал
+(загружается только он), загрузка всех филиалов по очереди и в пуле
+потоков, сохранение снимка одного филиала и всей сети, запросы по всей
+сети (поиск клиента, свободное время).
+
+Запуск из папки salon:
+    python -m benchmarks.bench_branches --branches 4 --masters 5 --months 6 --per-day 8
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from benchmarks.harness import Timings, populate
+from models.entities import Branch, Master
+from services.branches import BranchClient, SalonNetwork, save_branches
+from services.salon_data import SalonData
+from services.storage import JournalStorage
+
+
+def build(root: str, args, rng: random.Random):
+    spec = SimpleNamespace(clients=args.clients, months=args.months, per_day=args.per_day, templates=True)
+    branches = [Branch(f'b{i + 1}', f'Филиал {i + 1}',
+                       tuple(Master(i * args.masters + j + 1, f'Мастер {i * args.masters + j + 1}')
+                             for j in range(args.masters)))
+                for i in range(args.branches)]
+    save_branches(root, branches)
+    for branch in branches:
+        os.makedirs(os.path.join(root, branch.id))
+        data = SalonData(storage=JournalStorage(os.path.join(root, branch.id, SalonData.DATA_FILE)),
+                         masters=list(branch.masters))
+        with data.batch():
+            populate(data, spec, Timings(), rng)
+        data._save()
+        data.close()
+    # Та же сеть одним файлом: все мастера и все клиенты в одном SalonData
+    company = os.path.join(root, 'company.json')
+    data = SalonData(storage=JournalStorage(company), masters=[m for b in branches for m in b.masters])
+    with data.batch():
+        populate(data, SimpleNamespace(clients=args.clients * args.branches, months=args.months,
+                                       per_day=args.per_day, templates=True), Timings(), rng)
+    data._save()
+    data.close()
+    return branches, company
+
+
+def best(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    root = tempfile.mkdtemp(prefix='salon-branches-')
+    try:
+        t0 = time.perf_counter()
+        branches, company = build(root, args, rng)
+        print(f'{args.branches} филиалов по {args.masters} мастеров, {args.months} мес., '
+              f'подготовка {time.perf_counter() - t0:.1f} с')
+        size = sum(os.path.getsize(os.path.join(root, b.id, SalonData.DATA_FILE)) for b in branches)
+        print(f'данные: филиалы {size / 1e6:.1f} МБ, один файл {os.path.getsize(company) / 1e6:.1f} МБ')
+
+        def load_company():
+            SalonData(storage=JournalStorage(company), masters=[m for b in branches for m in b.masters]).close()
+
+        def first_booking():
+            network = SalonNetwork(root)
+            shard = network.branch(branches[0].id)
+            day = date.today() + timedelta(days=1)
+            client = BranchClient(branches[0].id, shard.clients[0])
+            for slot in network.find_free_slots(1, (day, day), master_ids=[branches[0].masters[0].id], limit=1):
+                network.add_appointment(client, slot.master_id, 1, slot.start)
+            assert network.loaded() == [branches[0].id]
+            network.close()
+
+        def open_all(workers: int):
+            network = SalonNetwork(root, workers=workers)
+            network.open_all()
+            network.close()
+
+        print(f"{'весь файл сети: загрузка':<44}{best(load_company, args.repeat) * 1000:>9.1f} мс")
+        print(f"{'первая запись в один филиал (с загрузкой)':<44}{best(first_booking, args.repeat) * 1000:>9.1f} мс")
+        print(f"{'все филиалы по очереди':<44}{best(lambda: open_all(1), args.repeat) * 1000:>9.1f} мс")
+        print(f"{f'все филиалы, пул из {args.workers} потоков':<44}"
+              f"{best(lambda: open_all(args.workers), args.repeat) * 1000:>9.1f} мс")
+
+        network = SalonNetwork(root, workers=args.workers)
+        network.open_all()
+        one = network.branch(branches[0].id)
+        whole = SalonData(storage=JournalStorage(company), masters=[m for b in branches for m in b.masters])
+        print(f"{'снимок одного филиала':<44}{best(one._save, args.repeat) * 1000:>9.1f} мс")
+        print(f"{'снимок файла всей сети':<44}{best(whole._save, args.repeat) * 1000:>9.1f} мс")
+        whole.close()
+
+        day = date.today() + timedelta(days=3)
+        queries = [f'{rng.choice(["Анна", "Олег", "Мария", "Ивано", "Петр"])}' for _ in range(200)]
+        t0 = time.perf_counter()
+        for q in queries:
+            network.search_clients(q, 10)
+        search = (time.perf_counter() - t0) / len(queries)
+        slots = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            network.find_free_slots(rng.choice([1, 2, 8]), (day, day + timedelta(days=6)), limit=10,
+                                    not_before=datetime.now())
+            slots.append(time.perf_counter() - t0)
+        print(f"{'поиск клиента по всем филиалам':<44}{search * 1e6:>9.0f} мкс")
+        print(f"{'свободное время по всем филиалам, медиана':<44}{statistics.median(slots) * 1000:>9.2f} мс")
+        network.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк сети филиалов')
+    parser.add_argument('--branches', type=int, default=4)
+    parser.add_argument('--masters', type=int, default=5)
+    parser.add_argument('--clients', type=int, default=2000, help='клиентов в каждом филиале')
+    parser.add_argument('--months', type=int, default=6)
+    parser.add_argument('--per-day', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    run(parser.parse_args(argv))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
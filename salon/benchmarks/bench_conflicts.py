@@ -0,0 +1,84 @@
+"""Сравнение проверки пересечений: перебор всех записей и MasterIntervals.
+
+Запуск из папки salon:
+    python -m benchmarks.bench_conflicts 1000 10000 100000
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from models.entities import Appointment, to_minutes
+from services.indexes import MasterIntervals
+
+
+MASTERS = 5
+PROBES = 2000
+
+
+def generate(count: int):
+    appointments = []
+    day = datetime(2024, 1, 1, 9, 0)
+    cursor = {m: day for m in range(1, MASTERS + 1)}
+    for i in range(count):
+        master_id = i % MASTERS + 1
+        start = cursor[master_id]
+        if start.hour >= 20:
+            start = datetime(start.year, start.month, start.day, 9, 0) + timedelta(days=1)
+        end = start + timedelta(minutes=random.choice((15, 30, 45, 60, 90)))
+        appointments.append(Appointment(i + 1, 1, master_id, 1, to_minutes(start), to_minutes(end)))
+        cursor[master_id] = end + timedelta(minutes=random.choice((0, 0, 15, 30)))
+    return appointments
+
+
+def linear_scan(records, master_id, start_dt, end_dt) -> bool:
+    # Прежняя реализация SalonData.add_appointment: время хранилось строками ISO
+    for record_master_id, start, end in records:
+        if record_master_id != master_id:
+            continue
+        a_start = datetime.fromisoformat(start)
+        a_end = datetime.fromisoformat(end)
+        if not (end_dt <= a_start or start_dt >= a_end):
+            return True
+    return False
+
+
+def run(count: int):
+    appointments = generate(count)
+    first = appointments[0].start_dt
+    last = appointments[-1].end_dt
+    span = int((last - first).total_seconds() // 60)
+    probes = []
+    for _ in range(PROBES):
+        start = first + timedelta(minutes=random.randrange(span) // 15 * 15)
+        probes.append((random.randint(1, MASTERS), start, start + timedelta(minutes=45)))
+
+    t0 = time.perf_counter()
+    intervals = MasterIntervals()
+    intervals.rebuild((a.master_id, a.start, a.end) for a in appointments)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    indexed = [intervals.overlaps(m, to_minutes(s), to_minutes(e)) for m, s, e in probes]
+    index_time = (time.perf_counter() - t0) / len(probes)
+
+    records = [(a.master_id, a.start_dt.isoformat(), a.end_dt.isoformat()) for a in appointments]
+    scan_probes = probes[:max(1, min(len(probes), 200_000 // count))]
+    t0 = time.perf_counter()
+    scanned = [linear_scan(records, *p) for p in scan_probes]
+    scan_time = (time.perf_counter() - t0) / len(scan_probes)
+
+    assert scanned == indexed[:len(scanned)], 'результаты индекса и перебора расходятся'
+    print(f'{count:>8} записей | перебор {scan_time * 1e6:>12.1f} мкс | '
+          f'индекс {index_time * 1e6:>6.2f} мкс | построение индекса {build * 1e3:.1f} мс')
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    random.seed(1)
+    for count in [int(a) for a in args] or [1_000, 10_000, 100_000]:
+        run(count)
+
+
+if __name__ == '__main__':
+    main()
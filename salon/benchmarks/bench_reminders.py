@@ -0,0 +1,91 @@
+"""Рассылка напоминаний: 10 тысяч писем на завтра через локальный SMTP-приёмник.
+
+Строится салон, где на завтра у мастеров расписаны все слоты по
+15 минут, и рассылка идёт на SMTP-приёмник из benchmarks.smtp_sink,
+который иногда отвечает 451 и рвёт соединения. Замеряются сборка писем
+(выборка записей и подстановка имён) и отправка. Потом рассылка
+запускается ещё раз: по журналу отправленных всё должно быть пропущено,
+а каждый получатель — получить ровно одно письмо.
+
+Запуск из папки salon:
+    python -m benchmarks.bench_reminders --reminders 10000 --connections 8
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.harness import make_data_class
+from benchmarks.smtp_sink import SmtpSink
+from services.reminders import ReminderTemplate, SentLedger, SmtpConfig, SmtpPool, build_reminders, send_reminders
+from services.storage import JournalStorage
+
+SLOTS_PER_DAY = 48      # 9:00–21:00 по 15 минут
+SHORT_SERVICE = 4       # стрижка чёлки, 15 минут
+
+
+def build(path: str, count: int, day: date):
+    masters = -(-count // SLOTS_PER_DAY)
+    data = make_data_class(masters)(storage=JournalStorage(path))
+    with data.batch():
+        for i in range(count):
+            data.add_client(f'Клиент {i}', f'+79{i:09d}', f'client{i}@example.com')
+        for m in data.masters:
+            data.add_schedule(m.id, day.isoformat(), '9:00', '21:00')
+        start = datetime(day.year, day.month, day.day, 9)
+        for i in range(count):
+            master = data.masters[i // SLOTS_PER_DAY]
+            data.add_appointment(i + 1, master.id, SHORT_SERVICE, start + timedelta(minutes=15 * (i % SLOTS_PER_DAY)))
+    return data
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='salon-reminders-')
+    sink = SmtpSink(fail_every=args.fail_every, drop_every=args.drop_every).start()
+    try:
+        day = date.today() + timedelta(days=1)
+        t0 = time.perf_counter()
+        data = build(os.path.join(workdir, 'salon_data.json'), args.reminders, day)
+        print(f'{args.reminders} записей на {day}, {len(data.masters)} мастеров, '
+              f'подготовка {time.perf_counter() - t0:.1f} с')
+
+        t0 = time.perf_counter()
+        reminders = list(build_reminders(data, day, day, ReminderTemplate(salon='Салон')))
+        print(f"{'сборка писем':<36}{(time.perf_counter() - t0) * 1000:>9.1f} мс ({len(reminders)} писем)")
+
+        ledger_path = os.path.join(workdir, 'sent.log')
+        pool = SmtpPool(SmtpConfig(port=sink.port), args.connections, args.rate, backoff=0.01)
+        report = send_reminders(data, pool, SentLedger(ledger_path), day)
+        print(f"{'отправка (с выборкой и сборкой)':<36}{report.seconds * 1000:>9.1f} мс, "
+              f"{report.sent / report.seconds:.0f} писем/с")
+        print(f'отправлено {report.sent}, повторов {report.retries}, ошибок {len(report.failed)}; '
+              f'приёмник: соединений {sink.connections}, отказов {sink.refused}, обрывов {sink.dropped}')
+
+        again = send_reminders(data, pool, SentLedger(ledger_path), day)
+        print(f'повторный запуск: отправлено {again.sent}, пропущено {again.skipped}')
+        duplicates = sum(n - 1 for n in sink.received.values() if n > 1)
+        assert again.sent == 0 and again.skipped == report.sent, 'повторный запуск что-то отправил'
+        assert len(sink.received) == report.sent and not duplicates, f'дублей у получателей: {duplicates}'
+        assert not report.failed, report.failed[:5]
+        data.close()
+    finally:
+        sink.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк рассылки напоминаний')
+    parser.add_argument('--reminders', type=int, default=10000)
+    parser.add_argument('--connections', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=0, help='писем в секунду, 0 — без ограничения')
+    parser.add_argument('--fail-every', type=int, default=500, help='приёмник отвечает 451 на каждый N-й RCPT')
+    parser.add_argument('--drop-every', type=int, default=1500, help='приёмник рвёт соединение на N-м письме')
+    run(parser.parse_args(argv))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
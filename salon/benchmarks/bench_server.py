@@ -0,0 +1,142 @@
+"""Нагрузка на HTTP API из нескольких потоков-клиентов.
+
+По умолчанию поднимает сервер в этом же процессе над временным файлом
+с синтетическими данными; с --url бьёт по уже запущенному серверу
+(python application.py --serve). Клиенты держат соединение открытым и
+смешивают чтение (записи за день, поиск клиента, свободное время) с
+записью на приём. В конце печатает запросы в секунду, задержки на
+стороне клиента и /metrics сервера.
+
+Запуск из папки salon:
+    python -m benchmarks.bench_server --threads 8 --seconds 10
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import quote, urlsplit
+
+from benchmarks.harness import percentile
+from services.salon_data import SalonData
+from services.server import make_server, stop_server
+from services.storage import JournalStorage
+
+DAYS = 14
+
+
+def prepare(path: str, clients: int):
+    data = SalonData(storage=JournalStorage(path))
+    with data.batch():
+        for i in range(clients):
+            data.add_client(f'Клиент {i}', f'+7900{i:07d}', f'c{i}@example.com')
+        for d in range(DAYS):
+            day = (date.today() + timedelta(days=d)).isoformat()
+            for master in data.masters:
+                data.add_schedule(master.id, day, '9:00', '21:00')
+    data.close()
+
+
+def client_loop(host: str, port: int, args, seed: int, stop: threading.Event, out: list):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    samples, statuses = [], {}
+    while not stop.is_set():
+        day = (date.today() + timedelta(days=rng.randrange(DAYS))).isoformat()
+        roll = rng.random()
+        body = None
+        if roll < args.write_share:
+            method, path = 'POST', '/appointments'
+            body = json.dumps({'client_id': rng.randint(1, args.clients), 'master_id': rng.randint(1, 5),
+                               'service_id': rng.randint(1, 21),
+                               'start': f'{day}T{rng.randint(9, 19):02d}:{rng.choice(["00", "15", "30", "45"])}'})
+        elif roll < 0.5:
+            method, path = 'GET', f'/appointments?date={day}'
+        elif roll < 0.8:
+            method, path = 'GET', f'/clients?q={quote(f"Клиент {rng.randrange(args.clients)}")}&limit=5'
+        else:
+            method, path = 'GET', f'/free-slots?service_id={rng.randint(1, 21)}&from={day}&limit=5'
+        t0 = time.perf_counter()
+        headers = {'Content-Type': 'application/json'} if body else {}
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        samples.append(time.perf_counter() - t0)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+    conn.close()
+    out.append((samples, statuses))
+
+
+def run(args) -> dict:
+    workdir = None
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        workdir = tempfile.mkdtemp(prefix='salon-api-')
+        path = os.path.join(workdir, 'salon_data.json')
+        prepare(path, args.clients)
+        server = make_server(SalonData(storage=JournalStorage(path)), '127.0.0.1', 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+    try:
+        stop = threading.Event()
+        out = []
+        threads = [threading.Thread(target=client_loop, args=(host, port, args, seed, stop, out))
+                   for seed in range(args.threads)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        conn = http.client.HTTPConnection(host, port)
+        conn.request('GET', '/metrics')
+        metrics = json.loads(conn.getresponse().read())
+        conn.close()
+    finally:
+        if server is not None:
+            data = server.api.data
+            stop_server(server)
+            data.close()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    samples = sorted(s for thread_samples, _ in out for s in thread_samples)
+    statuses = {}
+    for _, thread_statuses in out:
+        for code, n in thread_statuses.items():
+            statuses[code] = statuses.get(code, 0) + n
+    return {
+        'threads': args.threads,
+        'requests': len(samples),
+        'requests_per_s': round(len(samples) / elapsed, 1),
+        'client_ms': {name: round(percentile(samples, q) * 1000, 3)
+                      for name, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))},
+        'statuses': statuses,
+        'server': metrics,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузка на HTTP API салона')
+    parser.add_argument('--url', help='адрес запущенного сервера; без него сервер поднимается здесь')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--clients', type=int, default=2000)
+    parser.add_argument('--write-share', type=float, default=0.2, help='доля запросов на запись')
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
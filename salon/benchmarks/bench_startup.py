@@ -0,0 +1,79 @@
+"""Холодный старт: время импорта модулей и загрузки данных в свежем процессе.
+
+Каждый замер — отдельный запуск интерпретатора, поэтому кэш модулей
+не помогает. Для каждого набора модулей печатается медиана и список
+тяжёлых пакетов, которые он потянул: ядру (SalonData, сервер, массовые
+операции) не нужны ни tkinter, ни NumPy.
+
+Запуск из папки salon:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --data salon_data.json --repeat 9
+
+Время до готовности окна меряется самим приложением:
+    python application.py --startup-timing
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY = ('tkinter', 'customtkinter', 'tkcalendar', 'babel', 'numpy', 'sqlite3', 'http.server')
+TARGETS = {
+    'ядро': 'import services.salon_data',
+    'SQLite': 'import services.sqlite_data',
+    'сервер': 'import services.server',
+    'массовые операции': 'import services.bulk',
+    'автозапись': 'import services.autoschedule',
+    'тексты вкладок': 'import gui.schedule_view, gui.report_view',
+}
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+exec({code!r})
+elapsed = time.perf_counter() - t0
+print(json.dumps({{'seconds': elapsed, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_LOAD = """
+import json, sys, time
+t0 = time.perf_counter()
+from services.salon_data import SalonData
+from services.storage import JournalStorage
+imported = time.perf_counter()
+data = SalonData(storage=JournalStorage({path!r}))
+print(json.dumps({{'seconds': time.perf_counter() - t0, 'import': imported - t0,
+                  'clients': len(data.clients)}}))
+"""
+
+
+def probe(source: str) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, '-c', source], cwd=root, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Холодный старт: импорт и загрузка данных')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--data', help='ещё замерить загрузку этого файла данных (копия не делается, файл только читается)')
+    args = parser.parse_args(argv)
+
+    for name, code in TARGETS.items():
+        runs = [probe(_PROBE.format(code=code, heavy=HEAVY)) for _ in range(args.repeat)]
+        median = statistics.median(r['seconds'] for r in runs)
+        heavy = ', '.join(runs[0]['heavy']) or '—'
+        print(f'{name:<20} {median * 1000:>8.1f} мс   тяжёлые модули: {heavy}')
+
+    if args.data:
+        runs = [probe(_LOAD.format(path=os.path.abspath(args.data))) for _ in range(args.repeat)]
+        print(f"{'загрузка данных':<20} {statistics.median(r['seconds'] for r in runs) * 1000:>8.1f} мс "
+              f"(из них импорт {statistics.median(r['import'] for r in runs) * 1000:.1f} мс), "
+              f"клиентов {runs[0]['clients']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Нагрузочный прогон SalonData на синтетическом салоне.
+
+Салон наполняется через обычный API (add_client, add_schedule,
+add_appointment), время каждой операции замеряется, а итог пишется
+в JSON с перцентилями — чтобы сравнивать версии между собой.
+Tk не нужен: текст расписания строится gui.schedule_view.
+
+Запуск из папки salon:
+    python -m benchmarks.harness --masters 5 --clients 2000 --months 6 --per-day 8 --out bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from models.entities import Master
+from services.persistence import BackgroundStorage
+from services.salon_data import SalonData
+from services.storage import JournalStorage, JsonStorage
+from gui.schedule_view import ScheduleWindow, render_day
+
+FIRST_NAMES = ['Анна', 'Ирина', 'Олег', 'Павел', 'Ольга', 'Елена', 'Игорь', 'Мария', 'Денис', 'Юлия']
+LAST_NAMES = ['Иванова', 'Петров', 'Смирнова', 'Кузнецов', 'Попова', 'Соколов', 'Лебедева', 'Козлов']
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(samples: List[float]) -> dict:
+    values = sorted(samples)
+    us = 1e6
+    return {
+        'count': len(values),
+        'total_s': round(sum(values), 6),
+        'mean_us': round(sum(values) / len(values) * us, 2) if values else 0.0,
+        'p50_us': round(percentile(values, 0.50) * us, 2),
+        'p90_us': round(percentile(values, 0.90) * us, 2),
+        'p99_us': round(percentile(values, 0.99) * us, 2),
+        'max_us': round(values[-1] * us, 2) if values else 0.0,
+    }
+
+
+class Timings:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def measure(self, name: str, func, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.samples.setdefault(name, []).append(time.perf_counter() - t0)
+
+    def report(self) -> dict:
+        return {name: summarize(values) for name, values in self.samples.items()}
+
+
+def make_data_class(master_count: int):
+    class SyntheticSalonData(SalonData):
+        def _build_masters(self):
+            return [Master(i, f'Мастер {i}') for i in range(1, master_count + 1)]
+    return SyntheticSalonData
+
+
+def make_storage(backend: str, path: str):
+    if backend == 'json':
+        return JsonStorage(path)
+    if backend == 'background':
+        return BackgroundStorage(JournalStorage(path))
+    return JournalStorage(path)
+
+
+def populate(data: SalonData, args, timings: Timings, rng: random.Random) -> Tuple[List[str], int]:
+    """Наполняет салон; возвращает имена клиентов и число отклонённых записей"""
+    names = []
+    for i in range(args.clients):
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}'
+        phone = f'+79{rng.randrange(10 ** 9):09d}'
+        timings.measure('add_client', data.add_client, name, phone, f'client{i}@example.com')
+        names.append(name)
+
+    first_day = date.today() - timedelta(days=30 * args.months // 2)
+    days = [first_day + timedelta(days=i) for i in range(30 * args.months)]
+    masters = [m.id for m in data.masters]
+    if args.templates:
+        # Один повторяющийся график на мастера вместо строки на каждый день
+        for master_id in masters:
+            timings.measure('add_schedule_template', data.add_schedule_template, master_id, range(7),
+                            '9:00', '21:00', days[0].isoformat(), days[-1].isoformat())
+    else:
+        for day in days:
+            for master_id in masters:
+                timings.measure('add_schedule', data.add_schedule, master_id, day.isoformat(), '9:00', '21:00')
+
+    service_ids = [s.id for s in data.services]
+    rejected = 0
+    for day in days:
+        for master_id in masters:
+            for _ in range(args.per_day):
+                start = datetime(day.year, day.month, day.day, 9) + timedelta(minutes=15 * rng.randrange(44))
+                client_id = rng.randint(1, args.clients)
+                # Отказы (занято, вне графика) считаем отдельно: это другой путь кода
+                t0 = time.perf_counter()
+                try:
+                    data.add_appointment(client_id, master_id, rng.choice(service_ids), start)
+                    name = 'add_appointment'
+                except ValueError:
+                    name = 'add_appointment_rejected'
+                    rejected += 1
+                timings.samples.setdefault(name, []).append(time.perf_counter() - t0)
+    return names, rejected
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='salon-bench-')
+    path = os.path.join(workdir, 'salon_data.json')
+    data_class = make_data_class(args.masters)
+    timings = Timings()
+    try:
+        data = data_class(storage=make_storage(args.backend, path))
+        names, rejected = populate(data, args, timings, rng)
+
+        for name in rng.sample(names, min(len(names), args.lookups)):
+            timings.measure('find_client_by_name', data.find_client_by_name, name)
+            # Как при наборе в комбобоксе: первые буквы фамилии
+            timings.measure('search_clients', data.search_clients, name.split(' ')[1][:rng.randint(1, 5)])
+
+        for _ in range(args.repeat):
+            timings.measure('_save', data._save)
+            data.flush()
+        data.close()
+
+        for _ in range(args.repeat):
+            loaded = timings.measure('_load', data_class, storage=make_storage(args.backend, path))
+            loaded.close()
+
+        loaded = data_class(storage=make_storage(args.backend, path))
+        for day in loaded.dates_with_records():
+            timings.measure('render_day', render_day, loaded, day)
+        window = ScheduleWindow('Неделя', anchor=date.today())
+        for _ in range(args.repeat):
+            timings.measure('render_week', lambda: ''.join(render_day(loaded, d) for d in window.dates(loaded)))
+        # Отчёт за год: первый раз считаются сводки по дням, дальше только складываются
+        year = (date.today() - timedelta(days=364), date.today())
+        timings.measure('period_report_cold', loaded.period_report, *year)
+        for _ in range(args.repeat):
+            timings.measure('period_report', loaded.period_report, *year)
+        loaded.close()
+        file_size = os.path.getsize(path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'config': vars(args),
+        'environment': {'python': sys.version.split()[0], 'platform': platform.platform()},
+        'data_file_bytes': file_size,
+        'appointments_rejected': rejected,
+        'results': timings.report(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочный прогон SalonData')
+    parser.add_argument('--masters', type=int, default=5)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--per-day', type=int, default=8, help='попыток записи на мастера в день')
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--backend', choices=['journal', 'json', 'background'], default='journal')
+    parser.add_argument('--templates', action='store_true', help='графики повторяющимися правилами')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help='файл для результатов (по умолчанию stdout)')
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Локальный SMTP-приёмник для проверки рассылки напоминаний.
+
+Письма никуда не уходят: сервер принимает их и считает получателей.
+Чтобы проверить повторы, можно попросить его временно отказывать
+(451 на каждую fail_every-ю команду RCPT) или рвать соединение
+(на каждом drop_every-м письме — сразу после DATA).
+
+Запуск из папки salon (Ctrl+C — остановить и показать счётчики):
+    python -m benchmarks.smtp_sink --port 2525
+    python -m services.reminders --smtp-port 2525 --rate 0
+"""
+import argparse
+import socketserver
+import sys
+import threading
+from collections import Counter
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, fail_every: int = 0, drop_every: int = 0):
+        super().__init__((host, port), _Handler)
+        self.fail_every = fail_every
+        self.drop_every = drop_every
+        self.received = Counter()
+        self.messages = 0
+        self.refused = 0
+        self.dropped = 0
+        self.connections = 0
+        self._rcpt = 0
+        self._lock = threading.Lock()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> 'SmtpSink':
+        threading.Thread(target=self.serve_forever, name='smtp-sink', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _refuse_rcpt(self) -> bool:
+        with self._lock:
+            self._rcpt += 1
+            refuse = self.fail_every and self._rcpt % self.fail_every == 0
+            self.refused += bool(refuse)
+            return bool(refuse)
+
+    def _deliver(self, recipients) -> bool:
+        """False — оборвать соединение вместо ответа на письмо"""
+        with self._lock:
+            self.messages += 1
+            if self.drop_every and self.messages % self.drop_every == 0:
+                self.dropped += 1
+                return False
+            self.received.update(recipients)
+            return True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: SmtpSink
+
+    def reply(self, text: str):
+        # Ответ целиком одной записью: клиент не ждёт склейки пакетов
+        self.wfile.write(text.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        with self.server._lock:
+            self.server.connections += 1
+        self.reply('220 salon-sink ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb == 'EHLO':
+                self.reply('250-salon-sink\r\n250-8BITMIME\r\n250 SIZE 10485760')
+            elif verb == 'HELO':
+                self.reply('250 salon-sink')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                if self.server._refuse_rcpt():
+                    self.reply('451 Try again later')
+                else:
+                    recipients.append(command.partition(':')[2].strip().strip('<>'))
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                if not recipients:
+                    self.reply('503 No recipients')
+                    continue
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk:
+                        return
+                    if chunk in (b'.\r\n', b'.\n'):
+                        break
+                if not self.server._deliver(recipients):
+                    return
+                recipients = []
+                self.reply('250 OK queued')
+            elif verb == 'RSET':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Локальный SMTP-приёмник')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2525)
+    parser.add_argument('--fail-every', type=int, default=0, help='451 на каждый N-й RCPT')
+    parser.add_argument('--drop-every', type=int, default=0, help='обрыв на каждом N-м письме')
+    args = parser.parse_args(argv)
+    sink = SmtpSink(args.host, args.port, args.fail_every, args.drop_every)
+    print(f'SMTP-приёмник на {args.host}:{sink.port}')
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.server_close()
+    print(f'писем: {sink.messages}, получателей: {len(sink.received)}, соединений: {sink.connections}, '
+          f'отказов: {sink.refused}, обрывов: {sink.dropped}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Несколько процессов одновременно записывают клиентов в один каталог данных.
+
+Каждый процесс открывает свой SalonData над общим файлом (или базой SQLite)
+и в цикле пытается записать клиента на случайное время. В конце данные
+читаются заново и проверяется, что ни одна подтверждённая запись не
+потерялась, у мастеров нет пересекающихся записей, а номера не повторяются.
+
+Запуск из папки salon:
+    python -m benchmarks.stress_shared --processes 4 --ops 500
+    python -m benchmarks.stress_shared --backend sqlite
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from services.locking import SharedJournalStorage
+from services.salon_data import SalonData
+
+MASTERS = 5
+DAYS = 30
+CLIENTS = 20
+
+
+def open_data(backend: str, workdir: str, compact_every: int) -> SalonData:
+    if backend == 'sqlite':
+        from services.sqlite_data import SqliteSalonData
+        return SqliteSalonData(os.path.join(workdir, 'salon_data.db'))
+    storage = SharedJournalStorage(os.path.join(workdir, 'salon_data.json'))
+    # Частое сворачивание журнала проверяет и перечитывание снимка другими процессами
+    storage.COMPACT_EVERY = compact_every
+    return SalonData(storage=storage)
+
+
+def first_day() -> date:
+    return date.today() + timedelta(days=1)
+
+
+def prepare(args, workdir: str):
+    data = open_data(args.backend, workdir, args.compact_every)
+    for i in range(CLIENTS):
+        data.add_client(f'Клиент {i}', f'+7900000{i:04d}', f'c{i}@example.com')
+    for d in range(DAYS):
+        day = (first_day() + timedelta(days=d)).isoformat()
+        for master_id in range(1, MASTERS + 1):
+            data.add_schedule(master_id, day, '9:00', '21:00')
+    data.close()
+
+
+def worker(args, workdir: str, seed: int) -> dict:
+    rng = random.Random(seed)
+    data = open_data(args.backend, workdir, args.compact_every)
+    booked, clients, rejected = [], [], 0
+    service_ids = [s.id for s in data.services]
+    t0 = time.perf_counter()
+    for _ in range(args.ops):
+        if rng.random() < 0.1:
+            client = data.add_client(f'Новый {seed}-{len(clients)}', f'+7911{seed:03d}{len(clients):04d}', 'n@example.com')
+            clients.append(client.id)
+            continue
+        day = first_day() + timedelta(days=rng.randrange(DAYS))
+        start = datetime(day.year, day.month, day.day, 9) + timedelta(minutes=15 * rng.randrange(40))
+        try:
+            appt = data.add_appointment(rng.randint(1, CLIENTS), rng.randint(1, MASTERS),
+                                        rng.choice(service_ids), start)
+        except ValueError:
+            rejected += 1
+            continue
+        booked.append(appt.to_dict())
+    elapsed = time.perf_counter() - t0
+    data.close()
+    return {'booked': booked, 'clients': clients, 'rejected': rejected, 'elapsed': elapsed}
+
+
+def _run_worker(params):
+    return worker(*params)
+
+
+def verify(args, workdir: str, results: list) -> list:
+    data = open_data(args.backend, workdir, args.compact_every)
+    problems = []
+    stored = {a.id: a.to_dict() for a in data.appointments}
+    booked = [a for r in results for a in r['booked']]
+    if len(stored) != len(booked):
+        problems.append(f'записей в файле {len(stored)}, подтверждено {len(booked)}')
+    for a in booked:
+        if stored.get(a['id']) != a:
+            problems.append(f'потеряна или изменена запись {a}')
+    by_master = {}
+    for a in data.appointments:
+        by_master.setdefault(a.master_id, []).append(a)
+    for master_id, items in by_master.items():
+        items.sort(key=lambda a: a.start)
+        for prev, cur in zip(items, items[1:]):
+            if cur.start < prev.end:
+                problems.append(f'у мастера {master_id} пересекаются записи {prev.id} и {cur.id}')
+    client_ids = [c.id for c in data.clients]
+    added = sum(len(r['clients']) for r in results)
+    if len(client_ids) != len(set(client_ids)):
+        problems.append('номера клиентов повторяются')
+    if len(client_ids) != CLIENTS + added:
+        problems.append(f'клиентов {len(client_ids)}, ожидалось {CLIENTS + added}')
+    data.close()
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Одновременная запись из нескольких процессов')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--ops', type=int, default=300, help='операций на процесс')
+    parser.add_argument('--backend', choices=['journal', 'sqlite'], default='journal')
+    parser.add_argument('--compact-every', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='salon-stress-')
+    try:
+        prepare(args, workdir)
+        t0 = time.perf_counter()
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.map(_run_worker, [(args, workdir, seed) for seed in range(args.processes)])
+        elapsed = time.perf_counter() - t0
+        problems = verify(args, workdir, results)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    booked = sum(len(r['booked']) for r in results)
+    rejected = sum(r['rejected'] for r in results)
+    total_ops = args.processes * args.ops
+    print(f'Процессов: {args.processes}, операций: {total_ops} за {elapsed:.2f} с '
+          f'({total_ops / elapsed:.0f} в секунду)')
+    print(f'Записано: {booked}, отказов «занято»: {rejected}')
+    for problem in problems[:20]:
+        print('ОШИБКА:', problem)
+    print('Проверка пройдена' if not problems else f'Найдено проблем: {len(problems)}')
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,394 +1,702 @@
-from datetime import datetime, timedelta
-
-from services.salon_data import SalonData
-
-import customtkinter as ctk
-from tkinter import messagebox
-
-try:
-    from tkcalendar import DateEntry
-    TKCAL_AVAILABLE = True
-except Exception:
-    TKCAL_AVAILABLE = False
-
-
-class AdminGUI(ctk.CTk):
-    def __init__(self, data: SalonData):
-        super().__init__()
-        self.data = data
-        ctk.set_appearance_mode('dark')
-        ctk.set_default_color_theme('blue')
-        self.title('Salon Admin — запись')
-        self.geometry('1200x800')
-
-        self.tabview = ctk.CTkTabview(self, width=1150)
-        self.tabview.pack(padx=20, pady=20, expand=True, fill='both')
-        self.tab_clients = self.tabview.add('Клиенты')
-        self.tab_records = self.tabview.add('Записи')
-
-        self._build_clients_tab()
-        self._build_records_tab()
-
-    def _build_clients_tab(self):
-        f = self.tab_clients
-        left = ctk.CTkFrame(f)
-        left.grid(row=0, column=0, sticky='ns', padx=10, pady=10)
-        right = ctk.CTkFrame(f)
-        right.grid(row=0, column=1, sticky='nsew', padx=10, pady=10)
-        f.grid_columnconfigure(1, weight=1)
-
-        ctk.CTkLabel(left, text='Новый клиент').grid(row=0, column=0, pady=6)
-        self.c_name = ctk.CTkEntry(left, placeholder_text='Имя')
-        self.c_phone = ctk.CTkEntry(left, placeholder_text='Телефон')
-        self.c_email = ctk.CTkEntry(left, placeholder_text='Email')
-        self.c_name.grid(row=1, column=0, pady=4)
-        self.c_phone.grid(row=2, column=0, pady=4)
-        self.c_email.grid(row=3, column=0, pady=4)
-        ctk.CTkButton(left, text='Добавить', command=self._on_add_client).grid(row=4, column=0, pady=8)
-
-        ctk.CTkLabel(right, text='Список клиентов').grid(row=0, column=0, pady=6)
-        self.clients_text = ctk.CTkTextbox(right, width=780, height=640)
-        self.clients_text.grid(row=1, column=0, sticky='nsew')
-        right.grid_rowconfigure(1, weight=1)
-        self._refresh_clients_text()
-
-        # Добавить кнопку очистки
-        ctk.CTkButton(left, text='Очистить все данные', 
-                    command=self._clear_all_data, 
-                    fg_color='red', hover_color='darkred').grid(row=5, column=0, pady=8)
-
-    def _clear_all_data(self):
-        if messagebox.askyesno('Подтверждение', 'Вы уверены что хотите удалить ВСЕ данные?'):
-            self.data.clients = []
-            self.data.appointments = []
-            self.data.schedules = []
-            self.data._save()
-            self._refresh_clients_text()
-            self._refresh_schedule_table()
-            messagebox.showinfo('Готово', 'Все данные очищены')
-
-    def _on_add_client(self):
-        try:
-            client = self.data.add_client(self.c_name.get(), self.c_phone.get(), self.c_email.get())
-            messagebox.showinfo('Успех', f'Клиент {client.name} добавлен')
-            self._refresh_clients_text()
-            # Обновляем комбобокс клиентов в записях
-            self.client_cb.configure(values=[c.name for c in self.data.clients])
-        except Exception as e:
-            messagebox.showerror('Ошибка', str(e))
-
-    def _refresh_clients_text(self):
-        self.clients_text.delete('1.0', 'end')
-        for c in self.data.clients:
-            self.clients_text.insert('end', f"{c.id}. {c.name} — {c.phone} — {c.email}\n")
-
-    def _build_records_tab(self):
-        f = self.tab_records
-        
-        # Левая часть - форма создания записи и графика
-        left_frame = ctk.CTkFrame(f)
-        left_frame.grid(row=0, column=0, sticky='ns', padx=10, pady=10)
-        
-        # Правая часть - таблица с расписанием и записями
-        right_frame = ctk.CTkFrame(f)
-        right_frame.grid(row=0, column=1, sticky='nsew', padx=10, pady=10)
-        f.grid_columnconfigure(1, weight=1)
-        f.grid_rowconfigure(0, weight=1)
-
-        # === ФОРМА СОЗДАНИЯ ЗАПИСИ ===
-        form_frame = ctk.CTkFrame(left_frame)
-        form_frame.pack(fill='x', padx=5, pady=5)
-        
-        ctk.CTkLabel(form_frame, text='Создать запись', font=('Arial', 14, 'bold')).pack(pady=6)
-
-        # Клиент
-        client_frame = ctk.CTkFrame(form_frame)
-        client_frame.pack(fill='x', padx=5, pady=2)
-        ctk.CTkLabel(client_frame, text='Клиент:').pack(side='left', padx=5)
-        self.client_cb = ctk.CTkComboBox(client_frame, values=[c.name for c in self.data.clients], width=200)
-        self.client_cb.pack(side='left', padx=5, pady=4, fill='x', expand=True)
-
-        # Мастер
-        master_frame = ctk.CTkFrame(form_frame)
-        master_frame.pack(fill='x', padx=5, pady=2)
-        ctk.CTkLabel(master_frame, text='Мастер:').pack(side='left', padx=5)
-        self.master_cb = ctk.CTkComboBox(master_frame, values=[m.name for m in self.data.masters], width=200)
-        self.master_cb.pack(side='left', padx=5, pady=4, fill='x', expand=True)
-
-        # Услуга с отображением времени
-        service_frame = ctk.CTkFrame(form_frame)
-        service_frame.pack(fill='x', padx=5, pady=2)
-        ctk.CTkLabel(service_frame, text='Услуга:').pack(side='left', padx=5)
-        
-        # Создаем список услуг с указанием времени
-        service_values = []
-        for s in self.data.services:
-            hours = s.duration_min // 60
-            minutes = s.duration_min % 60
-            if hours > 0 and minutes > 0:
-                time_str = f"({hours}ч {minutes}мин)"
-            elif hours > 0:
-                time_str = f"({hours}ч)"
-            else:
-                time_str = f"({minutes}мин)"
-            service_values.append(f"{s.id}. {s.name} {time_str}")
-        
-        self.service_cb = ctk.CTkComboBox(service_frame, 
-                                        values=service_values, 
-                                        width=200,
-                                        command=self._on_service_selected)
-        self.service_cb.pack(side='left', padx=5, pady=4, fill='x', expand=True)
-
-        # Дата
-        date_frame = ctk.CTkFrame(form_frame)
-        date_frame.pack(fill='x', padx=5, pady=2)
-        ctk.CTkLabel(date_frame, text='Дата:').pack(side='left', padx=5)
-        if TKCAL_AVAILABLE:
-            self.book_date = DateEntry(
-                date_frame, 
-                date_pattern='yyyy-mm-dd',
-                font=('Arial', 12),
-                width=15
-            )
-            self.book_date.pack(side='left', padx=5, pady=4)
-        else:
-            self.book_date = ctk.CTkEntry(date_frame, placeholder_text='YYYY-MM-DD', width=150)
-            self.book_date.pack(side='left', padx=5, pady=4)
-
-        # Время
-        time_frame = ctk.CTkFrame(form_frame)
-        time_frame.pack(fill='x', padx=5, pady=2)
-        ctk.CTkLabel(time_frame, text='Время:').pack(side='left', padx=5)
-        self.time_entry = ctk.CTkEntry(time_frame, placeholder_text='например 10:30', width=150)
-        self.time_entry.pack(side='left', padx=5, pady=4)
-
-        # Информация о времени окончания
-        self.time_info_label = ctk.CTkLabel(form_frame, text="", text_color="lightblue")
-        self.time_info_label.pack(pady=2)
-
-        # Кнопка создания записи
-        ctk.CTkButton(form_frame, text='Создать запись', 
-                     command=self._on_create_appointment).pack(pady=8)
-
-        # Разделитель
-        sep1 = ctk.CTkFrame(left_frame, height=2, fg_color='gray30')
-        sep1.pack(fill='x', padx=5, pady=10)
-
-        # === ФОРМА ДОБАВЛЕНИЯ ГРАФИКА ===
-        schedule_frame = ctk.CTkFrame(left_frame)
-        schedule_frame.pack(fill='x', padx=5, pady=5)
-        
-        ctk.CTkLabel(schedule_frame, text='График мастера', font=('Arial', 14, 'bold')).pack(pady=6)
-
-        # Мастер для графика
-        sched_master_frame = ctk.CTkFrame(schedule_frame)
-        sched_master_frame.pack(fill='x', padx=5, pady=2)
-        ctk.CTkLabel(sched_master_frame, text='Мастер:').pack(side='left', padx=5)
-        self.schedule_master_cb = ctk.CTkComboBox(sched_master_frame, 
-                                                values=[m.name for m in self.data.masters], 
-                                                width=200)
-        self.schedule_master_cb.pack(side='left', padx=5, pady=4, fill='x', expand=True)
-
-        # Дата графика
-        sched_date_frame = ctk.CTkFrame(schedule_frame)
-        sched_date_frame.pack(fill='x', padx=5, pady=2)
-        ctk.CTkLabel(sched_date_frame, text='Дата:').pack(side='left', padx=5)
-        if TKCAL_AVAILABLE:
-            self.schedule_date = DateEntry(
-                sched_date_frame, 
-                date_pattern='yyyy-mm-dd',
-                font=('Arial', 12),
-                width=15
-            )
-            self.schedule_date.pack(side='left', padx=5, pady=4)
-        else:
-            self.schedule_date = ctk.CTkEntry(sched_date_frame, placeholder_text='YYYY-MM-DD', width=150)
-            self.schedule_date.pack(side='left', padx=5, pady=4)
-
-        # Время начала и окончания
-        sched_time_frame = ctk.CTkFrame(schedule_frame)
-        sched_time_frame.pack(fill='x', padx=5, pady=2)
-        
-        ctk.CTkLabel(sched_time_frame, text='Начало:').pack(side='left', padx=5)
-        self.s_start = ctk.CTkEntry(sched_time_frame, placeholder_text='HH:MM', width=80)
-        self.s_start.pack(side='left', padx=5, pady=4)
-        
-        ctk.CTkLabel(sched_time_frame, text='Конец:').pack(side='left', padx=5)
-        self.s_end = ctk.CTkEntry(sched_time_frame, placeholder_text='HH:MM', width=80)
-        self.s_end.pack(side='left', padx=5, pady=4)
-
-        # Кнопка добавления графика
-        ctk.CTkButton(schedule_frame, text='Добавить график', 
-                     command=self._on_add_schedule).pack(pady=8)
-
-        # === ТАБЛИЦА РАСПИСАНИЯ И ЗАПИСЕЙ ===
-        ctk.CTkLabel(right_frame, text='Расписание мастеров и записи клиентов', 
-                    font=('Arial', 16, 'bold')).pack(pady=10)
-        
-        # Текстовое поле для отображения данных
-        self.schedule_text = ctk.CTkTextbox(right_frame, width=800, height=650)
-        self.schedule_text.pack(expand=True, fill='both', padx=10, pady=10)
-        
-        # Кнопка обновления таблицы
-        ctk.CTkButton(right_frame, text='Обновить таблицу', 
-                     command=self._refresh_schedule_table).pack(pady=5)
-        
-        # Первоначальное заполнение таблицы
-        self._refresh_schedule_table()
-
-    def _on_service_selected(self, choice):
-        """Обновляет информацию о времени при выборе услуги"""
-        try:
-            if choice:
-                service_id = int(choice.split('.')[0])
-                duration = self.data.get_service_duration(service_id)
-                
-                hours = duration // 60
-                minutes = duration % 60
-                
-                if hours > 0 and minutes > 0:
-                    duration_str = f"{hours}ч {minutes}мин"
-                elif hours > 0:
-                    duration_str = f"{hours}ч"
-                else:
-                    duration_str = f"{minutes}мин"
-                
-                self.time_info_label.configure(text=f"Продолжительность услуги: {duration_str}")
-        except Exception:
-            self.time_info_label.configure(text="")
-
-    def _on_create_appointment(self):
-        try:
-            client_name = self.client_cb.get()
-            master_name = self.master_cb.get()
-            service_text = self.service_cb.get()
-            
-            if not client_name or not master_name or not service_text:
-                raise ValueError('Заполните все поля')
-            
-            client = self.data.find_client_by_name(client_name)
-            if not client:
-                raise ValueError('Клиент не найден')
-            
-            master = next((m for m in self.data.masters if m.name == master_name), None)
-            if not master:
-                raise ValueError('Мастер не найден')
-            
-            service_id = int(service_text.split('.')[0])
-            date_str = self.book_date.get()
-            time_str = self.time_entry.get()
-            
-            start_dt = datetime.strptime(f"{date_str} {time_str}", '%Y-%m-%d %H:%M')
-            
-            # Получаем информацию об услуге для отображения
-            service = next((s for s in self.data.services if s.id == service_id), None)
-            if service:
-                end_dt = start_dt + timedelta(minutes=service.duration_min)
-                duration_info = f" ({service.duration_min} мин)"
-            else:
-                end_dt = start_dt
-                duration_info = ""
-            
-            appointment = self.data.add_appointment(client.id, master.id, service_id, start_dt)
-            
-            # Показываем подробное сообщение о созданной записи
-            service_name = self.data.get_service_name(service_id)
-            messagebox.showinfo('Успех', 
-                              f'Запись создана!\n'
-                              f'Время: {time_str} - {end_dt.strftime("%H:%M")}\n'
-                              f'Услуга: {service_name}{duration_info}\n'
-                              f'Клиент: {client_name}\n'
-                              f'Мастер: {master_name}')
-            
-            self._refresh_schedule_table()
-            self.time_info_label.configure(text="")  # Очищаем информацию о времени
-            
-        except Exception as e:
-            messagebox.showerror('Ошибка', str(e))
-
-    def _on_add_schedule(self):
-        try:
-            master_name = self.schedule_master_cb.get()
-            if not master_name:
-                raise ValueError('Выберите мастера')
-            master = next(m for m in self.data.masters if m.name == master_name)
-            date = self.schedule_date.get()
-            start = self.s_start.get()
-            end = self.s_end.get()
-            self.data.add_schedule(master.id, date, start, end)
-            messagebox.showinfo('ОК', 'График добавлен')
-            self._refresh_schedule_table()
-        except Exception as e:
-            messagebox.showerror('Ошибка', str(e))
-
-    def _refresh_schedule_table(self):
-        """Обновление таблицы с расписанием и записями"""
-        self.schedule_text.delete('1.0', 'end')
-        
-        # Собираем все уникальные даты из расписаний и записей
-        all_dates = set()
-        for schedule in self.data.schedules:
-            all_dates.add(schedule.date)
-        for appointment in self.data.appointments:
-            appointment_date = appointment.start.split('T')[0]
-            all_dates.add(appointment_date)
-        
-        # Сортируем даты
-        sorted_dates = sorted(all_dates, reverse=True)
-        
-        if not sorted_dates:
-            self.schedule_text.insert('end', "Нет данных о расписании и записях\n")
-            self.schedule_text.insert('end', "Добавьте график работы мастеров и записи клиентов\n")
-            return
-        
-        for date in sorted_dates:
-            # Простое текстовое форматирование без тегов
-            self.schedule_text.insert('end', f"\n📅 ДАТА: {date}\n")
-            self.schedule_text.insert('end', "=" * 60 + "\n\n")
-            
-            # Расписание мастеров на эту дату
-            daily_schedules = [s for s in self.data.schedules if s.date == date]
-            if daily_schedules:
-                self.schedule_text.insert('end', "🕐 РАБОЧИЙ ГРАФИК МАСТЕРОВ:\n")
-                for schedule in daily_schedules:
-                    master_name = self.data.get_master_name(schedule.master_id)
-                    self.schedule_text.insert('end', 
-                        f"   • {master_name}: {schedule.start_time} - {schedule.end_time}\n")
-                self.schedule_text.insert('end', "\n")
-            
-            # Записи клиентов на эту дату
-            daily_appointments = [a for a in self.data.appointments if a.start.startswith(date)]
-            if daily_appointments:
-                self.schedule_text.insert('end', "📋 ЗАПИСИ КЛИЕНТОВ:\n")
-                for appointment in daily_appointments:
-                    client_name = self.data.get_client_name(appointment.client_id)
-                    master_name = self.data.get_master_name(appointment.master_id)
-                    service_name = self.data.get_service_name(appointment.service_id)
-                    service_duration = self.data.get_service_duration(appointment.service_id)
-                    
-                    # Извлекаем время из ISO формата
-                    start_time = appointment.start.split('T')[1][:5]
-                    end_time = appointment.end.split('T')[1][:5]
-                    
-                    # Форматируем информацию о продолжительности
-                    hours = service_duration // 60
-                    minutes = service_duration % 60
-                    if hours > 0 and minutes > 0:
-                        duration_str = f" ({hours}ч {minutes}мин)"
-                    elif hours > 0:
-                        duration_str = f" ({hours}ч)"
-                    else:
-                        duration_str = f" ({minutes}мин)"
-                    
-                    self.schedule_text.insert('end', 
-                        f"   • Время: {start_time}-{end_time}{duration_str}\n")
-                    self.schedule_text.insert('end', 
-                        f"     Мастер: {master_name}\n")
-                    self.schedule_text.insert('end', 
-                        f"     Клиент: {client_name}\n")
-                    self.schedule_text.insert('end', 
-                        f"     Услуга: {service_name}\n\n")
-            else:
-                self.schedule_text.insert('end', "   На эту дату нет записей клиентов\n\n")
-            
-            self.schedule_text.insert('end', "\n")
\ No newline at end of file
+import queue
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Optional
+
+from services import perf
+from services.changes import AppointmentAdded, Cleared, ClientAdded, Reloaded, ScheduleAdded, TemplateChanged
+from services.salon_data import SalonData
+from services.persistence import BackgroundStorage
+from gui.schedule_view import ScheduleWindow, render_day
+from gui.report_view import PERIODS, period_bounds, render_report
+
+import customtkinter as ctk
+from tkinter import messagebox
+
+
+@lru_cache(maxsize=None)
+def _date_entry_class():
+    """DateEntry из tkcalendar или None. tkcalendar тянет за собой babel,
+    поэтому импортируется при построении вкладки с датами, а не при запуске"""
+    try:
+        from tkcalendar import DateEntry
+    except Exception:
+        return None
+    return DateEntry
+
+
+class AdminGUI(ctk.CTk):
+    CLIENT_SUGGESTIONS = 15
+    PERF_REFRESH_MS = 1000
+    WEEKDAYS = ('Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс')
+    SHARED_REFRESH_MS = 2000
+
+    def __init__(self, load_data: Callable[[], SalonData], on_ready: Optional[Callable[[], None]] = None):
+        """load_data вызывается, когда окно уже на экране; on_ready — когда первая вкладка готова"""
+        super().__init__()
+        self.data: Optional[SalonData] = None
+        self._load_data = load_data
+        self._on_ready = on_ready
+        ctk.set_appearance_mode('dark')
+        ctk.set_default_color_theme('blue')
+        self.title('Salon Admin — запись')
+        self.geometry('1200x800')
+
+        # Вкладки пустые: содержимое строится при первом показе вкладки
+        self.tabview = ctk.CTkTabview(self, width=1150, command=self._on_tab_changed)
+        self.tabview.pack(padx=20, pady=20, expand=True, fill='both')
+        self.tab_clients = self.tabview.add('Клиенты')
+        self.tab_records = self.tabview.add('Записи')
+        self.tab_reports = self.tabview.add('Отчёты')
+        self._tab_builders = {'Клиенты': self._build_clients_tab, 'Записи': self._build_records_tab,
+                              'Отчёты': self._build_reports_tab}
+        if perf.ENABLED:
+            self.tab_perf = self.tabview.add('Производительность')
+            self._tab_builders['Производительность'] = self._build_perf_tab
+        self._built_tabs = set()
+
+        # Строка состояния: загрузка данных, затем фоновая запись на диск
+        self.save_status_label = ctk.CTkLabel(self, text='Загрузка данных…', text_color='gray60')
+        self.save_status_label.pack(side='bottom', anchor='e', padx=20)
+        self._storage_events = queue.Queue()
+        self._shown = False
+        self.bind('<Map>', self._on_first_map, add='+')
+        perf.mark('окно создано')
+
+    def _on_first_map(self, event):
+        if self._shown or event.widget is not self:
+            return
+        self._shown = True
+        perf.mark('окно на экране')
+        # Данные грузятся после того, как окно дорисуется
+        self.after_idle(lambda: self.after(1, self._load))
+
+    def _load(self):
+        try:
+            self.data = self._load_data()
+        except Exception as e:
+            messagebox.showerror('Ошибка загрузки данных', str(e))
+            self.destroy()
+            return
+        perf.mark('данные загружены')
+        self.save_status_label.configure(text='')
+        self.data.changes.subscribe(self._on_data_changes)
+        self._watch_storage()
+        self._on_tab_changed()
+        perf.mark('первая вкладка готова')
+        if self._on_ready is not None:
+            self._on_ready()
+
+    def _on_tab_changed(self):
+        name = self.tabview.get()
+        if self.data is None or name in self._built_tabs:
+            return
+        self._built_tabs.add(name)
+        self._tab_builders[name]()
+
+    def _watch_storage(self):
+        if isinstance(self.data.storage, BackgroundStorage):
+            self.data.storage.on_flushed = lambda n: self._storage_events.put(('flushed', n))
+            self.data.storage.on_error = lambda e: self._storage_events.put(('error', e))
+            self.after(200, self._poll_storage_events)
+        if self.data.shared:
+            self.after(self.SHARED_REFRESH_MS, self._poll_shared_changes)
+
+    def _poll_storage_events(self):
+        """Колбэки потока записи приходят сюда через очередь и after()"""
+        while True:
+            try:
+                kind, value = self._storage_events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'flushed':
+                self.save_status_label.configure(text=f"Сохранено в {datetime.now():%H:%M:%S}")
+            else:
+                self.save_status_label.configure(text='Ошибка сохранения')
+                messagebox.showerror('Ошибка сохранения', str(value))
+        self.after(200, self._poll_storage_events)
+
+    def _poll_shared_changes(self):
+        """Общий каталог или база SQLite: чужие записи приходят в _on_data_changes"""
+        try:
+            self.data.refresh()
+        except OSError:
+            pass
+        self.after(self.SHARED_REFRESH_MS, self._poll_shared_changes)
+
+    @perf.timed
+    def _on_data_changes(self, events):
+        """Лента изменений: вкладки дорисовывают только то, что поменялось"""
+        if isinstance(events[0], (Cleared, Reloaded)):
+            # Пачка, где есть сброс, начинается с него; остальное в ней уже учтено в данных
+            if 'Клиенты' in self._built_tabs:
+                self._refresh_clients_text()
+            if 'Записи' in self._built_tabs:
+                self._set_client_choices([])
+                self._refresh_schedule_table()
+                self._refresh_free_slots()
+            return
+        clients = [e.client for e in events if isinstance(e, ClientAdded)]
+        if clients and 'Клиенты' in self._built_tabs:
+            self.clients_text.insert('end', ''.join(self._client_line(c) for c in clients))
+        if 'Записи' not in self._built_tabs:
+            return
+        if clients:
+            self._offer_new_clients(clients)
+        days, whole_window = set(), False
+        for e in events:
+            if isinstance(e, AppointmentAdded):
+                days.add(e.appointment.date)
+            elif isinstance(e, ScheduleAdded):
+                days.add(e.schedule.date)
+            elif isinstance(e, TemplateChanged):
+                if e.date is None:
+                    whole_window = True
+                else:
+                    days.add(e.date)
+        if whole_window:
+            self._refresh_schedule_table()
+        else:
+            for day in sorted(days):
+                self._patch_schedule_day(day)
+        if days or whole_window:
+            self._refresh_free_slots()
+
+    def _build_clients_tab(self):
+        f = self.tab_clients
+        left = ctk.CTkFrame(f)
+        left.grid(row=0, column=0, sticky='ns', padx=10, pady=10)
+        right = ctk.CTkFrame(f)
+        right.grid(row=0, column=1, sticky='nsew', padx=10, pady=10)
+        f.grid_columnconfigure(1, weight=1)
+
+        ctk.CTkLabel(left, text='Новый клиент').grid(row=0, column=0, pady=6)
+        self.c_name = ctk.CTkEntry(left, placeholder_text='Имя')
+        self.c_phone = ctk.CTkEntry(left, placeholder_text='Телефон')
+        self.c_email = ctk.CTkEntry(left, placeholder_text='Email')
+        self.c_name.grid(row=1, column=0, pady=4)
+        self.c_phone.grid(row=2, column=0, pady=4)
+        self.c_email.grid(row=3, column=0, pady=4)
+        ctk.CTkButton(left, text='Добавить', command=self._on_add_client).grid(row=4, column=0, pady=8)
+
+        ctk.CTkLabel(right, text='Список клиентов').grid(row=0, column=0, pady=6)
+        self.clients_text = ctk.CTkTextbox(right, width=780, height=640)
+        self.clients_text.grid(row=1, column=0, sticky='nsew')
+        right.grid_rowconfigure(1, weight=1)
+        self._refresh_clients_text()
+
+        # Добавить кнопку очистки
+        ctk.CTkButton(left, text='Очистить все данные', 
+                    command=self._clear_all_data, 
+                    fg_color='red', hover_color='darkred').grid(row=5, column=0, pady=8)
+
+    def _build_reports_tab(self):
+        f = self.tab_reports
+        controls = ctk.CTkFrame(f)
+        controls.pack(fill='x', padx=10, pady=10)
+        ctk.CTkLabel(controls, text='Период:').pack(side='left', padx=5)
+        self.report_period_cb = ctk.CTkComboBox(controls, values=list(PERIODS), width=120,
+                                                command=self._on_report_period)
+        self.report_period_cb.set('Месяц')
+        self.report_period_cb.pack(side='left', padx=5, pady=4)
+        ctk.CTkLabel(controls, text='С:').pack(side='left', padx=5)
+        self.report_from = ctk.CTkEntry(controls, placeholder_text='YYYY-MM-DD', width=120)
+        self.report_from.pack(side='left', padx=5, pady=4)
+        ctk.CTkLabel(controls, text='По:').pack(side='left', padx=5)
+        self.report_to = ctk.CTkEntry(controls, placeholder_text='YYYY-MM-DD', width=120)
+        self.report_to.pack(side='left', padx=5, pady=4)
+        ctk.CTkButton(controls, text='Построить', command=self._refresh_report).pack(side='left', padx=10)
+
+        self.report_text = ctk.CTkTextbox(f, width=1000, height=650)
+        self.report_text.pack(expand=True, fill='both', padx=10, pady=10)
+        self._on_report_period('Месяц')
+
+    def _on_report_period(self, period):
+        first, last = period_bounds(period)
+        for entry, value in ((self.report_from, first), (self.report_to, last)):
+            entry.delete(0, 'end')
+            entry.insert(0, value.isoformat())
+        self._refresh_report()
+
+    @perf.timed
+    def _refresh_report(self):
+        try:
+            report = self.data.period_report(self.report_from.get().strip(), self.report_to.get().strip())
+        except Exception as e:
+            messagebox.showerror('Ошибка', str(e))
+            return
+        self.report_text.delete('1.0', 'end')
+        self.report_text.insert('end', render_report(report))
+
+    def _build_perf_tab(self):
+        """Замеры SALON_PERF: таблица обновляется раз в секунду, пока вкладка открыта"""
+        f = self.tab_perf
+        controls = ctk.CTkFrame(f)
+        controls.pack(fill='x', padx=10, pady=10)
+        ctk.CTkButton(controls, text='Сбросить', command=self._on_perf_reset).pack(side='left', padx=5)
+        ctk.CTkButton(controls, text='Записать в журнал', command=self._on_perf_dump).pack(side='left', padx=5)
+        self.perf_profile_btn = ctk.CTkButton(controls, text='Профиль ▶', command=self._on_perf_profile)
+        self.perf_profile_btn.pack(side='left', padx=5)
+        ctk.CTkLabel(controls, text=f'Журнал: {perf.LOG_PATH}', text_color='gray60').pack(side='left', padx=10)
+        self.perf_text = ctk.CTkTextbox(f, width=1000, height=650, font=('Courier New', 12))
+        self.perf_text.pack(expand=True, fill='both', padx=10, pady=10)
+        self.after(self.PERF_REFRESH_MS, self._poll_perf)
+
+    def _poll_perf(self):
+        if self.tabview.get() == 'Производительность' and not perf.profiling():
+            self.perf_text.delete('1.0', 'end')
+            self.perf_text.insert('end', perf.report_text())
+        self.after(self.PERF_REFRESH_MS, self._poll_perf)
+
+    def _on_perf_reset(self):
+        perf.reset()
+        self.perf_text.delete('1.0', 'end')
+
+    def _on_perf_dump(self):
+        perf.dump()
+        messagebox.showinfo('ОК', f'Замеры записаны в {perf.LOG_PATH}')
+
+    def _on_perf_profile(self):
+        if not perf.profiling():
+            perf.start_profile()
+            self.perf_profile_btn.configure(text='Профиль ■')
+            return
+        summary = perf.stop_profile()
+        self.perf_profile_btn.configure(text='Профиль ▶')
+        self.perf_text.delete('1.0', 'end')
+        self.perf_text.insert('end', summary)
+
+    def _clear_all_data(self):
+        if messagebox.askyesno('Подтверждение', 'Вы уверены что хотите удалить ВСЕ данные?'):
+            self.data.clear()
+            if 'Записи' in self._built_tabs:
+                self.client_cb.set('')
+            messagebox.showinfo('Готово', 'Все данные очищены')
+
+    def _on_add_client(self):
+        try:
+            client = self.data.add_client(self.c_name.get(), self.c_phone.get(), self.c_email.get())
+            messagebox.showinfo('Успех', f'Клиент {client.name} добавлен')
+        except Exception as e:
+            messagebox.showerror('Ошибка', str(e))
+
+    @staticmethod
+    def _client_label(client) -> str:
+        # Телефон в подписи различает клиентов с одинаковыми именами
+        return f"{client.name} ({client.phone})"
+
+    def _set_client_choices(self, clients):
+        self._client_choices = {self._client_label(c): c.id for c in clients}
+        self.client_cb.configure(values=list(self._client_choices))
+
+    def _offer_new_clients(self, clients):
+        """Новые клиенты попадают в подсказки, если подходят к набранному тексту и есть место"""
+        text = self.client_cb.get().strip().lower()
+        added = False
+        for c in clients:
+            if len(self._client_choices) >= self.CLIENT_SUGGESTIONS:
+                break
+            if not text or c.name.lower().startswith(text):
+                self._client_choices[self._client_label(c)] = c.id
+                added = True
+        if added:
+            self.client_cb.configure(values=list(self._client_choices))
+
+    @perf.timed
+    def _on_client_typed(self, event=None):
+        text = self.client_cb.get()
+        if text in self._client_choices:
+            return
+        self._set_client_choices(self.data.search_clients(text, limit=self.CLIENT_SUGGESTIONS))
+
+    def _selected_client(self):
+        """Клиент из комбобокса: выбранный из подсказок — по id, набранный вручную — по поиску"""
+        text = self.client_cb.get().strip()
+        client_id = self._client_choices.get(text)
+        if client_id is not None:
+            return self.data.get_client(client_id)
+        matches = self.data.search_clients(text, limit=self.CLIENT_SUGGESTIONS)
+        candidates = [c for c in matches if c.name.lower() == text.lower()] or matches
+        if len(candidates) > 1:
+            raise ValueError('Найдено несколько клиентов — выберите из списка')
+        return candidates[0] if candidates else None
+
+    @staticmethod
+    def _client_line(client) -> str:
+        return f"{client.id}. {client.name} — {client.phone} — {client.email}\n"
+
+    @perf.timed
+    def _refresh_clients_text(self):
+        self.clients_text.delete('1.0', 'end')
+        self.clients_text.insert('end', ''.join(self._client_line(c) for c in self.data.clients))
+
+    def _build_records_tab(self):
+        f = self.tab_records
+        
+        # Левая часть - форма создания записи и графика
+        left_frame = ctk.CTkFrame(f)
+        left_frame.grid(row=0, column=0, sticky='ns', padx=10, pady=10)
+        
+        # Правая часть - таблица с расписанием и записями
+        right_frame = ctk.CTkFrame(f)
+        right_frame.grid(row=0, column=1, sticky='nsew', padx=10, pady=10)
+        f.grid_columnconfigure(1, weight=1)
+        f.grid_rowconfigure(0, weight=1)
+
+        # === ФОРМА СОЗДАНИЯ ЗАПИСИ ===
+        form_frame = ctk.CTkFrame(left_frame)
+        form_frame.pack(fill='x', padx=5, pady=5)
+        
+        ctk.CTkLabel(form_frame, text='Создать запись', font=('Arial', 14, 'bold')).pack(pady=6)
+
+        # Клиент
+        client_frame = ctk.CTkFrame(form_frame)
+        client_frame.pack(fill='x', padx=5, pady=2)
+        ctk.CTkLabel(client_frame, text='Клиент:').pack(side='left', padx=5)
+        # Список не заполняется целиком: варианты подбираются по мере набора
+        self.client_cb = ctk.CTkComboBox(client_frame, values=[], width=200)
+        self.client_cb.pack(side='left', padx=5, pady=4, fill='x', expand=True)
+        self.client_cb.set('')
+        self.client_cb.bind('<KeyRelease>', self._on_client_typed)
+        self._client_choices = {}
+
+        # Мастер
+        master_frame = ctk.CTkFrame(form_frame)
+        master_frame.pack(fill='x', padx=5, pady=2)
+        ctk.CTkLabel(master_frame, text='Мастер:').pack(side='left', padx=5)
+        self.master_cb = ctk.CTkComboBox(master_frame, values=[m.name for m in self.data.masters], width=200,
+                                         command=lambda choice: self._refresh_free_slots())
+        self.master_cb.pack(side='left', padx=5, pady=4, fill='x', expand=True)
+
+        # Услуга с отображением времени
+        service_frame = ctk.CTkFrame(form_frame)
+        service_frame.pack(fill='x', padx=5, pady=2)
+        ctk.CTkLabel(service_frame, text='Услуга:').pack(side='left', padx=5)
+        
+        # Создаем список услуг с указанием времени
+        service_values = []
+        for s in self.data.services:
+            hours = s.duration_min // 60
+            minutes = s.duration_min % 60
+            if hours > 0 and minutes > 0:
+                time_str = f"({hours}ч {minutes}мин)"
+            elif hours > 0:
+                time_str = f"({hours}ч)"
+            else:
+                time_str = f"({minutes}мин)"
+            service_values.append(f"{s.id}. {s.name} {time_str}")
+        
+        self.service_cb = ctk.CTkComboBox(service_frame, 
+                                        values=service_values, 
+                                        width=200,
+                                        command=self._on_service_selected)
+        self.service_cb.pack(side='left', padx=5, pady=4, fill='x', expand=True)
+
+        # Дата
+        date_frame = ctk.CTkFrame(form_frame)
+        date_frame.pack(fill='x', padx=5, pady=2)
+        ctk.CTkLabel(date_frame, text='Дата:').pack(side='left', padx=5)
+        DateEntry = _date_entry_class()
+        if DateEntry is not None:
+            self.book_date = DateEntry(
+                date_frame, 
+                date_pattern='yyyy-mm-dd',
+                font=('Arial', 12),
+                width=15
+            )
+            self.book_date.pack(side='left', padx=5, pady=4)
+            self.book_date.bind('<<DateEntrySelected>>', lambda e: self._refresh_free_slots())
+        else:
+            self.book_date = ctk.CTkEntry(date_frame, placeholder_text='YYYY-MM-DD', width=150)
+            self.book_date.pack(side='left', padx=5, pady=4)
+            self.book_date.bind('<KeyRelease>', lambda e: self._refresh_free_slots())
+
+        # Время
+        time_frame = ctk.CTkFrame(form_frame)
+        time_frame.pack(fill='x', padx=5, pady=2)
+        ctk.CTkLabel(time_frame, text='Время:').pack(side='left', padx=5)
+        self.time_entry = ctk.CTkEntry(time_frame, placeholder_text='например 10:30', width=150)
+        self.time_entry.pack(side='left', padx=5, pady=4)
+
+        # Информация о времени окончания
+        self.time_info_label = ctk.CTkLabel(form_frame, text="", text_color="lightblue")
+        self.time_info_label.pack(pady=2)
+
+        # Подсказка с ближайшим свободным временем
+        self.free_slots_label = ctk.CTkLabel(form_frame, text="", text_color="lightgreen", justify='left')
+        self.free_slots_label.pack(pady=2)
+
+        # Кнопка создания записи
+        ctk.CTkButton(form_frame, text='Создать запись', 
+                     command=self._on_create_appointment).pack(pady=8)
+
+        # Разделитель
+        sep1 = ctk.CTkFrame(left_frame, height=2, fg_color='gray30')
+        sep1.pack(fill='x', padx=5, pady=10)
+
+        # === ФОРМА ДОБАВЛЕНИЯ ГРАФИКА ===
+        schedule_frame = ctk.CTkFrame(left_frame)
+        schedule_frame.pack(fill='x', padx=5, pady=5)
+        
+        ctk.CTkLabel(schedule_frame, text='График мастера', font=('Arial', 14, 'bold')).pack(pady=6)
+
+        # Мастер для графика
+        sched_master_frame = ctk.CTkFrame(schedule_frame)
+        sched_master_frame.pack(fill='x', padx=5, pady=2)
+        ctk.CTkLabel(sched_master_frame, text='Мастер:').pack(side='left', padx=5)
+        self.schedule_master_cb = ctk.CTkComboBox(sched_master_frame, 
+                                                values=[m.name for m in self.data.masters], 
+                                                width=200)
+        self.schedule_master_cb.pack(side='left', padx=5, pady=4, fill='x', expand=True)
+
+        # Дата графика
+        sched_date_frame = ctk.CTkFrame(schedule_frame)
+        sched_date_frame.pack(fill='x', padx=5, pady=2)
+        ctk.CTkLabel(sched_date_frame, text='Дата:').pack(side='left', padx=5)
+        if DateEntry is not None:
+            self.schedule_date = DateEntry(
+                sched_date_frame, 
+                date_pattern='yyyy-mm-dd',
+                font=('Arial', 12),
+                width=15
+            )
+            self.schedule_date.pack(side='left', padx=5, pady=4)
+        else:
+            self.schedule_date = ctk.CTkEntry(sched_date_frame, placeholder_text='YYYY-MM-DD', width=150)
+            self.schedule_date.pack(side='left', padx=5, pady=4)
+
+        # Время начала и окончания
+        sched_time_frame = ctk.CTkFrame(schedule_frame)
+        sched_time_frame.pack(fill='x', padx=5, pady=2)
+        
+        ctk.CTkLabel(sched_time_frame, text='Начало:').pack(side='left', padx=5)
+        self.s_start = ctk.CTkEntry(sched_time_frame, placeholder_text='HH:MM', width=80)
+        self.s_start.pack(side='left', padx=5, pady=4)
+        
+        ctk.CTkLabel(sched_time_frame, text='Конец:').pack(side='left', padx=5)
+        self.s_end = ctk.CTkEntry(sched_time_frame, placeholder_text='HH:MM', width=80)
+        self.s_end.pack(side='left', padx=5, pady=4)
+
+        # Повтор по дням недели: отмеченные дни начиная с даты графика
+        sched_repeat_frame = ctk.CTkFrame(schedule_frame)
+        sched_repeat_frame.pack(fill='x', padx=5, pady=2)
+        ctk.CTkLabel(sched_repeat_frame, text='Повторять:').pack(side='left', padx=5)
+        self.s_weekdays = []
+        for name in self.WEEKDAYS:
+            var = ctk.BooleanVar(value=False)
+            ctk.CTkCheckBox(sched_repeat_frame, text=name, variable=var, width=40).pack(side='left', padx=1)
+            self.s_weekdays.append(var)
+        sched_until_frame = ctk.CTkFrame(schedule_frame)
+        sched_until_frame.pack(fill='x', padx=5, pady=2)
+        ctk.CTkLabel(sched_until_frame, text='До:').pack(side='left', padx=5)
+        self.s_until = ctk.CTkEntry(sched_until_frame, placeholder_text='YYYY-MM-DD (без конца)', width=180)
+        self.s_until.pack(side='left', padx=5, pady=4)
+
+        # Кнопка добавления графика
+        ctk.CTkButton(schedule_frame, text='Добавить график', 
+                     command=self._on_add_schedule).pack(pady=8)
+        ctk.CTkButton(schedule_frame, text='Выходной в эту дату',
+                      command=self._on_skip_schedule_day).pack(pady=(0, 8))
+
+        # === ТАБЛИЦА РАСПИСАНИЯ И ЗАПИСЕЙ ===
+        ctk.CTkLabel(right_frame, text='Расписание мастеров и записи клиентов', 
+                    font=('Arial', 16, 'bold')).pack(pady=10)
+
+        # Навигация: показываем только один день, неделю или страницу списка
+        self.schedule_window = ScheduleWindow()
+        nav_frame = ctk.CTkFrame(right_frame)
+        nav_frame.pack(fill='x', padx=10)
+        ctk.CTkButton(nav_frame, text='◀', width=40,
+                      command=lambda: self._shift_schedule_window(-1)).pack(side='left', padx=5, pady=4)
+        ctk.CTkButton(nav_frame, text='▶', width=40,
+                      command=lambda: self._shift_schedule_window(1)).pack(side='left', padx=5, pady=4)
+        ctk.CTkButton(nav_frame, text='Сегодня', width=90,
+                      command=self._schedule_go_today).pack(side='left', padx=5, pady=4)
+        self.schedule_mode_cb = ctk.CTkComboBox(nav_frame, values=list(ScheduleWindow.MODES), width=120,
+                                                command=self._on_schedule_mode)
+        self.schedule_mode_cb.set(self.schedule_window.mode)
+        self.schedule_mode_cb.pack(side='left', padx=5, pady=4)
+        self.schedule_range_label = ctk.CTkLabel(nav_frame, text='')
+        self.schedule_range_label.pack(side='left', padx=10)
+
+        # Текстовое поле для отображения данных
+        self.schedule_text = ctk.CTkTextbox(right_frame, width=800, height=650)
+        self.schedule_text.pack(expand=True, fill='both', padx=10, pady=10)
+        
+        # Кнопка обновления таблицы
+        ctk.CTkButton(right_frame, text='Обновить таблицу', 
+                     command=self._refresh_schedule_table).pack(pady=5)
+        
+        # Первоначальное заполнение таблицы
+        self._refresh_schedule_table()
+
+    def _on_service_selected(self, choice):
+        """Обновляет информацию о времени при выборе услуги"""
+        try:
+            if choice:
+                service_id = int(choice.split('.')[0])
+                duration = self.data.get_service_duration(service_id)
+                
+                hours = duration // 60
+                minutes = duration % 60
+                
+                if hours > 0 and minutes > 0:
+                    duration_str = f"{hours}ч {minutes}мин"
+                elif hours > 0:
+                    duration_str = f"{hours}ч"
+                else:
+                    duration_str = f"{minutes}мин"
+                
+                self.time_info_label.configure(text=f"Продолжительность услуги: {duration_str}")
+        except Exception:
+            self.time_info_label.configure(text="")
+        self._refresh_free_slots()
+
+    @perf.timed
+    def _refresh_free_slots(self):
+        """Показывает ближайшее свободное время для выбранной услуги и мастера"""
+        master = self.data.find_master_by_name(self.master_cb.get())
+        try:
+            service_id = int(self.service_cb.get().split('.')[0])
+            day = datetime.strptime(self.book_date.get(), '%Y-%m-%d')
+            slots = self.data.find_free_slots(service_id, (day, day + timedelta(days=13)),
+                                              master_ids=[master.id] if master else None,
+                                              limit=5, not_before=datetime.now())
+        except ValueError:
+            self.free_slots_label.configure(text="")
+            return
+        if not slots:
+            text = "Свободного времени в ближайшие две недели нет"
+        else:
+            lines = [f"{s.start:%d.%m %H:%M} — {self.data.get_master_name(s.master_id)}" for s in slots]
+            text = "Ближайшее свободное время:\n" + "\n".join(lines)
+        self.free_slots_label.configure(text=text)
+
+    def _on_create_appointment(self):
+        try:
+            client_name = self.client_cb.get()
+            master_name = self.master_cb.get()
+            service_text = self.service_cb.get()
+            
+            if not client_name or not master_name or not service_text:
+                raise ValueError('Заполните все поля')
+            
+            client = self._selected_client()
+            if not client:
+                raise ValueError('Клиент не найден')
+            
+            master = self.data.find_master_by_name(master_name)
+            if not master:
+                raise ValueError('Мастер не найден')
+            
+            service_id = int(service_text.split('.')[0])
+            date_str = self.book_date.get()
+            time_str = self.time_entry.get()
+            
+            start_dt = datetime.strptime(f"{date_str} {time_str}", '%Y-%m-%d %H:%M')
+            
+            # Получаем информацию об услуге для отображения
+            service = self.data.get_service(service_id)
+            if service:
+                end_dt = start_dt + timedelta(minutes=service.duration_min)
+                duration_info = f" ({service.duration_min} мин)"
+            else:
+                end_dt = start_dt
+                duration_info = ""
+            
+            appointment = self.data.add_appointment(client.id, master.id, service_id, start_dt)
+            
+            # Показываем подробное сообщение о созданной записи
+            service_name = self.data.get_service_name(service_id)
+            messagebox.showinfo('Успех', 
+                              f'Запись создана!\n'
+                              f'Время: {time_str} - {end_dt.strftime("%H:%M")}\n'
+                              f'Услуга: {service_name}{duration_info}\n'
+                              f'Клиент: {client.name}\n'
+                              f'Мастер: {master_name}')
+            
+            self.time_info_label.configure(text="")  # Очищаем информацию о времени
+            
+        except Exception as e:
+            messagebox.showerror('Ошибка', str(e))
+
+    def _on_add_schedule(self):
+        try:
+            master_name = self.schedule_master_cb.get()
+            if not master_name:
+                raise ValueError('Выберите мастера')
+            master = self.data.find_master_by_name(master_name)
+            if not master:
+                raise ValueError('Мастер не найден')
+            date = self.schedule_date.get()
+            start = self.s_start.get()
+            end = self.s_end.get()
+            weekdays = [i for i, var in enumerate(self.s_weekdays) if var.get()]
+            if weekdays:
+                self.data.add_schedule_template(master.id, weekdays, start, end, date, self.s_until.get().strip())
+                messagebox.showinfo('ОК', 'Повторяющийся график добавлен')
+            else:
+                self.data.add_schedule(master.id, date, start, end)
+                messagebox.showinfo('ОК', 'График добавлен')
+        except Exception as e:
+            messagebox.showerror('Ошибка', str(e))
+
+    def _on_skip_schedule_day(self):
+        """Выходной по повторяющемуся графику выбранного мастера в выбранную дату"""
+        try:
+            master = self.data.find_master_by_name(self.schedule_master_cb.get())
+            if not master:
+                raise ValueError('Выберите мастера')
+            date = self.schedule_date.get()
+            # Дни из правил отличаются отрицательным id: -id правила
+            template_ids = [-s.id for s in self.data.get_schedules_for(master.id, date) if s.id < 0]
+            if not template_ids:
+                raise ValueError('В эту дату у мастера нет повторяющегося графика')
+            # Одной пачкой: день перерисуется один раз, даже если правил несколько
+            with self.data.batch():
+                for template_id in template_ids:
+                    self.data.skip_template_day(template_id, date)
+        except Exception as e:
+            messagebox.showerror('Ошибка', str(e))
+
+    def _shift_schedule_window(self, step: int):
+        self.schedule_window.shift(step)
+        self._refresh_schedule_table()
+
+    def _schedule_go_today(self):
+        self.schedule_window.go_to(datetime.now().date())
+        self._refresh_schedule_table()
+
+    def _on_schedule_mode(self, mode):
+        self.schedule_window.set_mode(mode)
+        self._refresh_schedule_table()
+
+    @perf.timed
+    def _refresh_schedule_table(self):
+        """Перерисовывает только видимые даты"""
+        self.schedule_text.delete('1.0', 'end')
+        for tag in self.schedule_text.tag_names():
+            if tag.startswith('day_'):
+                self.schedule_text.tag_delete(tag)
+        dates = self.schedule_window.dates(self.data)
+        self.schedule_range_label.configure(text=self.schedule_window.title(dates) if dates else '')
+
+        if not dates:
+            self.schedule_text.insert('end', "Нет данных о расписании и записях\n")
+            self.schedule_text.insert('end', "Добавьте график работы мастеров и записи клиентов\n")
+            return
+
+        for date in dates:
+            self.schedule_text.insert('end', render_day(self.data, date), f'day_{date}')
+
+    @perf.timed
+    def _patch_schedule_day(self, date: str):
+        """Перерисовывает один день, если он сейчас на экране"""
+        ranges = self.schedule_text.tag_ranges(f'day_{date}')
+        if not ranges:
+            if date in self.schedule_window.dates(self.data):
+                self._refresh_schedule_table()
+            return
+        start = str(ranges[0])
+        self.schedule_text.delete(start, str(ranges[-1]))
+        self.schedule_text.insert(start, render_day(self.data, date), f'day_{date}')
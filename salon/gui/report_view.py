@@ -0,0 +1,42 @@
+"""Текст вкладки отчётов. Модуль не зависит от tkinter."""
+from datetime import date, timedelta
+from typing import Tuple
+
+from services.analytics import PeriodReport
+
+PERIODS = ('Неделя', 'Месяц', 'Квартал', 'Год')
+
+
+def period_bounds(period: str, today: date = None) -> Tuple[date, date]:
+    """Последние 7/30/91/365 дней по сегодняшний включительно"""
+    today = today or date.today()
+    days = {'Неделя': 7, 'Месяц': 30, 'Квартал': 91, 'Год': 365}[period]
+    return today - timedelta(days=days - 1), today
+
+
+def _money(value: float) -> str:
+    return f"{value:,.0f} ₽".replace(',', ' ')
+
+
+def render_report(report: PeriodReport) -> str:
+    parts = [f"\n📊 ОТЧЁТ: {report.first.isoformat()} — {report.last.isoformat()}\n", "=" * 60 + "\n\n"]
+    parts.append(f"Записей: {report.appointments}\n")
+    parts.append(f"Выручка: {_money(report.revenue)}\n")
+    parts.append(f"Загрузка салона: {report.utilization:.0%}\n\n")
+
+    parts.append("👤 ПО МАСТЕРАМ:\n")
+    for m in report.masters:
+        parts.append(
+            f"   • {m.name}: записей {m.appointments}, занято {m.booked_minutes // 60}ч из "
+            f"{m.scheduled_minutes // 60}ч по графику ({m.utilization:.0%}), выручка {_money(m.revenue)}\n")
+
+    parts.append("\n🕐 ЗАГРУЗКА ПО ЧАСАМ (занятые часы мастеров):\n")
+    peak = max(report.hours) or 1
+    for hour, minutes in enumerate(report.hours):
+        if minutes:
+            bar = '█' * max(1, round(30 * minutes / peak))
+            parts.append(f"   {hour:02d}:00  {bar} {minutes // 60}ч\n")
+    busiest = report.busiest_hours()
+    if busiest:
+        parts.append("\nЧасы пик: " + ', '.join(f"{h:02d}:00" for h in busiest) + "\n")
+    return ''.join(parts)
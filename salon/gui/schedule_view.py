@@ -0,0 +1,97 @@
+"""Текст вкладки расписания по дням. Модуль не зависит от tkinter."""
+from datetime import date, datetime, timedelta
+from typing import List
+
+
+def format_duration(minutes: int) -> str:
+    hours = minutes // 60
+    rest = minutes % 60
+    if hours > 0 and rest > 0:
+        return f"{hours}ч {rest}мин"
+    elif hours > 0:
+        return f"{hours}ч"
+    return f"{rest}мин"
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+
+def render_day(data, day: str) -> str:
+    """Блок одного дня: график мастеров и записи клиентов"""
+    parts = [f"\n📅 ДАТА: {day}\n", "=" * 60 + "\n\n"]
+
+    daily_schedules = data.schedules_on(day)
+    if daily_schedules:
+        parts.append("🕐 РАБОЧИЙ ГРАФИК МАСТЕРОВ:\n")
+        for schedule in daily_schedules:
+            master_name = data.get_master_name(schedule.master_id)
+            # Отрицательный id — день, развёрнутый из повторяющегося графика
+            repeat = " ↻" if schedule.id < 0 else ""
+            parts.append(f"   • {master_name}: {schedule.start_time} - {schedule.end_time}{repeat}\n")
+        parts.append("\n")
+
+    daily_appointments = data.appointments_on(day)
+    if daily_appointments:
+        parts.append("📋 ЗАПИСИ КЛИЕНТОВ:\n")
+        for appointment in daily_appointments:
+            duration_str = format_duration(data.get_service_duration(appointment.service_id))
+            parts.append(
+                f"   • Время: {_hhmm(appointment.start)}-{_hhmm(appointment.end)} ({duration_str})\n"
+                f"     Мастер: {data.get_master_name(appointment.master_id)}\n"
+                f"     Клиент: {data.get_client_name(appointment.client_id)}\n"
+                f"     Услуга: {data.get_service_name(appointment.service_id)}\n\n")
+    else:
+        parts.append("   На эту дату нет записей клиентов\n\n")
+
+    parts.append("\n")
+    return ''.join(parts)
+
+
+class ScheduleWindow:
+    """Какие даты видны на вкладке: день, неделя или страница списка дат с записями"""
+
+    MODES = ('День', 'Неделя', 'Список')
+    PAGE_SIZE = 7
+
+    def __init__(self, mode: str = 'Неделя', anchor: date = None):
+        self.mode = mode
+        self.anchor = anchor or date.today()
+        self.page = 0
+
+    def set_mode(self, mode: str):
+        self.mode = mode
+        self.page = 0
+
+    def go_to(self, day):
+        if isinstance(day, str):
+            day = datetime.strptime(day, '%Y-%m-%d').date()
+        self.anchor = day
+        self.page = 0
+
+    def shift(self, step: int):
+        if self.mode == 'День':
+            self.anchor += timedelta(days=step)
+        elif self.mode == 'Неделя':
+            self.anchor += timedelta(weeks=step)
+        else:
+            self.page = max(0, self.page + step)
+
+    def dates(self, data) -> List[str]:
+        if self.mode == 'День':
+            return [self.anchor.isoformat()]
+        if self.mode == 'Неделя':
+            monday = self.anchor - timedelta(days=self.anchor.weekday())
+            return [(monday + timedelta(days=i)).isoformat() for i in range(7)]
+        # Список: как раньше — сначала новые даты, но постранично
+        all_dates = data.dates_with_records()
+        all_dates.reverse()
+        start = self.page * self.PAGE_SIZE
+        return all_dates[start:start + self.PAGE_SIZE]
+
+    def title(self, dates: List[str]) -> str:
+        if self.mode == 'Список':
+            return f"Страница {self.page + 1}"
+        if len(dates) == 1:
+            return dates[0]
+        return f"{dates[0]} — {dates[-1]}"
@@ -1,38 +1,137 @@
-from dataclasses import dataclass
-
-@dataclass
-class Service:
-    id: int
-    category: str
-    name: str
-    duration_min: int
-    price: float
-
-@dataclass
-class Master:
-    id: int
-    name: str
-
-@dataclass
-class Client:
-    id: int
-    name: str
-    phone: str
-    email: str
-
-@dataclass
-class Appointment:
-    id: int
-    client_id: int
-    master_id: int
-    service_id: int
-    start: str
-    end: str
-
-@dataclass
-class ScheduleItem:
-    id: int
-    master_id: int
-    date: str
-    start_time: str
-    end_time: str
\ No newline at end of file
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+# Время записей хранится целым числом минут от этой точки (без часового пояса,
+# как и сами даты в salon_data.json)
+EPOCH = datetime(1970, 1, 1)
+
+
+_EPOCH_DAY = EPOCH.toordinal()
+
+
+def to_minutes(dt: datetime) -> int:
+    # То же, что (dt - EPOCH) // timedelta(minutes=1), но без промежуточного
+    # timedelta: функция вызывается на каждую запись при загрузке и отчётах
+    return (dt.toordinal() - _EPOCH_DAY) * 1440 + dt.hour * 60 + dt.minute
+
+
+def from_minutes(minutes: int) -> datetime:
+    return EPOCH + timedelta(minutes=minutes)
+
+
+def iso_to_minutes(value: str) -> int:
+    return to_minutes(datetime.fromisoformat(value))
+
+
+def minutes_to_iso(minutes: int) -> str:
+    return from_minutes(minutes).isoformat()
+
+
+@dataclass(frozen=True, slots=True)
+class Service:
+    id: int
+    category: str
+    name: str
+    duration_min: int
+    price: float
+
+@dataclass(frozen=True, slots=True)
+class Master:
+    id: int
+    name: str
+
+@dataclass(frozen=True, slots=True)
+class Client:
+    id: int
+    name: str
+    phone: str
+    email: str
+
+@dataclass(frozen=True, slots=True)
+class Appointment:
+    id: int
+    client_id: int
+    master_id: int
+    service_id: int
+    start: int
+    end: int
+
+    @property
+    def start_dt(self) -> datetime:
+        return from_minutes(self.start)
+
+    @property
+    def end_dt(self) -> datetime:
+        return from_minutes(self.end)
+
+    @property
+    def date(self) -> str:
+        return from_minutes(self.start).strftime('%Y-%m-%d')
+
+    def to_dict(self) -> dict:
+        """Запись в том виде, в каком она лежит в JSON: время строками ISO"""
+        return {'id': self.id, 'client_id': self.client_id, 'master_id': self.master_id,
+                'service_id': self.service_id, 'start': minutes_to_iso(self.start), 'end': minutes_to_iso(self.end)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Appointment':
+        return cls(data['id'], data['client_id'], data['master_id'], data['service_id'],
+                   iso_to_minutes(data['start']), iso_to_minutes(data['end']))
+
+@dataclass(frozen=True, slots=True)
+class ScheduleItem:
+    id: int
+    master_id: int
+    date: str
+    start_time: str
+    end_time: str
+
+@dataclass(frozen=True, slots=True)
+class ScheduleTemplate:
+    """Повторяющийся график мастера: одни часы по выбранным дням недели.
+
+    weekdays — номера дней (0 — понедельник); date_to=None — без конца.
+    skip_dates — выходные вне правила, overrides — (дата, начало, конец)
+    с другими часами, в том числе в дни, которых нет в weekdays.
+    """
+    id: int
+    master_id: int
+    weekdays: Tuple[int, ...]
+    start_time: str
+    end_time: str
+    date_from: str
+    date_to: Optional[str] = None
+    skip_dates: Tuple[str, ...] = ()
+    overrides: Tuple[Tuple[str, str, str], ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ScheduleTemplate':
+        # В JSON кортежи превращаются в списки
+        return cls(data['id'], data['master_id'], tuple(data['weekdays']), data['start_time'], data['end_time'],
+                   data['date_from'], data.get('date_to'), tuple(data.get('skip_dates', ())),
+                   tuple(tuple(o) for o in data.get('overrides', ())))
+
+
+@dataclass(frozen=True, slots=True)
+class Branch:
+    """Филиал: свой каталог данных и свои мастера; id мастеров сквозные по всей сети"""
+    id: str
+    name: str
+    masters: Tuple[Master, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Branch':
+        return cls(data['id'], data['name'], tuple(Master(m['id'], m['name']) for m in data.get('masters', ())))
+
+    def to_dict(self) -> dict:
+        return {'id': self.id, 'name': self.name, 'masters': [{'id': m.id, 'name': m.name} for m in self.masters]}
+
+
+def to_dict(record) -> dict:
+    """Граница сериализации: любую сущность в словарь для JSON"""
+    if isinstance(record, (Appointment, Branch)):
+        return record.to_dict()
+    # Поля у сущностей простые, поэтому хватает плоской копии:
+    # asdict рекурсивно копирует значения и заметно медленнее на больших снимках
+    return {name: getattr(record, name) for name in record.__slots__}
\ No newline at end of file
@@ -0,0 +1,105 @@
+from array import array
+from bisect import bisect_left
+from importlib.util import find_spec
+from typing import Iterable, List, Optional
+
+from models.entities import Appointment
+
+# Сам NumPy импортируется при первом векторном расчёте, а не при запуске:
+# импорт стоит около десятой доли секунды, а нужен он только отчётам
+NUMPY_AVAILABLE = find_spec('numpy') is not None
+_np = None
+
+
+def numpy():
+    """Модуль numpy или None, если его нет или он не импортируется"""
+    global _np, NUMPY_AVAILABLE
+    if _np is None and NUMPY_AVAILABLE:
+        try:
+            import numpy as np
+        except Exception:
+            NUMPY_AVAILABLE = False
+        else:
+            _np = np
+    return _np
+
+
+class AppointmentTable:
+    """Вся история записей столбцами array: по 8 байт на поле вместо объекта на запись.
+
+    Строки отсортированы по началу записи, поэтому выборка за период —
+    это два бинарных поиска. Если установлен NumPy, столбцы отдаются как
+    массивы без копирования и агрегаты считаются векторно.
+    """
+
+    COLUMNS = ('id', 'client_id', 'master_id', 'service_id', 'start', 'end')
+
+    def __init__(self):
+        for name in self.COLUMNS:
+            setattr(self, name, array('q'))
+
+    def __len__(self):
+        return len(self.start)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> 'AppointmentTable':
+        """rows — кортежи в порядке COLUMNS, время в минутах"""
+        table = cls()
+        rows = sorted(rows, key=lambda r: r[4])
+        # Столбцы заполняются целиком, а не построчно: так в несколько раз быстрее
+        for name, values in zip(cls.COLUMNS, zip(*rows)):
+            getattr(table, name).extend(values)
+        return table
+
+    @classmethod
+    def from_appointments(cls, appointments: Iterable[Appointment]) -> 'AppointmentTable':
+        return cls.from_rows((a.id, a.client_id, a.master_id, a.service_id, a.start, a.end)
+                             for a in appointments)
+
+    def _append(self, row: tuple):
+        for name, value in zip(self.COLUMNS, row):
+            getattr(self, name).append(value)
+
+    def add(self, appointment: Appointment):
+        row = (appointment.id, appointment.client_id, appointment.master_id,
+               appointment.service_id, appointment.start, appointment.end)
+        i = bisect_left(self.start, appointment.start)
+        if i == len(self):
+            self._append(row)
+        else:
+            for name, value in zip(self.COLUMNS, row):
+                getattr(self, name).insert(i, value)
+
+    def row(self, i: int) -> Appointment:
+        return Appointment(*(getattr(self, name)[i] for name in self.COLUMNS))
+
+    def span(self, lo: int, hi: int) -> range:
+        """Номера строк с началом в [lo, hi)"""
+        return range(bisect_left(self.start, lo), bisect_left(self.start, hi))
+
+    def select(self, lo: int, hi: int, master_id: Optional[int] = None) -> List[Appointment]:
+        rows = self.span(lo, hi)
+        return [self.row(i) for i in rows if master_id is None or self.master_id[i] == master_id]
+
+    def column(self, name: str, rows: Optional[range] = None):
+        """Столбец (или его часть) как numpy-массив, если NumPy есть, иначе как array"""
+        col = getattr(self, name)
+        if rows is not None:
+            col = col[rows.start:rows.stop]
+        np = numpy()
+        # Копия, а не frombuffer: пока жив экспорт буфера, array нельзя дополнять
+        return np.array(col, dtype=np.int64) if np is not None else col
+
+    def minutes_by_master(self, lo: int, hi: int) -> dict:
+        """Сколько минут занято у каждого мастера записями, начавшимися в [lo, hi)"""
+        rows = self.span(lo, hi)
+        np = numpy()
+        if np is not None:
+            masters = self.column('master_id', rows)
+            lengths = self.column('end', rows) - self.column('start', rows)
+            totals = np.bincount(masters, weights=lengths) if len(masters) else []
+            return {m: int(v) for m, v in enumerate(totals) if v}
+        totals = {}
+        for i in rows:
+            totals[self.master_id[i]] = totals.get(self.master_id[i], 0) + self.end[i] - self.start[i]
+        return totals
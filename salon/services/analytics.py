@@ -0,0 +1,221 @@
+"""Отчёт за период: загрузка мастеров, выручка и часы пик.
+
+Считается по сводкам за день: по каждому мастеру число записей, занятые
+минуты и выручка, по салону — занятые минуты в каждом часе. Сводка дня
+строится один раз и дальше дополняется каждой новой записью, поэтому
+отчёт за год — это сложение трёхсот с небольшим сводок, а не проход по
+всем записям. Дни, которых ещё нет в кэше, считаются одним проходом по
+AppointmentTable, с NumPy — векторно.
+
+Рабочие минуты по графику тоже хранятся в сводке и сбрасываются при
+изменении графика.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from models.entities import EPOCH
+from models.table import AppointmentTable, numpy
+
+DAY_MINUTES = 24 * 60
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+class DayRollup:
+    """Сводка одного дня"""
+
+    __slots__ = ('masters', 'hours', 'scheduled')
+
+    def __init__(self):
+        # мастер -> [записей, занятых минут, выручка]
+        self.masters: Dict[int, list] = {}
+        # Занятые минуты салона по часам суток
+        self.hours: List[int] = [0] * 24
+        # мастер -> минут по графику; None — пересчитать
+        self.scheduled: Optional[Dict[int, int]] = None
+
+    def add(self, master_id: int, start: int, end: int, price: float):
+        """start и end — минуты от начала суток"""
+        totals = self.masters.get(master_id)
+        if totals is None:
+            totals = self.masters[master_id] = [0, 0, 0.0]
+        totals[0] += 1
+        totals[1] += end - start
+        totals[2] += price
+        for hour in range(start // 60, min(24, -(-end // 60))):
+            self.hours[hour] += min(end, (hour + 1) * 60) - max(start, hour * 60)
+
+
+class DailyRollups:
+    """Кэш сводок по датам 'YYYY-MM-DD', который SalonData держит в актуальном состоянии"""
+
+    def __init__(self):
+        self._days: Dict[str, DayRollup] = {}
+
+    def __len__(self):
+        return len(self._days)
+
+    def clear(self):
+        self._days = {}
+
+    def get(self, day: str) -> Optional[DayRollup]:
+        return self._days.get(day)
+
+    def put(self, day: str, rollup: DayRollup):
+        self._days[day] = rollup
+
+    def booked(self, master_id: int, start: int, end: int, price: float):
+        """Новая запись; start и end — минуты от EPOCH. Дни не из кэша посчитаются при отчёте"""
+        rollup = self._days.get((EPOCH + timedelta(minutes=start)).strftime('%Y-%m-%d'))
+        if rollup is not None:
+            midnight = start - start % DAY_MINUTES
+            rollup.add(master_id, start - midnight, end - midnight, price)
+
+    def schedule_changed(self, day: Optional[str] = None):
+        """График изменился в этот день; None — неизвестно где (правило графика)"""
+        rollups = self._days.values() if day is None else filter(None, [self._days.get(day)])
+        for rollup in rollups:
+            rollup.scheduled = None
+
+
+def compute_days(table: AppointmentTable, first: date, last: date, prices: Dict[int, float]) -> List[DayRollup]:
+    """Сводки за дни first..last включительно одним проходом по таблице записей"""
+    n_days = (last - first).days + 1
+    lo = (first - EPOCH.date()).days * DAY_MINUTES
+    rows = table.span(lo, lo + n_days * DAY_MINUTES)
+    rollups = [DayRollup() for _ in range(n_days)]
+    if not len(rows):
+        return rollups
+    np = numpy()
+    if np is None:
+        for i in rows:
+            offset = table.start[i] - lo
+            midnight = lo + offset - offset % DAY_MINUTES
+            rollups[offset // DAY_MINUTES].add(table.master_id[i], table.start[i] - midnight,
+                                               table.end[i] - midnight, prices.get(table.service_id[i], 0.0))
+        return rollups
+
+    start = table.column('start', rows) - lo
+    end = table.column('end', rows) - lo
+    masters = table.column('master_id', rows)
+    services = table.column('service_id', rows)
+    day = start // DAY_MINUTES
+    start -= day * DAY_MINUTES
+    end -= day * DAY_MINUTES
+    price_table = np.zeros(max(max(prices, default=0), int(services.max())) + 1)
+    for service_id, price in prices.items():
+        price_table[service_id] = price
+    revenue = price_table[services]
+
+    width = int(masters.max()) + 1
+    key = day * width + masters
+    size = n_days * width
+    counts = np.bincount(key, minlength=size).reshape(n_days, width)
+    booked = np.bincount(key, weights=end - start, minlength=size).reshape(n_days, width)
+    money = np.bincount(key, weights=revenue, minlength=size).reshape(n_days, width)
+    hours = np.empty((n_days, 24))
+    for hour in range(24):
+        overlap = np.clip(np.minimum(end, (hour + 1) * 60) - np.maximum(start, hour * 60), 0, None)
+        hours[:, hour] = np.bincount(day, weights=overlap, minlength=n_days)
+
+    for d in np.unique(day).tolist():
+        rollup = rollups[d]
+        for master_id in np.flatnonzero(counts[d]).tolist():
+            rollup.masters[master_id] = [int(counts[d, master_id]), int(booked[d, master_id]),
+                                         float(money[d, master_id])]
+        rollup.hours = [int(v) for v in hours[d]]
+    return rollups
+
+
+@dataclass
+class MasterStats:
+    master_id: int
+    name: str
+    appointments: int = 0
+    booked_minutes: int = 0
+    scheduled_minutes: int = 0
+    revenue: float = 0.0
+
+    @property
+    def utilization(self) -> float:
+        """Доля рабочего времени по графику, занятая записями"""
+        return self.booked_minutes / self.scheduled_minutes if self.scheduled_minutes else 0.0
+
+
+@dataclass
+class PeriodReport:
+    first: date
+    last: date
+    masters: List[MasterStats] = field(default_factory=list)
+    hours: List[int] = field(default_factory=lambda: [0] * 24)
+
+    @property
+    def revenue(self) -> float:
+        return sum(m.revenue for m in self.masters)
+
+    @property
+    def appointments(self) -> int:
+        return sum(m.appointments for m in self.masters)
+
+    @property
+    def utilization(self) -> float:
+        scheduled = sum(m.scheduled_minutes for m in self.masters)
+        return sum(m.booked_minutes for m in self.masters) / scheduled if scheduled else 0.0
+
+    def busiest_hours(self, count: int = 3) -> List[int]:
+        ranked = sorted((h for h in range(24) if self.hours[h]), key=lambda h: -self.hours[h])
+        return ranked[:count]
+
+
+def _scheduled_minutes(data, day: str) -> Dict[int, int]:
+    """Минуты по графику на каждого мастера; пересекающиеся окна не считаются дважды"""
+    result = {}
+    for master in data.masters:
+        windows = sorted((_minutes(s.start_time), _minutes(s.end_time))
+                         for s in data.get_schedules_for(master.id, day))
+        total, reached = 0, 0
+        for start, end in windows:
+            start = max(start, reached)
+            if end > start:
+                total += end - start
+                reached = end
+        if total:
+            result[master.id] = total
+    return result
+
+
+def period_report(data, rollups: DailyRollups, first: date, last: date) -> PeriodReport:
+    """Отчёт за даты first..last включительно"""
+    if last < first:
+        raise ValueError('Дата окончания раньше даты начала')
+    days = [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+    missing = [i for i, day in enumerate(days) if rollups.get(day) is None]
+    if missing:
+        lo, hi = first + timedelta(days=missing[0]), first + timedelta(days=missing[-1])
+        prices = {s.id: s.price for s in data.services}
+        computed = compute_days(data.history_table(lo, hi), lo, hi, prices)
+        for i in missing:
+            rollups.put(days[i], computed[i - missing[0]])
+
+    report = PeriodReport(first, last)
+    stats = {m.id: MasterStats(m.id, m.name) for m in data.masters}
+    for day in days:
+        rollup = rollups.get(day)
+        if rollup.scheduled is None:
+            rollup.scheduled = _scheduled_minutes(data, day)
+        for master_id, minutes in rollup.scheduled.items():
+            stats[master_id].scheduled_minutes += minutes
+        for master_id, (count, minutes, revenue) in rollup.masters.items():
+            master = stats.get(master_id)
+            if master is None:
+                master = stats[master_id] = MasterStats(master_id, data.get_master_name(master_id))
+            master.appointments += count
+            master.booked_minutes += minutes
+            master.revenue += revenue
+        report.hours = [a + b for a, b in zip(report.hours, rollup.hours)]
+    report.masters = sorted(stats.values(), key=lambda m: m.master_id)
+    return report
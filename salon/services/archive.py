@@ -0,0 +1,145 @@
+"""Архив старых записей: по сжатому файлу на месяц рядом с файлом данных.
+
+    salon_data_archive/index.json      граница архива и сводка по месяцам
+    salon_data_archive/2024-03.jsonl.gz
+
+Всё, что раньше даты before из index.json, лежит только в архиве: в
+снимок и журнал эти записи больше не попадают, загрузка и проверки
+пересечений их не видят. Месяц читается целиком при обращении к его дню
+(история клиента, отчёты, просмотр прошлых дат) и держится в небольшом кэше.
+
+Перенос идёт в три шага: месяцы архива, затем index.json, затем снимок
+без перенесённых записей. Месяц переписывается со слиянием по id, поэтому
+после сбоя между шагами перенос просто повторяется при следующей загрузке.
+
+Очистка данных удаляет файлы архива только после того, как сама очистка
+записана в журнал; если сбой случился между этими шагами, загрузка видит
+очистку в журнале и удаляет оставшийся архив.
+"""
+import gzip
+import json
+import os
+import shutil
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from services.storage import _write_atomic
+
+INDEX_FILE = 'index.json'
+CACHED_MONTHS = 3
+
+
+def archive_dir(data_path: str) -> str:
+    return os.path.splitext(data_path)[0] + '_archive'
+
+
+class AppointmentArchive:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._index: Optional[dict] = None
+        self._months: 'OrderedDict[str, List[dict]]' = OrderedDict()
+
+    def reload(self):
+        """Забыть прочитанное: архив мог изменить другой процесс"""
+        self._index = None
+        self._months.clear()
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            path = os.path.join(self.directory, INDEX_FILE)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            else:
+                self._index = {'before': '', 'months': {}}
+        return self._index
+
+    @property
+    def before(self) -> str:
+        """Первая неархивная дата 'YYYY-MM-DD'; пустая строка — архив пуст"""
+        return self.index['before']
+
+    def max_id(self) -> int:
+        return max((m['max_id'] for m in self.index['months'].values()), default=0)
+
+    def days(self) -> List[str]:
+        return sorted(d for m in self.index['months'].values() for d in m['days'] if d < self.before)
+
+    def _path(self, month: str) -> str:
+        return os.path.join(self.directory, f'{month}.jsonl.gz')
+
+    def read_month(self, month: str) -> List[dict]:
+        records = self._months.get(month)
+        if records is not None:
+            self._months.move_to_end(month)
+            return records
+        records = []
+        if month in self.index['months'] and os.path.exists(self._path(month)):
+            with gzip.open(self._path(month), 'rt', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+            # Хвост месяца мог попасть в файл при сбое до записи index.json
+            records = [a for a in records if a['start'][:10] < self.before]
+        self._months[month] = records
+        if len(self._months) > CACHED_MONTHS:
+            self._months.popitem(last=False)
+        return records
+
+    def records_on(self, day: str) -> List[dict]:
+        return [a for a in self.read_month(day[:7]) if a['start'][:10] == day]
+
+    def iter_range(self, first: Optional[str] = None, last: Optional[str] = None) -> Iterator[dict]:
+        """Записи с first по last включительно (None — без границы)"""
+        for month in sorted(self.index['months']):
+            if (first and month < first[:7]) or (last and month > last[:7]):
+                continue
+            for a in self.read_month(month):
+                day = a['start'][:10]
+                if (not first or day >= first) and (not last or day <= last):
+                    yield a
+
+    def add(self, records: List[dict], before: str):
+        """Переносит записи (все раньше before) в архив и сдвигает границу"""
+        os.makedirs(self.directory, exist_ok=True)
+        by_month: Dict[str, List[dict]] = {}
+        for a in records:
+            by_month.setdefault(a['start'][:7], []).append(a)
+        index = self.index
+        for month, items in by_month.items():
+            merged = {a['id']: a for a in self._read_file(month)}
+            merged.update((a['id'], a) for a in items)
+            rows = sorted(merged.values(), key=lambda a: (a['start'], a['id']))
+            self._write_month(month, rows)
+            index['months'][month] = {'count': len(rows), 'max_id': max(merged),
+                                      'days': sorted({a['start'][:10] for a in rows})}
+            self._months.pop(month, None)
+        index['before'] = max(index['before'], before)
+        _write_atomic(os.path.join(self.directory, INDEX_FILE),
+                      lambda f: json.dump(index, f, ensure_ascii=False))
+
+    def _read_file(self, month: str) -> List[dict]:
+        if not os.path.exists(self._path(month)):
+            return []
+        with gzip.open(self._path(month), 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def _write_month(self, month: str, rows: List[dict]):
+        path = self._path(month)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as gz:
+                gz.write(''.join(json.dumps(a, ensure_ascii=False) + '\n' for a in rows).encode('utf-8'))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp, path)
+
+    def forget(self):
+        """В памяти архив пуст; файлы остаются на диске до clear()"""
+        self._index = {'before': '', 'months': {}}
+        self._months.clear()
+
+    def clear(self):
+        """Удаляет файлы архива; вызывать, когда очистка данных уже записана"""
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        self.reload()
@@ -0,0 +1,374 @@
+"""Автозапись листа ожидания: раскладка пачки заявок по графикам мастеров.
+
+Заявка — клиент, услуга и окно времени, в которое запись должна целиком
+поместиться, иногда с пожеланием мастера. Раскладка жадная: заявки идут
+от самых выгодных на минуту (занятые минуты или выручка), при равной
+выгоде — сначала те, у которых в окне меньше всего свободы. Каждая
+встаёт в самый тесный подходящий свободный промежуток вплотную к его
+краю, чтобы большие промежутки не дробились. Порядков обхода несколько,
+остаётся лучший результат. Затем отказанные заявки пробуют ещё раз,
+передвигая ради них по одной уже поставленной записи.
+
+Раскладка и запись идут под одной блокировкой в одном SalonData.batch():
+план строится по свежим данным и уходит на диск одной пачкой.
+
+    python -m services.autoschedule waitlist.csv --objective revenue
+    python -m services.autoschedule waitlist.jsonl --dry-run
+"""
+import argparse
+import sys
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from models.entities import Appointment
+from services.bulk import _client_id, _master_id, _optional, _service_id, _text, file_format, read_rows
+from services.salon_data import SalonData
+
+OBJECTIVES = ('minutes', 'revenue')
+GRANULARITY = 5
+
+
+@dataclass
+class WaitlistRequest:
+    client_id: int
+    service_id: int
+    # Запись должна начаться не раньше earliest и закончиться не позже latest
+    earliest: datetime
+    latest: datetime
+    master_id: Optional[int] = None
+    # True — только к этому мастеру, иначе он просто предпочтительнее
+    strict: bool = False
+
+
+@dataclass
+class Placement:
+    request: WaitlistRequest
+    master_id: int
+    start: datetime
+    end: datetime
+
+
+@dataclass
+class Rejection:
+    request: WaitlistRequest
+    reason: str
+
+
+@dataclass
+class SchedulePlan:
+    objective: str
+    placed: List[Placement] = field(default_factory=list)
+    rejected: List[Rejection] = field(default_factory=list)
+    prices: Dict[int, float] = field(default_factory=dict)
+    # Заполняется после apply()
+    appointments: List[Appointment] = field(default_factory=list)
+
+    @property
+    def booked_minutes(self) -> int:
+        return sum(int((p.end - p.start).total_seconds()) // 60 for p in self.placed)
+
+    @property
+    def revenue(self) -> float:
+        return sum(self.prices.get(p.request.service_id, 0.0) for p in self.placed)
+
+
+class _Job:
+    """Заявка в минутах от полуночи её дня"""
+
+    __slots__ = ('index', 'request', 'client', 'duration', 'value', 'lo', 'hi', 'masters', 'preferred')
+
+    def __init__(self, index: int, request: WaitlistRequest, duration: int, value: float,
+                 lo: int, hi: int, masters: Tuple[int, ...]):
+        self.index = index
+        self.request = request
+        self.client = request.client_id
+        self.duration = duration
+        self.value = value
+        self.lo = lo
+        self.hi = hi
+        self.masters = masters
+        self.preferred = request.master_id
+
+    @property
+    def slack(self) -> int:
+        return self.hi - self.lo - self.duration
+
+
+# Порядки обхода для жадной раскладки; из результатов берётся лучший
+_ORDERS = (
+    lambda j: (-j.value / j.duration, j.slack, -j.duration, j.index),
+    lambda j: (-j.value / j.duration, -j.duration, j.slack, j.index),
+    lambda j: (j.slack, -j.value, j.index),
+)
+
+
+class _Packer:
+    """Свободные промежутки мастеров одного дня и поставленные в них заявки"""
+
+    def __init__(self, free: Dict[int, List[Tuple[int, int]]], granularity: int):
+        self.free = {m: list(intervals) for m, intervals in free.items()}
+        self.granularity = granularity
+        self.at: Dict[int, Tuple[int, int]] = {}
+        self._clients: Dict[int, List[Tuple[int, int]]] = {}
+
+    def value(self, jobs: List[_Job]) -> float:
+        return sum(j.value for j in jobs if j.index in self.at)
+
+    def best(self, job: _Job) -> Optional[Tuple[int, int]]:
+        """(мастер, начало) для заявки или None, если места нет"""
+        step, need = self.granularity, job.duration
+        best_key, best = None, None
+        for master_id in job.masters:
+            other = job.preferred is not None and master_id != job.preferred
+            for start, end in self.free.get(master_id, ()):
+                if end <= job.lo:
+                    continue
+                if start >= job.hi:
+                    break
+                first = -(-max(start, job.lo) // step) * step
+                last = (min(end, job.hi) - need) // step * step
+                if first > last:
+                    continue
+                for at in (first, last) if first != last else (first,):
+                    if self._client_busy(job.client, at, at + need):
+                        continue
+                    # Впритык к краю промежутка — не остаётся обрезка с обеих сторон
+                    key = (other, at != start and at + need != end, end - start - need, at, master_id)
+                    if best_key is None or key < best_key:
+                        best_key, best = key, (master_id, at)
+        return best
+
+    def _client_busy(self, client_id: int, start: int, end: int) -> bool:
+        return any(s < end and start < e for s, e in self._clients.get(client_id, ()))
+
+    def take(self, job: _Job, master_id: int, start: int):
+        end = start + job.duration
+        free = self.free[master_id]
+        i = bisect_right(free, (start, float('inf'))) - 1
+        free_start, free_end = free[i]
+        free[i:i + 1] = [(s, e) for s, e in ((free_start, start), (end, free_end)) if s < e]
+        self.at[job.index] = (master_id, start)
+        self._clients.setdefault(job.client, []).append((start, end))
+
+    def release(self, job: _Job) -> Tuple[int, int]:
+        master_id, start = spot = self.at.pop(job.index)
+        end = start + job.duration
+        self._clients[job.client].remove((start, end))
+        free = self.free[master_id]
+        i = bisect_left(free, (start,))
+        if i > 0 and free[i - 1][1] == start:
+            i -= 1
+            start = free.pop(i)[0]
+        if i < len(free) and free[i][0] == end:
+            end = free.pop(i)[1]
+        free.insert(i, (start, end))
+        return spot
+
+
+def _greedy(jobs: List[_Job], free, granularity: int, order) -> _Packer:
+    packer = _Packer(free, granularity)
+    for job in sorted(jobs, key=order):
+        spot = packer.best(job)
+        if spot is not None:
+            packer.take(job, *spot)
+    return packer
+
+
+def _repair(packer: _Packer, jobs: List[_Job], order):
+    """Ставит отказанные заявки, сдвигая или вытесняя по одной поставленной"""
+    by_index = {j.index: j for j in jobs}
+    queue = sorted((j for j in jobs if j.index not in packer.at), key=order)
+    budget = 4 * len(jobs)
+    while queue and budget:
+        budget -= 1
+        job = queue.pop(0)
+        spot = packer.best(job)
+        if spot is not None:
+            packer.take(job, *spot)
+            continue
+        blockers = [by_index[i] for i, (m, s) in packer.at.items()
+                    if m in job.masters and s < job.hi and s + by_index[i].duration > job.lo]
+        for other in blockers:
+            old = packer.release(other)
+            spot = packer.best(job)
+            if spot is not None:
+                packer.take(job, *spot)
+                moved = packer.best(other)
+                if moved is not None:
+                    packer.take(other, *moved)
+                    break
+                if job.value > other.value:
+                    queue.append(other)
+                    break
+                packer.release(job)
+            packer.take(other, *old)
+
+
+def _solve(jobs: List[_Job], free, granularity: int) -> _Packer:
+    best = None
+    for order in _ORDERS:
+        packer = _greedy(jobs, free, granularity, order)
+        _repair(packer, jobs, order)
+        if best is None or (packer.value(jobs), len(packer.at)) > (best.value(jobs), len(best.at)):
+            best = packer
+    return best
+
+
+def _minute_of_day(dt: datetime) -> int:
+    return dt.hour * 60 + dt.minute
+
+
+def _jobs(data: SalonData, requests: List[WaitlistRequest], objective: str,
+          rejected: List[Rejection]) -> Dict[str, List[_Job]]:
+    """Заявки по дням; негодные сразу уходят в rejected"""
+    all_masters = tuple(m.id for m in data.masters)
+    days: Dict[str, List[_Job]] = {}
+    for index, request in enumerate(requests):
+        service = data.get_service(request.service_id)
+        if not service:
+            rejected.append(Rejection(request, 'Услуга не найдена'))
+            continue
+        if request.master_id is not None and not data.get_master(request.master_id):
+            rejected.append(Rejection(request, 'Мастер не найден'))
+            continue
+        lo = _minute_of_day(request.earliest)
+        hi = lo + int((request.latest - request.earliest).total_seconds()) // 60
+        if hi > 24 * 60:
+            rejected.append(Rejection(request, 'Окно заявки должно быть в пределах одного дня'))
+            continue
+        if hi - lo < service.duration_min:
+            rejected.append(Rejection(request, 'Окно заявки короче услуги'))
+            continue
+        if request.master_id is None:
+            masters = all_masters
+        elif request.strict:
+            masters = (request.master_id,)
+        else:
+            masters = (request.master_id,) + tuple(m for m in all_masters if m != request.master_id)
+        value = service.duration_min if objective == 'minutes' else service.price
+        days.setdefault(request.earliest.strftime('%Y-%m-%d'), []).append(
+            _Job(index, request, service.duration_min, value, lo, hi, masters))
+    return days
+
+
+def _free_minutes(data: SalonData, day: str, jobs: List[_Job]) -> Dict[int, List[Tuple[int, int]]]:
+    """Свободные промежутки нужных мастеров в минутах от полуночи"""
+    midnight = datetime.strptime(day, '%Y-%m-%d')
+    free = {}
+    for master_id in {m for j in jobs for m in j.masters}:
+        free[master_id] = [(int((s - midnight).total_seconds()) // 60, int((e - midnight).total_seconds()) // 60)
+                           for s, e in data.free_intervals(master_id, day)]
+    return free
+
+
+def plan(data: SalonData, requests: List[WaitlistRequest], objective: str = 'minutes',
+         granularity: int = GRANULARITY) -> SchedulePlan:
+    """Раскладка без записи: какие заявки куда встают и почему остальные не встали"""
+    if objective not in OBJECTIVES:
+        raise ValueError(f'Неизвестная цель раскладки: {objective}')
+    result = SchedulePlan(objective, prices={s.id: s.price for s in data.services})
+    for day, jobs in sorted(_jobs(data, requests, objective, result.rejected).items()):
+        midnight = datetime.strptime(day, '%Y-%m-%d')
+        packer = _solve(jobs, _free_minutes(data, day, jobs), granularity)
+        for job in jobs:
+            spot = packer.at.get(job.index)
+            if spot is None:
+                result.rejected.append(Rejection(job.request, 'Нет свободного времени в окне заявки'))
+                continue
+            start = midnight + timedelta(minutes=spot[1])
+            result.placed.append(Placement(job.request, spot[0], start, start + timedelta(minutes=job.duration)))
+    result.placed.sort(key=lambda p: (p.start, p.master_id))
+    return result
+
+
+def apply(data: SalonData, schedule: SchedulePlan) -> List[Appointment]:
+    """Записывает план одной пачкой; если часть времени уже заняли, не пишет ничего"""
+    with data.batch():
+        for p in schedule.placed:
+            free = data.free_intervals(p.master_id, p.start.strftime('%Y-%m-%d'))
+            if not any(s <= p.start and p.end <= e for s, e in free):
+                raise ValueError(f'Время {p.start:%d.%m %H:%M} у мастера {data.get_master_name(p.master_id)} '
+                                 'уже занято, составьте план заново')
+        schedule.appointments = [data.add_appointment(p.request.client_id, p.master_id, p.request.service_id, p.start)
+                                 for p in schedule.placed]
+    return schedule.appointments
+
+
+def autoschedule(data: SalonData, requests: List[WaitlistRequest], objective: str = 'minutes',
+                 granularity: int = GRANULARITY, dry_run: bool = False) -> SchedulePlan:
+    """Раскладывает заявки и сразу записывает их, не отпуская блокировку между шагами"""
+    with data.batch():
+        schedule = plan(data, requests, objective, granularity)
+        if not dry_run:
+            apply(data, schedule)
+    return schedule
+
+
+def _parse_datetime(day: str, value: str, name: str) -> datetime:
+    try:
+        return datetime.strptime(f'{day} {value}', '%Y-%m-%d %H:%M')
+    except ValueError:
+        raise ValueError(f'Неверное время {name}: {day} {value}') from None
+
+
+def parse_request(data: SalonData, row: dict) -> WaitlistRequest:
+    """Строка листа ожидания: client/phone/client_id, service/service_id, date, from, to,
+    по желанию master/master_id и strict"""
+    day = _text(row, 'date')
+    master_id = _master_id(data, row) if _optional(row, 'master_id') or _optional(row, 'master') else None
+    return WaitlistRequest(_client_id(data, row), _service_id(data, row),
+                           _parse_datetime(day, _text(row, 'from'), 'from'),
+                           _parse_datetime(day, _text(row, 'to'), 'to'), master_id,
+                           _optional(row, 'strict').lower() in ('1', 'да', 'true', 'yes'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Автозапись листа ожидания')
+    parser.add_argument('path', help='заявки в .csv или .jsonl')
+    parser.add_argument('--data', default=SalonData.DATA_FILE, help='файл данных (по умолчанию salon_data.json)')
+    parser.add_argument('--sqlite', help='работать с базой SQLite вместо файла данных')
+    parser.add_argument('--objective', choices=OBJECTIVES, default='minutes',
+                        help='что набирать: занятые минуты или выручку')
+    parser.add_argument('--granularity', type=int, default=GRANULARITY, help='шаг времени начала, минут')
+    parser.add_argument('--dry-run', action='store_true', help='только показать план')
+    args = parser.parse_args(argv)
+    try:
+        if args.sqlite:
+            from services.sqlite_data import SqliteSalonData
+            data = SqliteSalonData(args.sqlite)
+        else:
+            from services.storage import JournalStorage
+            data = SalonData(storage=JournalStorage(args.data))
+        try:
+            requests, lines = [], {}
+            with open(args.path, encoding='utf-8-sig', newline='') as f:
+                for line, row in read_rows(f, file_format(args.path)):
+                    try:
+                        if not isinstance(row, dict):
+                            raise ValueError('Строка не является объектом JSON')
+                        requests.append(parse_request(data, row))
+                    except ValueError as e:
+                        print(f'строка {line}: {e}', file=sys.stderr)
+                    else:
+                        lines[id(requests[-1])] = line
+            schedule = autoschedule(data, requests, args.objective, args.granularity, args.dry_run)
+            for p in schedule.placed:
+                print(f'{p.start:%Y-%m-%d %H:%M}–{p.end:%H:%M}  {data.get_master_name(p.master_id)}  '
+                      f'{data.get_client_name(p.request.client_id)}  {data.get_service_name(p.request.service_id)}')
+            for r in schedule.rejected:
+                print(f'строка {lines[id(r.request)]}: {r.reason}', file=sys.stderr)
+        finally:
+            data.close()
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    verb = 'Будет записано' if args.dry_run else 'Записано'
+    print(f'{verb}: {len(schedule.placed)} из {len(requests)}, {schedule.booked_minutes // 60}ч '
+          f'{schedule.booked_minutes % 60}мин, выручка {schedule.revenue:.0f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""Сеть салонов: у каждого филиала свои данные, общий координатор.
+
+    branches/branches.json                       филиалы и их мастера
+    branches/center/salon_data.json              снимок и журнал филиала
+    branches/center/salon_data_archive/*.jsonl.gz  месяцы старше 90 дней
+
+Филиал — обычный SalonData в своём каталоге, а внутри филиала данные уже
+разложены по времени: последняя неделя — объектами, остальные горячие
+дни — словарями до первого обращения, старые месяцы — в архиве. Поэтому
+загрузка и сохранение стоят столько, сколько весят затронутые филиалы
+за последние месяцы, а не вся история сети.
+
+SalonNetwork открывает филиал при первом обращении к нему или все сразу
+в пуле потоков (open_all). Записи и графики идут в филиал мастера: id
+мастеров сквозные по всей сети. Поиск клиента, свободное время и отчёты
+опрашивают все филиалы и сливают ответы.
+
+    python -m services.branches branches add center "Центр" --masters 1:Анна,2:Ольга --from salon_data.json
+    python -m services.branches branches list
+    python -m services.branches branches find Иванова
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.entities import Appointment, Branch, Client, Master
+from services.analytics import PeriodReport
+from services.archive import archive_dir
+from services.salon_data import SalonData
+from services.slots import FreeSlot
+from services.storage import JournalStorage, _write_atomic
+
+BRANCHES_FILE = 'branches.json'
+LOAD_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class BranchClient:
+    """Клиент вместе с филиалом: id клиентов в каждом филиале свои"""
+    branch_id: str
+    client: Client
+
+
+def load_branches(root: str) -> List[Branch]:
+    path = os.path.join(root, BRANCHES_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [Branch.from_dict(b) for b in json.load(f)['branches']]
+
+
+def save_branches(root: str, branches: List[Branch]):
+    os.makedirs(root, exist_ok=True)
+    _write_atomic(os.path.join(root, BRANCHES_FILE),
+                  lambda f: json.dump({'branches': [b.to_dict() for b in branches]}, f, ensure_ascii=False, indent=2))
+
+
+def add_branch(root: str, branch: Branch, source: Optional[str] = None) -> Branch:
+    """Добавляет филиал в branches.json; source — прежний отдельный salon_data.json филиала"""
+    branches = load_branches(root)
+    if any(b.id == branch.id for b in branches):
+        raise ValueError(f'Филиал {branch.id} уже есть')
+    taken = {m.id for b in branches for m in b.masters}
+    clash = sorted(taken & {m.id for m in branch.masters})
+    if clash:
+        raise ValueError(f'Мастера с id {", ".join(map(str, clash))} уже есть в другом филиале')
+    directory = os.path.join(root, branch.id)
+    if source:
+        if os.path.exists(directory):
+            raise ValueError(f'Каталог {directory} уже существует')
+        os.makedirs(directory)
+        target = os.path.join(directory, SalonData.DATA_FILE)
+        # Снимок, журнал и архив переезжают как есть; журнал свернётся при первом сохранении
+        for src, dst in ((source, target),
+                         (os.path.splitext(source)[0] + '.journal', os.path.splitext(target)[0] + '.journal')):
+            if os.path.exists(src):
+                shutil.copy2(src, dst)
+        if os.path.isdir(archive_dir(source)):
+            shutil.copytree(archive_dir(source), archive_dir(target))
+    save_branches(root, branches + [branch])
+    return branch
+
+
+def branch_location(root: str, branch_id: str) -> Tuple[str, List[Master]]:
+    """Файл данных и мастера филиала — чтобы открыть один филиал как обычный SalonData"""
+    for branch in load_branches(root):
+        if branch.id == branch_id:
+            directory = os.path.join(root, branch.id)
+            os.makedirs(directory, exist_ok=True)
+            return os.path.join(directory, SalonData.DATA_FILE), list(branch.masters)
+    raise ValueError(f'Филиал не найден: {branch_id}')
+
+
+class SalonNetwork:
+    """Координатор филиалов: маршрутизация по мастеру и опрос всех филиалов"""
+
+    def __init__(self, root: str, storage_factory: Callable[[str], object] = JournalStorage,
+                 workers: int = LOAD_WORKERS):
+        self.root = root
+        self.branches: List[Branch] = load_branches(root)
+        if not self.branches:
+            raise ValueError(f'В {os.path.join(root, BRANCHES_FILE)} нет ни одного филиала')
+        self._storage_factory = storage_factory
+        self.workers = workers
+        self._branches_by_id: Dict[str, Branch] = {b.id: b for b in self.branches}
+        self._branch_by_master: Dict[int, str] = {m.id: b.id for b in self.branches for m in b.masters}
+        self._shards: Dict[str, SalonData] = {}
+        self._lock = threading.Lock()
+        # Время загрузки каждого открытого филиала, секунды
+        self.load_seconds: Dict[str, float] = {}
+
+    @property
+    def masters(self) -> List[Master]:
+        return [m for b in self.branches for m in b.masters]
+
+    def _open(self, branch: Branch) -> SalonData:
+        directory = os.path.join(self.root, branch.id)
+        os.makedirs(directory, exist_ok=True)
+        t0 = time.perf_counter()
+        data = SalonData(storage=self._storage_factory(os.path.join(directory, SalonData.DATA_FILE)),
+                         masters=list(branch.masters))
+        self.load_seconds[branch.id] = time.perf_counter() - t0
+        return data
+
+    def branch(self, branch_id: str) -> SalonData:
+        """Данные филиала; при первом обращении филиал загружается"""
+        shard = self._shards.get(branch_id)
+        if shard is not None:
+            return shard
+        branch = self._branches_by_id.get(branch_id)
+        if branch is None:
+            raise ValueError(f'Филиал не найден: {branch_id}')
+        with self._lock:
+            if branch_id not in self._shards:
+                self._shards[branch_id] = self._open(branch)
+            return self._shards[branch_id]
+
+    def open_all(self) -> List[SalonData]:
+        """Загружает все ещё не открытые филиалы параллельно"""
+        with self._lock:
+            missing = [b for b in self.branches if b.id not in self._shards]
+            if missing:
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(missing))) as pool:
+                    for branch, shard in zip(missing, pool.map(self._open, missing)):
+                        self._shards[branch.id] = shard
+            return [self._shards[b.id] for b in self.branches]
+
+    def loaded(self) -> List[str]:
+        return [b.id for b in self.branches if b.id in self._shards]
+
+    def branch_of_master(self, master_id: int) -> str:
+        branch_id = self._branch_by_master.get(master_id)
+        if branch_id is None:
+            raise ValueError('Мастер не найден')
+        return branch_id
+
+    # --- запись: только в филиал мастера ---
+
+    def add_client(self, branch_id: str, name: str, phone: str, email: str) -> BranchClient:
+        return BranchClient(branch_id, self.branch(branch_id).add_client(name, phone, email))
+
+    def add_schedule(self, master_id: int, date: str, start_time: str, end_time: str):
+        return self.branch(self.branch_of_master(master_id)).add_schedule(master_id, date, start_time, end_time)
+
+    def add_appointment(self, client: BranchClient, master_id: int, service_id: int,
+                        start_dt: datetime) -> Tuple[str, Appointment]:
+        """Запись к мастеру любого филиала; клиент другого филиала переносится по телефону"""
+        branch_id = self.branch_of_master(master_id)
+        shard = self.branch(branch_id)
+        with shard.batch():
+            if client.branch_id == branch_id:
+                client_id = client.client.id
+            else:
+                # batch() не откатывает изменения, поэтому клиента копируем,
+                # только когда запись точно пройдёт
+                shard._check_booking(master_id, service_id, start_dt)
+                local = shard.find_client_by_phone(client.client.phone)
+                if local is None:
+                    local = shard.add_client(client.client.name, client.client.phone, client.client.email)
+                client_id = local.id
+            return branch_id, shard.add_appointment(client_id, master_id, service_id, start_dt)
+
+    # --- запросы по всей сети ---
+
+    def find_client_by_phone(self, phone: str) -> List[BranchClient]:
+        found = []
+        for branch, shard in zip(self.branches, self.open_all()):
+            client = shard.find_client_by_phone(phone)
+            if client is not None:
+                found.append(BranchClient(branch.id, client))
+        return found
+
+    def search_clients(self, query: str, limit: int = 10) -> List[BranchClient]:
+        found = [(client.name, i, BranchClient(branch.id, client))
+                 for i, (branch, shard) in enumerate(zip(self.branches, self.open_all()))
+                 for client in shard.search_clients(query, limit)]
+        found.sort(key=lambda item: item[:2])
+        return [item[2] for item in found[:limit]]
+
+    def find_free_slots(self, service_id: int, date_range, master_ids: Optional[List[int]] = None,
+                        granularity: int = 15, limit: int = 10,
+                        not_before: Optional[datetime] = None) -> List[FreeSlot]:
+        """Как SalonData.find_free_slots, но по мастерам всех филиалов (или только по master_ids)"""
+        if master_ids:
+            wanted = {}
+            for master_id in master_ids:
+                wanted.setdefault(self.branch_of_master(master_id), []).append(master_id)
+            shards = [(self.branch(branch_id), ids) for branch_id, ids in wanted.items()]
+        else:
+            shards = [(shard, None) for shard in self.open_all()]
+        found = [slot for shard, ids in shards
+                 for slot in shard.find_free_slots(service_id, date_range, ids, granularity, limit, not_before)]
+        found.sort(key=lambda s: (s.start, s.master_id))
+        return found[:limit]
+
+    def client_history(self, phone: str) -> List[Tuple[str, Appointment]]:
+        """Все визиты клиента по всем филиалам, по времени"""
+        history = [(found.branch_id, a) for found in self.find_client_by_phone(phone)
+                   for a in self.branch(found.branch_id).client_history(found.client.id)]
+        history.sort(key=lambda item: item[1].start)
+        return history
+
+    def period_reports(self, first, last) -> Dict[str, PeriodReport]:
+        return {branch.id: shard.period_report(first, last)
+                for branch, shard in zip(self.branches, self.open_all())}
+
+    def get_master_name(self, master_id: int) -> str:
+        return self.branch(self.branch_of_master(master_id)).get_master_name(master_id)
+
+    def flush(self):
+        for shard in list(self._shards.values()):
+            shard.flush()
+
+    def close(self):
+        with self._lock:
+            shards, self._shards = list(self._shards.values()), {}
+        for shard in shards:
+            shard.close()
+
+
+def _parse_masters(value: str) -> Tuple[Master, ...]:
+    masters = []
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        master_id, _, name = item.partition(':')
+        if not name.strip() or not master_id.strip().isdigit():
+            raise ValueError(f'Мастер задаётся как id:Имя, а не {item}')
+        masters.append(Master(int(master_id), name.strip()))
+    return tuple(masters)
+
+
+def _add(args) -> int:
+    branch = add_branch(args.root, Branch(args.id, args.name, _parse_masters(args.masters)), args.source)
+    print(f'Филиал {branch.name} ({branch.id}) добавлен, мастеров: {len(branch.masters)}')
+    return 0
+
+
+def _list(args) -> int:
+    network = SalonNetwork(args.root)
+    try:
+        t0 = time.perf_counter()
+        shards = network.open_all()
+        total = time.perf_counter() - t0
+        for branch, shard in zip(network.branches, shards):
+            masters = ', '.join(f'{m.id}:{m.name}' for m in branch.masters)
+            print(f'{branch.id:<12} {branch.name:<20} клиентов {len(shard.clients):>6}  '
+                  f'загрузка {network.load_seconds[branch.id] * 1000:>7.1f} мс  мастера: {masters}')
+        print(f'все филиалы загружены за {total * 1000:.1f} мс ({network.workers} потока)')
+    finally:
+        network.close()
+    return 0
+
+
+def _find(args) -> int:
+    network = SalonNetwork(args.root)
+    try:
+        for found in network.search_clients(args.query, args.limit):
+            print(f'{found.branch_id:<12} {found.client.name} — {found.client.phone}')
+    finally:
+        network.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Филиалы сети салонов')
+    parser.add_argument('root', help='каталог сети с branches.json')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help='добавить филиал')
+    add.add_argument('id')
+    add.add_argument('name')
+    add.add_argument('--masters', required=True, help='мастера филиала: 1:Анна,2:Ольга')
+    add.add_argument('--from', dest='source', help='перенести прежний отдельный salon_data.json')
+    add.set_defaults(run=_add)
+
+    commands.add_parser('list', help='филиалы и время их загрузки').set_defaults(run=_list)
+
+    find = commands.add_parser('find', help='поиск клиента по всем филиалам')
+    find.add_argument('query')
+    find.add_argument('--limit', type=int, default=10)
+    find.set_defaults(run=_find)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.run(args)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
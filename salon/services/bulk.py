@@ -0,0 +1,327 @@
+"""Массовый импорт и экспорт клиентов, графиков и записей в CSV или JSONL.
+
+Строки читаются потоком и обрабатываются пачками по BATCH_SIZE: сначала
+каждая строка пачки разбирается и проверяется, затем годные строки
+проходят через обычные add_client / add_schedule / add_appointment внутри
+SalonData.batch(). Поэтому работают те же проверки графика и пересечений,
+что и в интерфейсе, а на диск пачка уходит одной записью.
+
+    python -m services.bulk import clients clients.csv
+    python -m services.bulk import appointments appointments.jsonl --batch 5000
+    python -m services.bulk export appointments out.csv --from 2024-03-01 --to 2024-03-31
+
+Графики выгружаются только разовые (строки add_schedule). Повторяющиеся
+графики в строки не превращаются: развёрнутые по дням, они при обратном
+импорте стали бы разовыми. Они переносятся вместе с файлом данных.
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models.entities import to_dict
+from services.salon_data import APPOINTMENT_FIELDS, SalonData
+
+BATCH_SIZE = 1000
+KINDS = ('clients', 'schedules', 'appointments')
+FIELDS = {
+    'clients': ('id', 'name', 'phone', 'email'),
+    # Только разовые графики: у дней из повторяющихся id отрицательный
+    'schedules': ('id', 'master_id', 'date', 'start_time', 'end_time'),
+    'appointments': APPOINTMENT_FIELDS,
+}
+
+
+@dataclass
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class ImportReport:
+    added: int = 0
+    errors: List[RowError] = field(default_factory=list)
+
+
+def file_format(path: str) -> str:
+    if path.endswith('.csv'):
+        return 'csv'
+    if path.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    raise ValueError(f'Неизвестный формат файла: {path} (нужен .csv или .jsonl)')
+
+
+def read_rows(f, fmt: str) -> Iterator[Tuple[int, dict]]:
+    """Пары (номер строки в файле, словарь полей) по одной, без чтения файла целиком"""
+    if fmt == 'csv':
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row
+
+
+def write_rows(rows: Iterable[dict], f, fmt: str, fields: Tuple[str, ...]) -> int:
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
+    for row in rows:
+        f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def _text(row: dict, name: str) -> str:
+    value = row.get(name)
+    value = '' if value is None else str(value).strip()
+    if not value:
+        raise ValueError(f'Не заполнено поле {name}')
+    return value
+
+
+def _optional(row: dict, name: str) -> str:
+    value = row.get(name)
+    return '' if value is None else str(value).strip()
+
+
+def _int(value: str, name: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'Поле {name} должно быть числом: {value}') from None
+
+
+def _check_date(value: str):
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'Неверная дата: {value}') from None
+
+
+def _check_time(value: str):
+    try:
+        datetime.strptime(value, '%H:%M')
+    except ValueError:
+        raise ValueError(f'Неверное время: {value}') from None
+
+
+def _master_id(data: SalonData, row: dict) -> int:
+    if _optional(row, 'master_id'):
+        master_id = _int(_optional(row, 'master_id'), 'master_id')
+        if not data.get_master(master_id):
+            raise ValueError(f'Мастер не найден: {master_id}')
+        return master_id
+    master = data.find_master_by_name(_text(row, 'master'))
+    if not master:
+        raise ValueError(f'Мастер не найден: {row["master"]}')
+    return master.id
+
+
+def _service_id(data: SalonData, row: dict) -> int:
+    if _optional(row, 'service_id'):
+        service_id = _int(_optional(row, 'service_id'), 'service_id')
+    else:
+        service = data.find_service_by_name(_text(row, 'service'))
+        if not service:
+            raise ValueError(f'Услуга не найдена: {row["service"]}')
+        service_id = service.id
+    if not data.get_service(service_id):
+        raise ValueError(f'Услуга не найдена: {service_id}')
+    return service_id
+
+
+def _client_id(data: SalonData, row: dict) -> int:
+    if _optional(row, 'client_id'):
+        client = data.get_client(_int(_optional(row, 'client_id'), 'client_id'))
+    elif _optional(row, 'phone'):
+        client = data.find_client_by_phone(_optional(row, 'phone'))
+    else:
+        client = data.find_client_by_name(_text(row, 'client'))
+    if not client:
+        raise ValueError('Клиент не найден')
+    return client.id
+
+
+def _parse_client(data: SalonData, row: dict) -> tuple:
+    return _text(row, 'name'), _text(row, 'phone'), _text(row, 'email')
+
+
+def _parse_schedule(data: SalonData, row: dict) -> tuple:
+    date, start_time, end_time = _text(row, 'date'), _text(row, 'start_time'), _text(row, 'end_time')
+    _check_date(date)
+    _check_time(start_time)
+    _check_time(end_time)
+    return _master_id(data, row), date, start_time, end_time
+
+
+def _parse_appointment(data: SalonData, row: dict) -> tuple:
+    start = _text(row, 'start')
+    try:
+        start_dt = datetime.fromisoformat(start)
+    except ValueError:
+        # Как в интерфейсе: часы можно писать без ведущего нуля
+        try:
+            start_dt = datetime.strptime(start.replace('T', ' '), '%Y-%m-%d %H:%M')
+        except ValueError:
+            raise ValueError(f'Неверное время начала: {start}') from None
+    if start_dt.tzinfo is not None:
+        # Время в салоне хранится без часового пояса; сравнение с графиком упало бы TypeError
+        raise ValueError(f'Время начала указывается без часового пояса: {start}')
+    return _client_id(data, row), _master_id(data, row), _service_id(data, row), start_dt
+
+
+# Разбор строки в аргументы и метод SalonData, который их применяет
+_IMPORTERS: Dict[str, Tuple[Callable, str]] = {
+    'clients': (_parse_client, 'add_client'),
+    'schedules': (_parse_schedule, 'add_schedule'),
+    'appointments': (_parse_appointment, 'add_appointment'),
+}
+
+
+def import_rows(data: SalonData, kind: str, rows: Iterable[Tuple[int, Optional[dict]]],
+                batch_size: int = BATCH_SIZE) -> ImportReport:
+    """Импортирует строки пачками; ошибки собираются по строкам, а не прерывают импорт.
+    Снимок файла данных пишется один раз в конце, а не по мере роста журнала"""
+    parse, method = _IMPORTERS[kind]
+    add = getattr(data, method)
+    report = ImportReport()
+    rows = iter(rows)
+    with data.deferred_snapshots():
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                return report
+            parsed = []
+            for line, row in chunk:
+                if not isinstance(row, dict):
+                    report.errors.append(RowError(line, 'Строка не является объектом JSON'))
+                    continue
+                try:
+                    parsed.append((line, parse(data, row)))
+                except ValueError as e:
+                    report.errors.append(RowError(line, str(e)))
+            with data.batch():
+                for line, args in parsed:
+                    # Повторный импорт того же файла не должен удваивать клиентов
+                    if kind == 'clients' and data.find_client_by_phone(args[1]):
+                        report.errors.append(RowError(line, f'Клиент с телефоном {args[1]} уже есть'))
+                        continue
+                    try:
+                        add(*args)
+                    except ValueError as e:
+                        report.errors.append(RowError(line, str(e)))
+                    else:
+                        report.added += 1
+
+
+def _days(data: SalonData, date_from: Optional[str], date_to: Optional[str]) -> List[str]:
+    return [d for d in data.dates_with_records()
+            if (date_from is None or d >= date_from) and (date_to is None or d <= date_to)]
+
+
+def iter_export(data: SalonData, kind: str, date_from: Optional[str] = None,
+                date_to: Optional[str] = None) -> Iterator[dict]:
+    """Записи за период (даты включительно) по одному дню; клиенты — все.
+    Графики — только разовые, без дней из повторяющихся графиков"""
+    if kind == 'clients':
+        for client in data.clients:
+            yield to_dict(client)
+    elif kind == 'schedules':
+        for day in _days(data, date_from, date_to):
+            for schedule in data.schedules_on(day):
+                if schedule.id > 0:
+                    yield to_dict(schedule)
+    else:
+        for day in _days(data, date_from, date_to):
+            for appointment in data.appointments_on(day):
+                yield appointment.to_dict()
+
+
+def _open_data(args) -> SalonData:
+    if args.sqlite:
+        from services.sqlite_data import SqliteSalonData
+        return SqliteSalonData(args.sqlite)
+    from services.storage import JournalStorage
+    return SalonData(storage=JournalStorage(args.data))
+
+
+def _import(args) -> int:
+    fmt = file_format(args.path)
+    data = _open_data(args)
+    try:
+        with open(args.path, encoding='utf-8-sig', newline='') as f:
+            report = import_rows(data, args.kind, read_rows(f, fmt), args.batch)
+    finally:
+        data.close()
+    for error in report.errors:
+        print(f'{args.path}:{error.line}: {error.message}', file=sys.stderr)
+    print(f'Добавлено: {report.added}, ошибок: {len(report.errors)}')
+    return 1 if report.errors else 0
+
+
+def _export(args) -> int:
+    data = _open_data(args)
+    try:
+        rows = iter_export(data, args.kind, args.date_from, args.date_to)
+        if args.path == '-':
+            out = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+            count = write_rows(rows, out, 'csv' if args.format == 'csv' else 'jsonl', FIELDS[args.kind])
+            out.flush()
+            out.detach()
+        else:
+            with open(args.path, 'w', encoding='utf-8', newline='') as f:
+                count = write_rows(rows, f, file_format(args.path), FIELDS[args.kind])
+    finally:
+        data.close()
+    print(f'Выгружено: {count}', file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Массовый импорт и экспорт данных салона')
+    parser.add_argument('--data', default=SalonData.DATA_FILE, help='файл данных (по умолчанию salon_data.json)')
+    parser.add_argument('--sqlite', help='работать с базой SQLite вместо файла данных')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    imp = commands.add_parser('import', help='загрузить строки из .csv или .jsonl')
+    imp.add_argument('kind', choices=KINDS)
+    imp.add_argument('path')
+    imp.add_argument('--batch', type=int, default=BATCH_SIZE, help='строк в одной пачке')
+    imp.set_defaults(run=_import)
+
+    exp = commands.add_parser('export', help='выгрузить в .csv или .jsonl (- для stdout)')
+    exp.add_argument('kind', choices=KINDS)
+    exp.add_argument('path')
+    exp.add_argument('--from', dest='date_from', help='первая дата, YYYY-MM-DD')
+    exp.add_argument('--to', dest='date_to', help='последняя дата, YYYY-MM-DD')
+    exp.add_argument('--format', choices=['csv', 'jsonl'], default='jsonl', help='формат для stdout')
+    exp.set_defaults(run=_export)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.run(args)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Лента изменений SalonData: подписчики узнают, что именно поменялось.
+
+    unsubscribe = data.changes.subscribe(on_changes)                     # все события
+    data.changes.subscribe(on_clients, ClientAdded, Cleared, Reloaded)   # только эти
+
+Колбэк получает список событий. Одиночное изменение приходит списком из
+одного события, изменения внутри batch() и подтянутые у других процессов
+(refresh) — одним списком при выходе из блока, когда блокировка уже снята
+и данные записаны. Если в пачке есть Cleared или Reloaded, события до него
+не доставляются: после них подписчику всё равно перерисовывать всё.
+
+Колбэк вызывается в том потоке, который менял данные. Ошибка в колбэке
+печатается и не мешает остальным подписчикам: данные к этому моменту уже
+изменены.
+"""
+import traceback
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from models.entities import Appointment, Client, ScheduleItem, ScheduleTemplate
+
+
+@dataclass(frozen=True, slots=True)
+class ClientAdded:
+    client: Client
+
+
+@dataclass(frozen=True, slots=True)
+class AppointmentAdded:
+    appointment: Appointment
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduleAdded:
+    schedule: ScheduleItem
+
+
+@dataclass(frozen=True, slots=True)
+class TemplateChanged:
+    """Повторяющийся график добавлен или изменён; date — если затронут один день"""
+    template: ScheduleTemplate
+    date: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Cleared:
+    """Все данные удалены"""
+
+
+@dataclass(frozen=True, slots=True)
+class Reloaded:
+    """Данные перечитаны целиком: что поменялось, неизвестно"""
+
+
+_RESETS = (Cleared, Reloaded)
+
+
+class ChangeFeed:
+    def __init__(self):
+        # Кортеж заменяется целиком, поэтому подписка во время доставки
+        # не ломает обход
+        self._subscribers: Tuple[tuple, ...] = ()
+        self._held = 0
+        self._pending: list = []
+
+    def subscribe(self, callback: Callable[[list], None], *kinds: type) -> Callable[[], None]:
+        """Подписка на события типов kinds (без них — на все); возвращает функцию отписки"""
+        entry = (callback, kinds)
+        self._subscribers = (*self._subscribers, entry)
+
+        def unsubscribe():
+            self._subscribers = tuple(s for s in self._subscribers if s is not entry)
+        return unsubscribe
+
+    def publish(self, event):
+        if not self._subscribers:
+            return
+        if self._held:
+            self._pending.append(event)
+        else:
+            self._deliver([event])
+
+    @contextmanager
+    def hold(self):
+        """События внутри блока копятся и доставляются одной пачкой при выходе"""
+        self._held += 1
+        try:
+            yield
+        finally:
+            self._held -= 1
+            if not self._held and self._pending:
+                events, self._pending = self._pending, []
+                self._deliver(events)
+
+    def _deliver(self, events: list):
+        for i in range(len(events) - 1, 0, -1):
+            if isinstance(events[i], _RESETS):
+                events = events[i:]
+                break
+        for callback, kinds in self._subscribers:
+            chosen: List = [e for e in events if isinstance(e, kinds)] if kinds else events
+            if chosen:
+                try:
+                    callback(chosen)
+                except Exception:
+                    traceback.print_exc()
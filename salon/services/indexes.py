@@ -0,0 +1,72 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable
+
+
+class IntervalIndex:
+    """Занятые интервалы [start, end) одного мастера, отсортированные по началу.
+
+    Записи мастера не пересекаются (это проверяется при создании), поэтому
+    концы интервалов отсортированы так же, как начала, и для проверки
+    пересечения достаточно одного бинарного поиска.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, start, end):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+    def overlaps(self, start, end) -> bool:
+        # Кандидаты — интервалы, начавшиеся раньше end; из них позже всех
+        # заканчивается последний
+        i = bisect_left(self.starts, end)
+        return i > 0 and self.ends[i - 1] > start
+
+    def between(self, lo, hi) -> list:
+        """Интервалы, пересекающиеся с [lo, hi)"""
+        i = bisect_right(self.ends, lo)
+        j = bisect_left(self.starts, hi)
+        return list(zip(self.starts[i:j], self.ends[i:j]))
+
+
+class MasterIntervals:
+    """IntervalIndex для каждого мастера"""
+
+    def __init__(self):
+        self._by_master: Dict[int, IntervalIndex] = {}
+
+    def clear(self):
+        self._by_master = {}
+
+    def add(self, master_id: int, start, end):
+        index = self._by_master.get(master_id)
+        if index is None:
+            index = self._by_master[master_id] = IntervalIndex()
+        index.add(start, end)
+
+    def rebuild(self, items: Iterable):
+        """items — тройки (master_id, start, end) в любом порядке"""
+        grouped: Dict[int, list] = {}
+        for master_id, start, end in items:
+            grouped.setdefault(master_id, []).append((start, end))
+        self._by_master = {}
+        for master_id, pairs in grouped.items():
+            pairs.sort()
+            index = IntervalIndex()
+            index.starts = [p[0] for p in pairs]
+            index.ends = [p[1] for p in pairs]
+            self._by_master[master_id] = index
+
+    def overlaps(self, master_id: int, start, end) -> bool:
+        index = self._by_master.get(master_id)
+        return index is not None and index.overlaps(start, end)
+
+    def between(self, master_id: int, lo, hi) -> list:
+        index = self._by_master.get(master_id)
+        return index.between(lo, hi) if index is not None else []
@@ -0,0 +1,165 @@
+"""Потоковое чтение и запись файла вида {"ключ": [ ... ], "ключ": значение}.
+
+Файл читается кусками, а каждый элемент верхнеуровневых массивов
+разбирается отдельно через JSONDecoder.raw_decode, поэтому весь документ
+никогда не лежит в памяти одновременно ни строкой, ни деревом объектов.
+
+write_sections пишет тот же JSON, но по одному элементу массива на строку
+и с пометкой "format" в первой строке. Такой файл читается блоками строк:
+один вызов json.loads на несколько тысяч записей вместо разбора по одной.
+"""
+import json
+import re
+from typing import Callable, Iterator, Optional, Tuple
+
+CHUNK_SIZE = 1 << 16
+BLOCK_LINES = 4096
+LINES_FORMAT = 2
+_LINES_HEADER = '{"format": %d' % LINES_FORMAT
+_NON_WHITESPACE = re.compile(r'[^ \t\n\r]')
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Следующий значимый символ (пробелы пропускаются), '' в конце файла"""
+        while True:
+            match = _NON_WHITESPACE.search(self.buf, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buf[self.pos]
+            self.pos = len(self.buf)
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f'Ожидался символ {char!r} в позиции {self.pos}')
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # Число могло оборваться на границе куска — дочитываем и разбираем заново
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def write_sections(f, header: dict, sections: dict, default: Optional[Callable] = None):
+    """Пишет {**header, **sections}, по одному элементу массивов на строку"""
+    head = {'format': LINES_FORMAT}
+    head.update(header)
+    f.write(json.dumps(head, ensure_ascii=False)[:-1])
+    for name, items in sections.items():
+        f.write(',\n' + json.dumps(name) + ': [\n')
+        for i in range(0, len(items), BLOCK_LINES):
+            if i:
+                f.write(',\n')
+            f.write(',\n'.join(json.dumps(item, ensure_ascii=False, default=default)
+                               for item in items[i:i + BLOCK_LINES]))
+        f.write('\n]')
+    f.write('\n}\n')
+
+
+def _decode_block(lines: list) -> list:
+    text = ''.join(lines).rstrip().rstrip(',')
+    return json.loads('[' + text + ']')
+
+
+def _iter_line_blocks(f, first_line: str) -> Iterator[Tuple[str, object]]:
+    head = json.loads(first_line.rstrip().rstrip(',') + '}')
+    for key, value in head.items():
+        if key != 'format':
+            yield key, value
+    key = None
+    block = []
+    for line in f:
+        if line.startswith('{'):
+            block.append(line)
+            if len(block) >= BLOCK_LINES:
+                yield key, _decode_block(block)
+                block = []
+        elif line.startswith('"'):
+            key = json.loads(line[:line.index(':')])
+        elif line.startswith(']'):
+            if block:
+                yield key, _decode_block(block)
+            block = []
+
+
+def iter_blocks(f, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, object]]:
+    """Пары (ключ, список очередных элементов) для массивов и (ключ, значение) для остальных полей"""
+    first_line = f.readline()
+    if first_line.startswith(_LINES_HEADER):
+        yield from _iter_line_blocks(f, first_line)
+        return
+    block_key, block = None, []
+    for key, value, in_array in _iter_generic(f, first_line, chunk_size):
+        if block and (key != block_key or not in_array or len(block) >= BLOCK_LINES):
+            yield block_key, block
+            block = []
+        if in_array:
+            block_key = key
+            block.append(value)
+        else:
+            yield key, value
+    if block:
+        yield block_key, block
+
+
+def _iter_generic(f, first_line: str, chunk_size: int):
+    reader = _Reader(f, chunk_size)
+    reader.buf = first_line
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if reader.peek() == '[':
+            reader.pos += 1
+            if reader.peek() == ']':
+                reader.pos += 1
+            else:
+                while True:
+                    yield key, reader.value(), True
+                    if reader.peek() == ',':
+                        reader.pos += 1
+                        continue
+                    reader.expect(']')
+                    break
+        else:
+            yield key, reader.value(), False
+        if reader.peek() == ',':
+            reader.pos += 1
+            continue
+        reader.expect('}')
+        return
@@ -0,0 +1,148 @@
+"""Работа нескольких процессов с одним каталогом данных.
+
+Пример — две стойки ресепшена с общей папкой. Каждое изменение делается
+под исключительной блокировкой файла salon_data.lock (flock, на Windows —
+msvcrt.locking), а перед проверками записи процесс дочитывает то, что
+другие успели дописать в журнал. Номер seq журнала служит счётчиком
+поколений: у каждой операции он свой и растёт во всех процессах сразу.
+
+Понять, что данные менялись, можно без чтения файлов: достаточно stat.
+Если снимок тот же, а журнал стал длиннее прочитанного, читается только
+хвост журнала. Если снимок подменили (кто-то свернул журнал) или журнал
+укоротился, данные перечитываются целиком.
+"""
+import json
+import os
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from services.storage import JournalStorage, file_key
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock_file(f):
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK сам ждёт около 10 секунд, потом сдаётся — ждём дальше
+                time.sleep(0.05)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class FileLock:
+    """Исключительная рекомендательная блокировка файла, повторно входимая.
+
+    Внутри процесса потоки дополнительно разводятся обычным RLock:
+    flock на один и тот же файл между потоками одного процесса не защищает.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._depth = 0
+        self._thread_lock = threading.RLock()
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, 'a+b')
+                _lock_file(self._file)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            _unlock_file(self._file)
+        self._thread_lock.release()
+
+    def close(self):
+        with self._thread_lock:
+            if self._file is not None and self._depth == 0:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedJournalStorage(JournalStorage):
+    """JournalStorage для каталога, в который пишут несколько процессов.
+
+    SalonData оборачивает каждое изменение в lock и перед проверками
+    вызывает read_changes. Запись идёт синхронно: фоновый поток записи
+    писал бы уже после снятия блокировки.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, journal_path: Optional[str] = None, lock_path: Optional[str] = None):
+        super().__init__(path, journal_path)
+        self.lock = FileLock(lock_path or os.path.splitext(path)[0] + '.lock')
+
+    @property
+    def generation(self) -> int:
+        return self.seq
+
+    def iter_load(self) -> Iterator[Tuple[str, List[dict]]]:
+        # Загрузка тоже под блокировкой: иначе можно прочитать снимок
+        # посреди чужого сворачивания журнала
+        with self.lock:
+            yield from super().iter_load()
+
+    def read_changes(self) -> Optional[List[Tuple[str, List[dict]]]]:
+        """Операции других процессов с прошлого чтения; None — нужно перечитать всё.
+
+        Вызывается под self.lock.
+        """
+        if file_key(self.path) != self._snapshot_key:
+            return None
+        size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        if size < self._offset:
+            return None
+        if size == self._offset:
+            return []
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self._offset)
+            tail = f.read(size - self._offset)
+        changes = []
+        for line in tail.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break
+            self._offset += len(line)
+            entry = json.loads(line)
+            if entry['seq'] <= self.seq:
+                continue
+            self.seq = entry['seq']
+            self._journal_records += 1
+            data = entry.get('data')
+            changes.append((entry['op'], [data] if data is not None else []))
+        return changes
+
+    def close(self):
+        super().close()
+        self.lock.close()
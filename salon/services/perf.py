@@ -0,0 +1,224 @@
+"""Замеры времени на горячих путях SalonData и окна.
+
+Включаются переменной окружения SALON_PERF=1 до запуска программы.
+Выключенные замеры ничего не стоят: декораторы возвращают исходную
+функцию, а счётчики вызываются только под проверкой ENABLED.
+
+Включённые копят по каждому имени число вызовов, сумму, максимум и
+гистограмму с корзинами по степеням двойки микросекунд. При выходе
+(и по кнопке на вкладке «Производительность») гистограммы дописываются
+в SALON_PERF_LOG, по умолчанию salon_perf.log. Там же можно снять
+профиль cProfile за нужный отрезок времени.
+
+Отдельно от этого mark() отмечает этапы запуска программы — импорт,
+окно на экране, данные загружены — от импорта этого модуля, который
+application.py делает первым. Отметок несколько штук, поэтому они
+пишутся всегда, а показываются с application.py --startup-timing.
+"""
+import atexit
+import cProfile
+import inspect
+import io
+import os
+import pstats
+import threading
+import time
+import types
+from datetime import datetime
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+ENABLED = os.environ.get('SALON_PERF', '') not in ('', '0')
+LOG_PATH = os.environ.get('SALON_PERF_LOG', 'salon_perf.log')
+# Корзина i — вызовы короче 2**i мкс; последняя — всё, что дольше ~4 с
+BUCKETS = 23
+
+
+class Histogram:
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[min(BUCKETS - 1, int(seconds * 1e6).bit_length())] += 1
+
+    def percentile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает доля q вызовов, в секундах"""
+        need = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= need:
+                return min(self.max, (1 << i) / 1e6)
+        return self.max
+
+
+_lock = threading.Lock()
+_timers: Dict[str, Histogram] = {}
+_counters: Dict[str, int] = {}
+_profiler: Optional[cProfile.Profile] = None
+_started = time.perf_counter()
+_marks: List[Tuple[str, float]] = []
+
+
+def record(name: str, seconds: float):
+    with _lock:
+        hist = _timers.get(name)
+        if hist is None:
+            hist = _timers[name] = Histogram()
+        hist.add(seconds)
+
+
+def count(name: str, n: int = 1):
+    """Счётчик событий; вызывать под if perf.ENABLED"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def timed(func=None, *, name: Optional[str] = None):
+    """Декоратор замера; при выключенных замерах возвращает функцию как есть"""
+    def decorate(f):
+        if not ENABLED:
+            return f
+        label = name or f.__qualname__
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - t0)
+        return wrapper
+    return decorate(func) if func is not None else decorate
+
+
+def instrument(cls=None, *, extra=('_load', '_save', '_persist', '_commit', '_has_conflict')):
+    """Декоратор класса: замеры на всех его открытых методах и на extra.
+
+    Оборачиваются только методы, объявленные в самом классе; унаследованные
+    уже обёрнуты у родителя.
+    """
+    def decorate(c):
+        if not ENABLED:
+            return c
+        for attr, value in list(vars(c).items()):
+            if not isinstance(value, types.FunctionType) or (attr.startswith('_') and attr not in extra):
+                continue
+            # Для @contextmanager замер вызова показал бы только создание менеджера
+            if inspect.isgeneratorfunction(getattr(value, '__wrapped__', value)):
+                continue
+            setattr(c, attr, timed(value))
+        return c
+    return decorate(cls) if cls is not None else decorate
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def report_rows() -> List[dict]:
+    with _lock:
+        items = [(name, h.count, h.total, h.max, h.percentile(0.5), h.percentile(0.9), h.percentile(0.99),
+                  list(h.buckets)) for name, h in _timers.items()]
+    items.sort(key=lambda row: -row[2])
+    return [{'name': name, 'count': n, 'total_ms': total * 1000, 'mean_ms': total * 1000 / n,
+             'p50_ms': p50 * 1000, 'p90_ms': p90 * 1000, 'p99_ms': p99 * 1000, 'max_ms': mx * 1000,
+             'buckets': buckets}
+            for name, n, total, mx, p50, p90, p99, buckets in items]
+
+
+def report_text(histograms: bool = False) -> str:
+    lines = [f"{'операция':<44}{'вызовов':>9}{'всего, мс':>12}{'p50':>9}{'p90':>9}{'p99':>9}{'макс':>10}"]
+    for row in report_rows():
+        lines.append(f"{row['name'][:43]:<44}{row['count']:>9}{row['total_ms']:>12.1f}{row['p50_ms']:>9.2f}"
+                     f"{row['p90_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['max_ms']:>10.2f}")
+        if histograms:
+            cells = [f"<{_bucket_label(i)}:{n}" for i, n in enumerate(row['buckets']) if n]
+            lines.append('    ' + ' '.join(cells))
+    with _lock:
+        counters = sorted(_counters.items())
+    if counters:
+        lines.append('')
+        lines.extend(f"{name:<44}{value:>9}" for name, value in counters)
+    return '\n'.join(lines) + '\n'
+
+
+def _bucket_label(i: int) -> str:
+    us = 1 << i
+    return f"{us}мкс" if us < 1000 else f"{us / 1000:g}мс"
+
+
+def dump(path: Optional[str] = None):
+    """Дописывает таблицу и гистограммы в журнал замеров"""
+    with open(path or LOG_PATH, 'a', encoding='utf-8') as f:
+        f.write(f"=== {datetime.now():%Y-%m-%d %H:%M:%S} pid {os.getpid()}\n")
+        f.write(report_text(histograms=True))
+        f.write('\n')
+
+
+def mark(name: str):
+    """Этап запуска: сколько секунд прошло от старта программы"""
+    at = time.perf_counter() - _started
+    _marks.append((name, at))
+    if ENABLED:
+        record(f'startup.{name}', at)
+
+
+def startup_text() -> str:
+    lines = [f"{'этап запуска':<32}{'от старта, мс':>15}{'этап, мс':>11}"]
+    previous = 0.0
+    for name, at in _marks:
+        lines.append(f"{name:<32}{at * 1000:>15.1f}{(at - previous) * 1000:>11.1f}")
+        previous = at
+    return '\n'.join(lines) + '\n'
+
+
+def dump_startup(path: Optional[str] = None):
+    with open(path or LOG_PATH, 'a', encoding='utf-8') as f:
+        f.write(f"=== {datetime.now():%Y-%m-%d %H:%M:%S} pid {os.getpid()} запуск\n")
+        f.write(startup_text())
+        f.write('\n')
+
+
+def profiling() -> bool:
+    return _profiler is not None
+
+
+def start_profile():
+    """cProfile для текущего потока (потока окна) до stop_profile"""
+    global _profiler
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def stop_profile(path: Optional[str] = None, top: int = 30) -> str:
+    """Останавливает профиль, пишет .prof рядом с журналом и возвращает сводку"""
+    global _profiler
+    if _profiler is None:
+        return ''
+    profiler, _profiler = _profiler, None
+    profiler.disable()
+    path = path or f"{os.path.splitext(LOG_PATH)[0]}_{datetime.now():%Y%m%d_%H%M%S}.prof"
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(top)
+    summary = f"Профиль: {path}\n{out.getvalue()}"
+    with open(LOG_PATH, 'a', encoding='utf-8') as f:
+        f.write(summary + '\n')
+    return summary
+
+
+if ENABLED:
+    atexit.register(lambda: _timers and dump())
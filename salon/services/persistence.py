@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class BackgroundStorage:
+    """Обёртка над хранилищем, которая пишет на диск в отдельном потоке.
+
+    SalonData меняет данные в памяти и сразу возвращает результат, а операции
+    копятся в очереди. Поток-писатель забирает их пачкой: серия кликов
+    превращается в одну запись и один fsync, а из нескольких снимков подряд
+    пишется только последний. Колбэки on_flushed / on_error вызываются из
+    потока-писателя — интерфейс должен сам передать их в свой поток.
+    """
+
+    shared = False
+
+    def __init__(self, storage, delay: float = 0.05):
+        if storage.shared:
+            raise ValueError('Общий каталог данных пишется только синхронно')
+        self.storage = storage
+        self.journaled = storage.journaled
+        self.path = storage.path
+        self.delay = delay
+        self.on_flushed: Optional[Callable[[int], None]] = None
+        self.on_error: Optional[Callable[[Exception], None]] = None
+        self._pending = []
+        self._busy = False
+        self._closed = False
+        self._failed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='salon-writer', daemon=True)
+        self._thread.start()
+
+    def load(self) -> Optional[dict]:
+        return self.storage.load()
+
+    def iter_load(self):
+        return self.storage.iter_load()
+
+    def append(self, op: str, data: Optional[dict] = None):
+        self._submit(('op', op, data))
+
+    def append_many(self, entries):
+        self._submit(*(('op', op, data) for op, data in entries))
+
+    def snapshot(self, state: dict):
+        self._submit(('snapshot', state))
+
+    def needs_compaction(self) -> bool:
+        # После ошибки записи диск отстаёт от памяти — нужен полный снимок
+        return self._failed or self.storage.needs_compaction()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Ждёт, пока очередь будет записана. False — если не дождались"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.storage.close()
+
+    def _submit(self, *items):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('Хранилище уже закрыто')
+            self._pending.extend(items)
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                # Даём серии изменений накопиться, чтобы записать её разом
+                deadline = time.monotonic() + self.delay
+                while not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending
+                self._pending = []
+                self._busy = True
+            try:
+                self._write(batch)
+            except Exception as e:
+                self._failed = True
+                if self.on_error:
+                    self.on_error(e)
+            else:
+                if self.on_flushed:
+                    self.on_flushed(len(batch))
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, batch):
+        # Снимок уже содержит все операции, поставленные в очередь до него
+        last_snapshot = max((i for i, item in enumerate(batch) if item[0] == 'snapshot'), default=None)
+        if last_snapshot is not None:
+            batch = batch[last_snapshot:]
+        for item in batch:
+            if item[0] == 'snapshot':
+                self.storage.snapshot(item[1])
+                self._failed = False
+            else:
+                self.storage.append(item[1], item[2])
+        self.storage.flush()
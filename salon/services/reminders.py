@@ -0,0 +1,424 @@
+"""Напоминания клиентам о завтрашних записях по электронной почте.
+
+Конвейер из трёх шагов:
+
+1. Записи за нужные даты берутся одной выборкой history_table — по дням,
+   а не перебором всей истории; имена клиентов, мастеров и услуг
+   подставляются из словарей, собранных один раз на весь прогон.
+2. Письмо собирается по шаблону (string.Template: $client, $date, $time,
+   $master, $service, $salon) и проверяется по журналу отправленных.
+3. Несколько потоков отправляют письма, у каждого своё постоянное
+   SMTP-соединение. Общий ограничитель держит заданную скорость.
+   Временные ошибки (4xx, обрыв связи) повторяются с паузой, а после
+   обрыва соединение открывается заново.
+
+Журнал отправленных — текстовый файл, по ключу на строку; ключ
+дописывается сразу после того, как сервер принял письмо. Повторный запуск
+за тот же день пропускает уже отправленное. Если программа упадёт между
+приёмом письма и записью ключа, это письмо уйдёт ещё раз: лучше дубль,
+чем пропущенное напоминание.
+
+SMS-шлюза у салона нет, поэтому напоминания идут только на email; канал
+входит в ключ журнала, чтобы SMS можно было добавить рядом.
+
+    python -m services.reminders --smtp-host smtp.example.ru --smtp-port 587 --starttls \\
+        --smtp-user salon --from-addr salon@example.ru      (пароль — SALON_SMTP_PASSWORD)
+    python -m services.reminders --date 2024-05-02 --dry-run
+"""
+import argparse
+import base64
+import os
+import queue
+import smtplib
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from email.utils import formataddr, formatdate
+from string import Template
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from models.entities import from_minutes
+
+LEDGER_FILE = 'reminders_sent.log'
+CHANNEL = 'email'
+
+DEFAULT_SUBJECT = 'Напоминание о записи на $date в $time'
+DEFAULT_BODY = """Здравствуйте, $client!
+
+Напоминаем, что вы записаны в $salon на $date в $time.
+Услуга: $service
+Мастер: $master
+
+Если планы изменились, пожалуйста, предупредите нас заранее.
+"""
+WEEKDAYS = ('понедельник', 'вторник', 'среда', 'четверг', 'пятница', 'суббота', 'воскресенье')
+
+
+@dataclass
+class ReminderTemplate:
+    subject: str = DEFAULT_SUBJECT
+    body: str = DEFAULT_BODY
+    salon: str = 'салон'
+
+    def __post_init__(self):
+        self._subject = Template(self.subject)
+        self._body = Template(self.body)
+
+    def render(self, fields: dict) -> Tuple[str, str]:
+        fields = {'salon': self.salon, **fields}
+        return self._subject.safe_substitute(fields), self._body.safe_substitute(fields)
+
+
+@dataclass
+class Reminder:
+    key: str
+    email: str
+    name: str
+    subject: str
+    body: str
+
+
+def upcoming(data, first: date, last: date) -> Iterator[tuple]:
+    """(id, client_id, master_id, service_id, начало, конец) за даты first..last по времени начала"""
+    table = data.history_table(first, last)
+    yield from zip(table.id, table.client_id, table.master_id, table.service_id, table.start, table.end)
+
+
+def build_reminders(data, first: date, last: date, template: ReminderTemplate) -> Iterator[Reminder]:
+    """Письма по записям за даты; клиенты без email пропускаются"""
+    clients = {c.id: c for c in data.clients}
+    masters = {m.id: m.name for m in data.masters}
+    services = {s.id: s.name for s in data.services}
+    for appointment_id, client_id, master_id, service_id, start, _ in upcoming(data, first, last):
+        client = clients.get(client_id)
+        if client is None or '@' not in client.email:
+            continue
+        start_dt = from_minutes(start)
+        subject, body = template.render({
+            'client': client.name,
+            'date': f'{start_dt:%d.%m.%Y} ({WEEKDAYS[start_dt.weekday()]})',
+            'time': f'{start_dt:%H:%M}',
+            'master': masters.get(master_id, 'мастер'),
+            'service': services.get(service_id, 'услуга'),
+        })
+        # Начало входит в ключ: перенесённая запись — новое напоминание
+        yield Reminder(f'{CHANNEL}:{appointment_id}:{start}', client.email, client.name, subject, body)
+
+
+class SentLedger:
+    """Ключи отправленных напоминаний; файл только дописывается"""
+
+    SYNC_EVERY = 100
+
+    def __init__(self, path: str = LEDGER_FILE):
+        self.path = path
+        self._keys = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._keys.update(line.strip() for line in f if line.strip())
+        self._file = None
+        self._unsynced = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key: str):
+        with self._lock:
+            if key in self._keys:
+                return
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(key + '\n')
+            self._file.flush()
+            self._keys.add(key)
+            self._unsynced += 1
+            if self._unsynced >= self.SYNC_EVERY:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+
+class RateLimiter:
+    """Не больше rate писем в секунду на все потоки; 0 — без ограничения"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class SmtpConfig:
+    host: str = 'localhost'
+    port: int = 25
+    sender: str = 'salon@localhost'
+    sender_name: str = ''
+    username: Optional[str] = None
+    password: Optional[str] = None
+    starttls: bool = False
+    ssl: bool = False
+    timeout: float = 10.0
+
+
+@dataclass
+class DeliveryReport:
+    sent: int = 0
+    skipped: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    retries: int = 0
+    seconds: float = 0.0
+
+
+class _Permanent(Exception):
+    """Сервер окончательно отказал (5xx): повтор не поможет"""
+
+
+class SmtpPool:
+    """Пул SMTP-соединений: connections потоков, у каждого своё соединение"""
+
+    def __init__(self, config: SmtpConfig, connections: int = 4, rate: float = 20.0, retries: int = 3,
+                 backoff: float = 0.5, per_connection: int = 500):
+        self.config = config
+        self.connections = connections
+        self.limiter = RateLimiter(rate, burst=connections)
+        self.retries = retries
+        self.backoff = backoff
+        # Многие серверы рвут соединение после сотни-другой писем, поэтому
+        # переоткрываем его сами, не дожидаясь обрыва
+        self.per_connection = per_connection
+        self._from = formataddr((config.sender_name, config.sender)) if config.sender_name else config.sender
+
+    def _connect(self) -> smtplib.SMTP:
+        c = self.config
+        if c.ssl:
+            smtp = smtplib.SMTP_SSL(c.host, c.port, timeout=c.timeout)
+        else:
+            smtp = smtplib.SMTP(c.host, c.port, timeout=c.timeout)
+            if c.starttls:
+                smtp.starttls()
+        if c.username:
+            smtp.login(c.username, c.password or '')
+        return smtp
+
+    def _message(self, reminder: Reminder) -> str:
+        # Письмо всегда одно и то же по устройству (text/plain, utf-8, base64),
+        # поэтому собираем его строкой: MIMEText с Header в разы медленнее,
+        # а на тысячах писем это заметная доля всей рассылки.
+        # Концы строк smtplib сам приводит к CRLF.
+        body = base64.encodebytes(reminder.body.encode('utf-8')).decode('ascii')
+        return (f'From: {self._from}\nTo: {formataddr((reminder.name, reminder.email))}\n'
+                f'Subject: {_encoded_words(reminder.subject)}\nDate: {formatdate(localtime=True)}\n'
+                f'MIME-Version: 1.0\nContent-Type: text/plain; charset="utf-8"\n'
+                f'Content-Transfer-Encoding: base64\n\n{body}')
+
+    def _worker(self, jobs: queue.Queue, report: DeliveryReport, on_sent: Callable[[Reminder], None],
+                lock: threading.Lock):
+        smtp, used = None, 0
+        try:
+            while True:
+                reminder = jobs.get()
+                if reminder is None:
+                    return
+                message = self._message(reminder)
+                for attempt in range(self.retries + 1):
+                    try:
+                        if smtp is None or used >= self.per_connection:
+                            _quit(smtp)
+                            smtp, used = self._connect(), 0
+                        self.limiter.acquire()
+                        try:
+                            smtp.sendmail(self.config.sender, [reminder.email], message)
+                        except smtplib.SMTPRecipientsRefused as e:
+                            code, text = next(iter(e.recipients.values()))
+                            raise (_Permanent if code >= 500 else smtplib.SMTPResponseException)(code, text)
+                        except smtplib.SMTPResponseException as e:
+                            if e.smtp_code >= 500:
+                                raise _Permanent(e.smtp_code, e.smtp_error)
+                            # После отказа посреди письма сессию надо сбросить
+                            smtp.rset()
+                            raise
+                        used += 1
+                    except _Permanent as e:
+                        with lock:
+                            report.failed.append((reminder.key, f'{e.args[0]} {_text(e.args[1])}'))
+                        break
+                    except (smtplib.SMTPException, OSError) as e:
+                        if not isinstance(e, smtplib.SMTPResponseException):
+                            # Обрыв связи: соединение больше не годится
+                            _quit(smtp)
+                            smtp = None
+                        if attempt == self.retries:
+                            with lock:
+                                report.failed.append((reminder.key, str(e) or type(e).__name__))
+                            break
+                        with lock:
+                            report.retries += 1
+                        time.sleep(self.backoff * 2 ** attempt)
+                    else:
+                        on_sent(reminder)
+                        with lock:
+                            report.sent += 1
+                        break
+        finally:
+            _quit(smtp)
+
+    def send_all(self, reminders: Iterable[Reminder], on_sent: Callable[[Reminder], None] = lambda r: None,
+                 report: Optional[DeliveryReport] = None) -> DeliveryReport:
+        report = report or DeliveryReport()
+        t0 = time.perf_counter()
+        jobs = queue.Queue(maxsize=self.connections * 64)
+        lock = threading.Lock()
+        workers = [threading.Thread(target=self._worker, args=(jobs, report, on_sent, lock),
+                                    name=f'smtp-{i}', daemon=True) for i in range(self.connections)]
+        for w in workers:
+            w.start()
+        try:
+            for reminder in reminders:
+                jobs.put(reminder)
+        finally:
+            for _ in workers:
+                jobs.put(None)
+            for w in workers:
+                w.join()
+        report.seconds += time.perf_counter() - t0
+        return report
+
+
+def _quit(smtp: Optional[smtplib.SMTP]):
+    if smtp is None:
+        return
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
+
+def _encoded_words(text: str, limit: int = 45) -> str:
+    """Заголовок по RFC 2047: куски до limit байт UTF-8, не разрывая символы"""
+    if text.isascii():
+        return text
+    raw = text.encode('utf-8')
+    words, begin = [], 0
+    while begin < len(raw):
+        end = min(begin + limit, len(raw))
+        while end < len(raw) and raw[end] & 0xC0 == 0x80:
+            end -= 1
+        words.append(f"=?utf-8?b?{base64.b64encode(raw[begin:end]).decode('ascii')}?=")
+        begin = end
+    return '\n '.join(words)
+
+
+def _text(value) -> str:
+    return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+
+
+def send_reminders(data, pool: SmtpPool, ledger: SentLedger, first: Optional[date] = None,
+                   last: Optional[date] = None, template: Optional[ReminderTemplate] = None) -> DeliveryReport:
+    """Напоминания за даты first..last (по умолчанию — на завтра), кроме уже отправленных"""
+    first = first or date.today() + timedelta(days=1)
+    last = last or first
+    report = DeliveryReport()
+
+    def pending() -> Iterator[Reminder]:
+        for reminder in build_reminders(data, first, last, template or ReminderTemplate()):
+            if reminder.key in ledger:
+                report.skipped += 1
+            else:
+                yield reminder
+
+    try:
+        return pool.send_all(pending(), lambda r: ledger.add(r.key), report)
+    finally:
+        ledger.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Напоминания клиентам о записях')
+    parser.add_argument('--data', default='salon_data.json', help='файл данных (по умолчанию salon_data.json)')
+    parser.add_argument('--sqlite', help='работать с базой SQLite вместо файла данных')
+    parser.add_argument('--date', help='дата записей, YYYY-MM-DD (по умолчанию завтра)')
+    parser.add_argument('--days', type=int, default=1, help='сколько дней начиная с --date')
+    parser.add_argument('--salon', default='салон', help='название салона для шаблона')
+    parser.add_argument('--template', help='файл шаблона: первая строка — тема, дальше — текст')
+    parser.add_argument('--ledger', default=LEDGER_FILE, help='журнал отправленных')
+    parser.add_argument('--smtp-host', default='localhost')
+    parser.add_argument('--smtp-port', type=int, default=25)
+    parser.add_argument('--smtp-user')
+    parser.add_argument('--starttls', action='store_true')
+    parser.add_argument('--ssl', action='store_true')
+    parser.add_argument('--from-addr', default='salon@localhost')
+    parser.add_argument('--connections', type=int, default=4, help='SMTP-соединений одновременно')
+    parser.add_argument('--rate', type=float, default=20.0, help='писем в секунду, 0 — без ограничения')
+    parser.add_argument('--dry-run', action='store_true', help='только показать, что будет отправлено')
+    args = parser.parse_args(argv)
+
+    try:
+        first = date.fromisoformat(args.date) if args.date else date.today() + timedelta(days=1)
+    except ValueError:
+        print(f'Неверная дата: {args.date}', file=sys.stderr)
+        return 2
+    last = first + timedelta(days=max(1, args.days) - 1)
+    template = ReminderTemplate(salon=args.salon)
+    if args.template:
+        with open(args.template, encoding='utf-8') as f:
+            subject, _, body = f.read().partition('\n')
+        template = ReminderTemplate(subject.strip(), body.lstrip('\n'), args.salon)
+
+    if args.sqlite:
+        from services.sqlite_data import SqliteSalonData
+        data = SqliteSalonData(args.sqlite)
+    else:
+        from services.salon_data import SalonData
+        from services.storage import JournalStorage
+        data = SalonData(storage=JournalStorage(args.data))
+    try:
+        ledger = SentLedger(args.ledger)
+        if args.dry_run:
+            reminders = [r for r in build_reminders(data, first, last, template) if r.key not in ledger]
+            print(f'К отправке: {len(reminders)} (в журнале отправленных: {len(ledger)})')
+            if reminders:
+                print(f'\nКому: {reminders[0].email}\nТема: {reminders[0].subject}\n\n{reminders[0].body}')
+            return 0
+        config = SmtpConfig(args.smtp_host, args.smtp_port, args.from_addr, args.salon, args.smtp_user,
+                            os.environ.get('SALON_SMTP_PASSWORD'), args.starttls, args.ssl)
+        report = send_reminders(data, SmtpPool(config, args.connections, args.rate), ledger, first, last, template)
+    finally:
+        data.close()
+    print(f'Отправлено: {report.sent}, пропущено как уже отправленные: {report.skipped}, '
+          f'повторов: {report.retries}, ошибок: {len(report.failed)}, {report.seconds:.1f} с')
+    for key, error in report.failed[:20]:
+        print(f'  {key}: {error}', file=sys.stderr)
+    return 1 if report.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,154 +1,771 @@
-import json
-import os
-from dataclasses import asdict
-from datetime import datetime, timedelta
-from typing import List, Optional
-
-from models.entities import Service, Master, Client, Appointment, ScheduleItem
-
-
-class SalonData:
-    DATA_FILE = 'salon_data.json'
-
-    def __init__(self):
-        self.services: List[Service] = self._build_services()
-        self.masters: List[Master] = [Master(1,'Анна'), Master(2,'Ольга'), Master(3,'Мария'), Master(4,'Дмитрий'), Master(5,'Сергей')]
-        self.clients: List[Client] = []
-        self.appointments: List[Appointment] = []
-        self.schedules: List[ScheduleItem] = []
-        self._load()
-
-    def _build_services(self) -> List[Service]:
-        items = [
-            Service(1, 'Стрижки', 'Женская стрижка (с мытьем и укладкой)', 60, 1500),
-            Service(2, 'Стрижки', 'Мужская стрижка (с мытьем и укладкой)', 45, 1000),
-            Service(3, 'Стрижки', 'Детская стрижка (до 10 лет)', 30, 700),
-            Service(4, 'Стрижки', 'Стрижка челки', 15, 300),
-            Service(5, 'Стрижки', 'Креативная/модельная стрижка', 75, 1800),
-            Service(6, 'Стрижки', 'Стрижка машинкой', 20, 500),
-            Service(7, 'Стрижки', 'Подравнивание кончиков', 20, 600),
-            Service(8, 'Окрашивание', 'Окрашивание в один тон', 90, 2500),
-            Service(9, 'Окрашивание', 'Тонирование', 60, 1500),
-            Service(10, 'Окрашивание', 'Мелирование (классическое, шатуш, балаяж, омбре)', 150, 4000),
-            Service(11, 'Окрашивание', 'Колорирование', 120, 3500),
-            Service(12, 'Окрашивание', 'Предпигментация / восстановление цвета', 90, 2200),
-            Service(13, 'Окрашивание', 'Смывка цвета', 60, 1500),
-            Service(14, 'Окрашивание', 'Окрашивание корней', 75, 1800),
-            Service(15, 'Окрашивание', 'AIRTOUCH', 180, 5000),
-            Service(16, 'Укладки', 'Укладка феном / брашинг', 40, 900),
-            Service(17, 'Укладки', 'Укладка на бигуди', 45, 1000),
-            Service(18, 'Укладки', 'Вечерняя / Свадебная прическа', 120, 4000),
-            Service(19, 'Укладки', 'Гламурные локоны / Голливудские волны', 60, 2000),
-            Service(20, 'Укладки', 'Плетение кос (различные техники)', 45, 1200),
-            Service(21, 'Укладки', 'Укладка с выпрямлением', 45, 1000),
-        ]
-        return items
-
-    def _load(self):
-        if not os.path.exists(self.DATA_FILE):
-            return
-        with open(self.DATA_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        apps = data.get('appointments', [])
-        migrated = []
-        for a in apps:
-            if 'service_name' in a and 'service_id' not in a:
-                name = a.get('service_name')
-                match = next((s.id for s in self.services if s.name == name), None)
-                if match:
-                    a['service_id'] = match
-                a.pop('service_name', None)
-            migrated.append(a)
-        self.clients = [Client(**c) for c in data.get('clients', [])]
-        loaded_appts = []
-        for a in migrated:
-            try:
-                ap = Appointment(id=a['id'], client_id=a['client_id'], master_id=a['master_id'], service_id=a['service_id'], start=a['start'], end=a['end'])
-                loaded_appts.append(ap)
-            except Exception:
-                continue
-        self.appointments = loaded_appts
-        self.schedules = [ScheduleItem(**s) for s in data.get('schedules', [])]
-        self._save()
-
-    def _save(self):
-        data = {
-            'clients': [asdict(c) for c in self.clients],
-            'appointments': [asdict(a) for a in self.appointments],
-            'schedules': [asdict(s) for s in self.schedules]
-        }
-        with open(self.DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-
-    def add_client(self, name: str, phone: str, email: str) -> Client:
-        if not name.strip() or not phone.strip() or not email.strip():
-            raise ValueError('Все поля клиента обязательны')
-        new_id = max([c.id for c in self.clients], default=0) + 1
-        client = Client(new_id, name.strip(), phone.strip(), email.strip())
-        self.clients.append(client)
-        self._save()
-        return client
-
-    def find_client_by_name(self, name: str) -> Optional[Client]:
-        return next((c for c in self.clients if c.name == name), None)
-
-    def add_schedule(self, master_id: int, date: str, start_time: str, end_time: str) -> ScheduleItem:
-        st = datetime.strptime(f"{date} {start_time}", '%Y-%m-%d %H:%M')
-        en = datetime.strptime(f"{date} {end_time}", '%Y-%m-%d %H:%M')
-        if en <= st:
-            raise ValueError('Время окончания должно быть позже времени начала')
-        new_id = max([s.id for s in self.schedules], default=0) + 1
-        sched = ScheduleItem(new_id, master_id, date, start_time, end_time)
-        self.schedules.append(sched)
-        self._save()
-        return sched
-
-    def get_schedules_for(self, master_id: int, date: str) -> List[ScheduleItem]:
-        return [s for s in self.schedules if s.master_id == master_id and s.date == date]
-
-    def add_appointment(self, client_id: int, master_id: int, service_id: int, start_dt: datetime) -> Appointment:
-        service = next((s for s in self.services if s.id == service_id), None)
-        if not service:
-            raise ValueError('Услуга не найдена')
-        end_dt = start_dt + timedelta(minutes=service.duration_min)
-        date = start_dt.strftime('%Y-%m-%d')
-        schedules = self.get_schedules_for(master_id, date)
-        if not schedules:
-            raise ValueError('Мастер не принимает в этот день')
-        fits = False
-        for s in schedules:
-            s_start = datetime.strptime(f"{s.date} {s.start_time}", '%Y-%m-%d %H:%M')
-            s_end = datetime.strptime(f"{s.date} {s.end_time}", '%Y-%m-%d %H:%M')
-            if start_dt >= s_start and end_dt <= s_end:
-                fits = True
-                break
-        if not fits:
-            raise ValueError('Запись не помещается в рабочий график мастера')
-        for a in self.appointments:
-            if a.master_id != master_id:
-                continue
-            a_start = datetime.fromisoformat(a.start)
-            a_end = datetime.fromisoformat(a.end)
-            if not (end_dt <= a_start or start_dt >= a_end):
-                raise ValueError('Время уже занято')
-        new_id = max([a.id for a in self.appointments], default=0) + 1
-        appt = Appointment(new_id, client_id, master_id, service_id, start_dt.isoformat(), end_dt.isoformat())
-        self.appointments.append(appt)
-        self._save()
-        return appt
-
-    def get_client_name(self, client_id: int) -> str:
-        client = next((c for c in self.clients if c.id == client_id), None)
-        return client.name if client else "Неизвестный клиент"
-
-    def get_master_name(self, master_id: int) -> str:
-        master = next((m for m in self.masters if m.id == master_id), None)
-        return master.name if master else "Неизвестный мастер"
-
-    def get_service_name(self, service_id: int) -> str:
-        service = next((s for s in self.services if s.id == service_id), None)
-        return service.name if service else "Неизвестная услуга"
-    
-    def get_service_duration(self, service_id: int) -> int:
-        service = next((s for s in self.services if s.id == service_id), None)
+from contextlib import ExitStack, contextmanager, nullcontext
+from dataclasses import replace
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+from models.entities import (Service, Master, Client, Appointment, ScheduleItem, ScheduleTemplate,
+                             from_minutes, iso_to_minutes, to_dict, to_minutes)
+from models.table import AppointmentTable
+from services.analytics import DailyRollups, PeriodReport, period_report
+from services.archive import AppointmentArchive, archive_dir
+from services.changes import (AppointmentAdded, ChangeFeed, Cleared, ClientAdded, Reloaded, ScheduleAdded,
+                              TemplateChanged)
+from services.indexes import MasterIntervals
+from services.perf import instrument
+from services.search import ClientSearchIndex
+from services.slots import FreeSlot, FreeTimeIndex, align, as_date, subtract
+from services.storage import JournalStorage
+from services.templates import TemplateCalendar
+
+APPOINTMENT_FIELDS = ('id', 'client_id', 'master_id', 'service_id', 'start', 'end')
+_APPOINTMENT_KEYS = frozenset(APPOINTMENT_FIELDS)
+
+
+def _write_op(method):
+    """Изменение данных: в общем каталоге — под блокировкой и на свежих данных.
+    Подписчики ленты изменений узнают о нём, когда блокировка уже снята"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.changes.hold(), self._exclusive():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _date_range(first, last):
+    day = first
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+def _clock(value: str) -> timedelta:
+    """'9:30' -> timedelta(hours=9, minutes=30)"""
+    hours, minutes = value.split(':')
+    return timedelta(hours=int(hours), minutes=int(minutes))
+
+
+@instrument
+class SalonData:
+    DATA_FILE = 'salon_data.json'
+    # Записи старше стольких дней при загрузке остаются словарями
+    # и превращаются в Appointment только при обращении к их дню
+    HOT_DAYS = 7
+    # Записи старше стольких дней при загрузке уходят в помесячный архив;
+    # None — не архивировать
+    ARCHIVE_DAYS: Optional[int] = 90
+    # Операции, накопленные внутри batch(); None — пишем сразу
+    _batch: Optional[list] = None
+    # Внутри deferred_snapshots() снимок откладывается до выхода из блока
+    _defer_snapshots = False
+    _snapshot_pending = False
+
+    def __init__(self, storage=None, archive: Optional[AppointmentArchive] = None,
+                 masters: Optional[List[Master]] = None):
+        self.storage = storage or JournalStorage(self.DATA_FILE)
+        self.changes = ChangeFeed()
+        if archive is None and self.ARCHIVE_DAYS is not None and getattr(self.storage, 'path', None):
+            archive = AppointmentArchive(archive_dir(self.storage.path))
+        self.archive = archive
+        self.services: List[Service] = self._build_services()
+        # Мастера филиала приходят из branches.json, иначе — встроенный список
+        self.masters: List[Master] = list(masters) if masters is not None else self._build_masters()
+        self._index_catalog()
+        self.clients: List[Client] = []
+        self._appointments: List[Appointment] = []
+        self._cold_appointments: Dict[str, List[dict]] = {}
+        self.schedules: List[ScheduleItem] = []
+        self._calendar = TemplateCalendar()
+        self._intervals = MasterIntervals()
+        self._free = FreeTimeIndex(self._free_intervals)
+        self._rollups = DailyRollups()
+        self._rebuild_indexes()
+        with self._lock():
+            self._load()
+
+    def _build_services(self) -> List[Service]:
+        items = [
+            Service(1, 'Стрижки', 'Женская стрижка (с мытьем и укладкой)', 60, 1500),
+            Service(2, 'Стрижки', 'Мужская стрижка (с мытьем и укладкой)', 45, 1000),
+            Service(3, 'Стрижки', 'Детская стрижка (до 10 лет)', 30, 700),
+            Service(4, 'Стрижки', 'Стрижка челки', 15, 300),
+            Service(5, 'Стрижки', 'Креативная/модельная стрижка', 75, 1800),
+            Service(6, 'Стрижки', 'Стрижка машинкой', 20, 500),
+            Service(7, 'Стрижки', 'Подравнивание кончиков', 20, 600),
+            Service(8, 'Окрашивание', 'Окрашивание в один тон', 90, 2500),
+            Service(9, 'Окрашивание', 'Тонирование', 60, 1500),
+            Service(10, 'Окрашивание', 'Мелирование (классическое, шатуш, балаяж, омбре)', 150, 4000),
+            Service(11, 'Окрашивание', 'Колорирование', 120, 3500),
+            Service(12, 'Окрашивание', 'Предпигментация / восстановление цвета', 90, 2200),
+            Service(13, 'Окрашивание', 'Смывка цвета', 60, 1500),
+            Service(14, 'Окрашивание', 'Окрашивание корней', 75, 1800),
+            Service(15, 'Окрашивание', 'AIRTOUCH', 180, 5000),
+            Service(16, 'Укладки', 'Укладка феном / брашинг', 40, 900),
+            Service(17, 'Укладки', 'Укладка на бигуди', 45, 1000),
+            Service(18, 'Укладки', 'Вечерняя / Свадебная прическа', 120, 4000),
+            Service(19, 'Укладки', 'Гламурные локоны / Голливудские волны', 60, 2000),
+            Service(20, 'Укладки', 'Плетение кос (различные техники)', 45, 1200),
+            Service(21, 'Укладки', 'Укладка с выпрямлением', 45, 1000),
+        ]
+        return items
+
+    def _build_masters(self) -> List[Master]:
+        return [Master(1,'Анна'), Master(2,'Ольга'), Master(3,'Мария'), Master(4,'Дмитрий'), Master(5,'Сергей')]
+
+    def _index_catalog(self):
+        self._services_by_id: Dict[int, Service] = {s.id: s for s in self.services}
+        self._masters_by_id: Dict[int, Master] = {m.id: m for m in self.masters}
+        self._masters_by_name: Dict[str, Master] = {}
+        for m in self.masters:
+            self._masters_by_name.setdefault(m.name, m)
+        self._services_by_name: Dict[str, Service] = {}
+        for s in self.services:
+            self._services_by_name.setdefault(s.name, s)
+
+    @property
+    def appointments(self) -> List[Appointment]:
+        """Все записи; отложенные при загрузке создаются при первом обращении"""
+        for date in list(self._cold_appointments):
+            self._materialize_day(date)
+        return self._appointments
+
+    def _load(self):
+        today = datetime.now().date()
+        hot_from = (today - timedelta(days=self.HOT_DAYS)).isoformat()
+        archive_before = ''
+        if self.archive is not None:
+            self.archive.reload()
+            archive_before = self.archive.before
+            if self.ARCHIVE_DAYS is not None:
+                archive_before = max(archive_before, (today - timedelta(days=self.ARCHIVE_DAYS)).isoformat())
+        clients, appointments, schedules = [], [], []
+        templates: Dict[int, dict] = {}
+        cold: Dict[str, List[dict]] = {}
+        to_archive: List[dict] = []
+        converted = cleared = False
+        for op, batch in self.storage.iter_load():
+            if op == 'add_appointment':
+                for a in batch:
+                    if a.keys() != _APPOINTMENT_KEYS:
+                        converted = converted or ('service_name' in a and 'service_id' not in a)
+                        a = self._migrate_appointment(a)
+                        if a is None:
+                            continue
+                    day = a['start'][:10]
+                    if day < archive_before:
+                        to_archive.append(a)
+                        continue
+                    if day >= hot_from:
+                        appointments.append(Appointment.from_dict(a))
+                        continue
+                    bucket = cold.get(day)
+                    if bucket is None:
+                        bucket = cold[day] = []
+                    bucket.append(a)
+            elif op == 'add_client':
+                clients.extend(Client(**c) for c in batch)
+            elif op == 'add_schedule':
+                schedules.extend(ScheduleItem(**s) for s in batch)
+            elif op == 'put_template':
+                templates.update((t['id'], t) for t in batch)
+            elif op == 'clear':
+                clients, appointments, schedules, cold = [], [], [], {}
+                templates, to_archive = {}, []
+                cleared = True
+        self.clients, self._appointments, self.schedules = clients, appointments, schedules
+        self._cold_appointments = cold
+        self._calendar.rebuild(ScheduleTemplate.from_dict(t) for t in templates.values())
+        if cleared and self.archive is not None:
+            # Очистка записана, а архив удалить не успели (сбой между шагами clear)
+            self.archive.clear()
+        if to_archive:
+            self.archive.add(to_archive, archive_before)
+        self._rebuild_indexes()
+        # Файл переписываем, только если что-то поменялось при миграции или
+        # переносе в архив, или журнал пора свернуть в снимок
+        if converted or to_archive or self.storage.needs_compaction():
+            self._save()
+
+    def _migrate_appointment(self, a: dict) -> Optional[dict]:
+        """Приводит запись из файла к полям Appointment; None — если запись битая"""
+        if 'service_name' in a and 'service_id' not in a:
+            match = self._services_by_name.get(a.get('service_name'))
+            if match:
+                a['service_id'] = match.id
+        if any(k not in a for k in APPOINTMENT_FIELDS):
+            return None
+        return {k: a[k] for k in APPOINTMENT_FIELDS}
+
+    def _materialize_day(self, date: str):
+        raw = self._cold_appointments.pop(date, None)
+        if not raw:
+            return
+        day_list = self._appointments_by_date.setdefault(date, [])
+        for a in raw:
+            appt = Appointment.from_dict(a)
+            self._appointments.append(appt)
+            day_list.append(appt)
+            self._intervals.add(appt.master_id, appt.start, appt.end)
+
+    def _rebuild_indexes(self):
+        self._clients_by_id: Dict[int, Client] = {}
+        self._clients_by_name: Dict[str, Client] = {}
+        self._clients_by_phone: Dict[str, Client] = {}
+        for c in self.clients:
+            self._index_client(c)
+        # Индекс поиска строится при первом поиске: это больше половины
+        # времени загрузки, а нужен он не каждому запуску
+        self._client_search: Optional[ClientSearchIndex] = None
+        self._next_client_id = max(self._clients_by_id, default=0) + 1
+        self._next_appointment_id = max(
+            max((a.id for a in self._appointments), default=0),
+            max((a['id'] for day in self._cold_appointments.values() for a in day), default=0),
+            self.archive.max_id() if self.archive is not None else 0) + 1
+        self._next_schedule_id = max((s.id for s in self.schedules), default=0) + 1
+        self._intervals.rebuild((a.master_id, a.start, a.end) for a in self._appointments)
+        self._schedule_index: Dict[Tuple[int, str], List[ScheduleItem]] = {}
+        self._schedules_by_date: Dict[str, List[ScheduleItem]] = {}
+        for s in self.schedules:
+            self._schedule_index.setdefault((s.master_id, s.date), []).append(s)
+            self._schedules_by_date.setdefault(s.date, []).append(s)
+        self._appointments_by_date: Dict[str, List[Appointment]] = {}
+        for a in self._appointments:
+            self._appointments_by_date.setdefault(a.date, []).append(a)
+        self._free.clear()
+        self._rollups.clear()
+
+    def _index_client(self, client: Client):
+        self._clients_by_id[client.id] = client
+        self._clients_by_name.setdefault(client.name, client)
+        self._clients_by_phone.setdefault(client.phone, client)
+
+    def _parse_state(self, data: dict):
+        clients = [Client(**c) for c in data.get('clients', [])]
+        loaded_appts = []
+        for a in data.get('appointments', []):
+            a = self._migrate_appointment(a)
+            if a is not None:
+                loaded_appts.append(Appointment.from_dict(a))
+        schedules = [ScheduleItem(**s) for s in data.get('schedules', [])]
+        templates = [ScheduleTemplate.from_dict(t) for t in data.get('templates', [])]
+        return clients, loaded_appts, schedules, templates
+
+    def _save(self):
+        self.storage.snapshot(self._state())
+
+    def _state(self) -> dict:
+        # Отдаём копии списков, а не словари: сериализует уже хранилище,
+        # и при фоновой записи это происходит не в потоке интерфейса
+        return {
+            'clients': list(self.clients),
+            'appointments': self._appointments + [a for day in self._cold_appointments.values() for a in day],
+            'schedules': list(self.schedules),
+            'templates': self._calendar.templates(),
+        }
+
+    def _persist(self, op: str, data: Optional[dict] = None):
+        if self._batch is not None:
+            self._batch.append((op, data))
+            return
+        if not self.storage.journaled:
+            self._snapshot(True)
+            return
+        self.storage.append(op, data)
+        self._snapshot(False)
+
+    @contextmanager
+    def batch(self, lock=None):
+        """Изменения внутри блока записываются на диск одной пачкой при выходе.
+
+        Проверки (график, пересечения) работают как обычно — по данным в памяти,
+        куда изменения попадают сразу. Вложенные batch() пишутся внешним.
+
+        lock — блокировка, под которой данные читают другие потоки (сервер).
+        Под ней идут изменения в памяти и снятие копии для снимка, а запись
+        журнала и снимка — уже без неё, так что читатели на это время могут
+        увидеть ещё не записанное. Менять данные при этом должен один поток.
+        """
+        if self._batch is not None:
+            yield
+            return
+        lock = lock if lock is not None else nullcontext()
+        ops = None
+        with self.changes.hold(), ExitStack() as exclusive:
+            try:
+                with lock:
+                    exclusive.enter_context(self._exclusive())
+                    self._batch = []
+                    try:
+                        yield
+                    finally:
+                        ops, self._batch = self._batch, None
+            finally:
+                if ops:
+                    self._commit(ops, lock)
+                    if any(op == 'clear' for op, _ in ops):
+                        with lock:
+                            self._drop_archive()
+
+    def _commit(self, ops: List[Tuple[str, Optional[dict]]], lock=None):
+        if not self.storage.journaled:
+            self._snapshot(True, lock)
+            return
+        self.storage.append_many(ops)
+        self._snapshot(False, lock)
+
+    def _snapshot(self, due: bool, lock=None):
+        """Снимок, если он нужен сразу (due) или журнал пора свернуть"""
+        if not due and not self.storage.needs_compaction():
+            return
+        if self._defer_snapshots:
+            self._snapshot_pending = True
+            return
+        with lock if lock is not None else nullcontext():
+            state = self._state()
+        self.storage.snapshot(state)
+
+    @contextmanager
+    def deferred_snapshots(self):
+        """Снимок пишется один раз при выходе из блока, а не по мере роста журнала.
+
+        Для массовых изменений из многих batch(): иначе снимок всё большего
+        размера переписывался бы снова и снова. Журнал внутри блока пишется
+        как обычно; без журнала (JsonStorage) всё попадает на диск при выходе.
+        """
+        if self._defer_snapshots:
+            yield
+            return
+        self._defer_snapshots = True
+        try:
+            yield
+        finally:
+            self._defer_snapshots = False
+            if self._snapshot_pending:
+                self._snapshot_pending = False
+                with self._exclusive():
+                    self._save()
+
+    def _drop_archive(self):
+        # Файлы архива удаляются, только когда очистка уже на диске:
+        # при сбое раньше остаются и старые данные, и их архив
+        if self.archive is not None:
+            self.storage.flush()
+            self.archive.clear()
+
+    def flush(self):
+        self.storage.flush()
+
+    def close(self):
+        with self._exclusive():
+            if self.storage.needs_compaction():
+                self._save()
+        self.storage.close()
+
+    @property
+    def shared(self) -> bool:
+        """Данные могут менять другие процессы: их изменения подтягивает refresh()"""
+        return self.storage.shared
+
+    def _lock(self):
+        return self.storage.lock if self.storage.shared else nullcontext()
+
+    @contextmanager
+    def _exclusive(self):
+        """В общем каталоге держит блокировку и сначала подтягивает чужие изменения"""
+        with self._lock():
+            if self.storage.shared:
+                self._pull_changes()
+            yield
+
+    def refresh(self) -> bool:
+        """Подтягивает изменения других процессов; True — если они были"""
+        if not self.storage.shared:
+            return False
+        with self.changes.hold(), self._lock():
+            return self._pull_changes()
+
+    def _pull_changes(self) -> bool:
+        changes = self.storage.read_changes()
+        if changes is None:
+            self._load()
+            self.changes.publish(Reloaded())
+            return True
+        for op, records in changes:
+            self._apply_changes(op, records)
+        return bool(changes)
+
+    def _apply_changes(self, op: str, records: List[dict]):
+        """Операция, записанная другим процессом, применяется к данным в памяти"""
+        if op == 'clear':
+            self.clients, self._appointments, self.schedules = [], [], []
+            self._cold_appointments = {}
+            if self.archive is not None:
+                self.archive.forget()
+            self._calendar.rebuild(())
+            self._rebuild_indexes()
+            self.changes.publish(Cleared())
+        elif op == 'add_client':
+            for c in records:
+                client = Client(**c)
+                self.clients.append(client)
+                self._index_client(client)
+                if self._client_search is not None:
+                    self._client_search.add(client)
+                self._next_client_id = max(self._next_client_id, client.id + 1)
+                self.changes.publish(ClientAdded(client))
+        elif op == 'add_schedule':
+            for s in records:
+                sched = ScheduleItem(**s)
+                self.schedules.append(sched)
+                self._schedule_index.setdefault((sched.master_id, sched.date), []).append(sched)
+                self._schedules_by_date.setdefault(sched.date, []).append(sched)
+                self._next_schedule_id = max(self._next_schedule_id, sched.id + 1)
+                self._free.invalidate(sched.master_id, sched.date)
+                self._rollups.schedule_changed(sched.date)
+                self.changes.publish(ScheduleAdded(sched))
+        elif op == 'put_template':
+            for t in records:
+                template = ScheduleTemplate.from_dict(t)
+                self._calendar.put(template)
+                self.changes.publish(TemplateChanged(template))
+            self._free.clear()
+            self._rollups.schedule_changed()
+        elif op == 'add_appointment':
+            for a in records:
+                appt = Appointment.from_dict(a)
+                self._materialize_day(appt.date)
+                self._appointments.append(appt)
+                self._appointments_by_date.setdefault(appt.date, []).append(appt)
+                self._intervals.add(appt.master_id, appt.start, appt.end)
+                self._next_appointment_id = max(self._next_appointment_id, appt.id + 1)
+                self._free.invalidate(appt.master_id, appt.date)
+                service = self._services_by_id.get(appt.service_id)
+                self._rollups.booked(appt.master_id, appt.start, appt.end, service.price if service else 0.0)
+                self.changes.publish(AppointmentAdded(appt))
+
+    @_write_op
+    def clear(self):
+        self.clients = []
+        self._appointments = []
+        self._cold_appointments = {}
+        self.schedules = []
+        self._calendar.rebuild(())
+        if self.archive is not None:
+            self.archive.forget()
+        self._rebuild_indexes()
+        self._persist('clear')
+        if self._batch is None:
+            self._drop_archive()
+        self.changes.publish(Cleared())
+
+    @_write_op
+    def add_client(self, name: str, phone: str, email: str) -> Client:
+        if not name.strip() or not phone.strip() or not email.strip():
+            raise ValueError('Все поля клиента обязательны')
+        client = self._insert_client(name.strip(), phone.strip(), email.strip())
+        self.changes.publish(ClientAdded(client))
+        return client
+
+    def _insert_client(self, name: str, phone: str, email: str) -> Client:
+        client = Client(self._next_client_id, name, phone, email)
+        self._next_client_id += 1
+        self.clients.append(client)
+        self._index_client(client)
+        if self._client_search is not None:
+            self._client_search.add(client)
+        self._persist('add_client', to_dict(client))
+        return client
+
+    def find_client_by_name(self, name: str) -> Optional[Client]:
+        return self._clients_by_name.get(name)
+
+    def search_clients(self, query: str, limit: int = 10) -> List[Client]:
+        """Клиенты по началу имени/фамилии, цифрам телефона или с одной опечаткой"""
+        if self._client_search is None:
+            self._client_search = ClientSearchIndex(self.clients)
+        return self._client_search.search(query, limit)
+
+    def find_client_by_phone(self, phone: str) -> Optional[Client]:
+        return self._clients_by_phone.get(phone)
+
+    def get_client(self, client_id: int) -> Optional[Client]:
+        return self._clients_by_id.get(client_id)
+
+    def find_master_by_name(self, name: str) -> Optional[Master]:
+        return self._masters_by_name.get(name)
+
+    def get_master(self, master_id: int) -> Optional[Master]:
+        return self._masters_by_id.get(master_id)
+
+    def get_service(self, service_id: int) -> Optional[Service]:
+        return self._services_by_id.get(service_id)
+
+    def find_service_by_name(self, name: str) -> Optional[Service]:
+        return self._services_by_name.get(name)
+
+    @_write_op
+    def add_schedule(self, master_id: int, date: str, start_time: str, end_time: str) -> ScheduleItem:
+        st = datetime.strptime(f"{date} {start_time}", '%Y-%m-%d %H:%M')
+        en = datetime.strptime(f"{date} {end_time}", '%Y-%m-%d %H:%M')
+        if en <= st:
+            raise ValueError('Время окончания должно быть позже времени начала')
+        sched = self._insert_schedule(master_id, date, start_time, end_time)
+        self._free.invalidate(master_id, date)
+        self._rollups.schedule_changed(date)
+        self.changes.publish(ScheduleAdded(sched))
+        return sched
+
+    def _insert_schedule(self, master_id: int, date: str, start_time: str, end_time: str) -> ScheduleItem:
+        sched = ScheduleItem(self._next_schedule_id, master_id, date, start_time, end_time)
+        self._next_schedule_id += 1
+        self.schedules.append(sched)
+        self._schedule_index.setdefault((master_id, date), []).append(sched)
+        self._schedules_by_date.setdefault(date, []).append(sched)
+        self._persist('add_schedule', to_dict(sched))
+        return sched
+
+    @property
+    def templates(self) -> List[ScheduleTemplate]:
+        return self._template_calendar().templates()
+
+    def _template_calendar(self) -> TemplateCalendar:
+        return self._calendar
+
+    @_write_op
+    def add_schedule_template(self, master_id: int, weekdays, start_time: str, end_time: str,
+                              date_from: str, date_to: Optional[str] = None) -> ScheduleTemplate:
+        """Повторяющийся график: часы start_time-end_time по дням weekdays (0 — понедельник)"""
+        weekdays = tuple(sorted(set(weekdays)))
+        if not weekdays or any(not 0 <= d <= 6 for d in weekdays):
+            raise ValueError('Выберите дни недели')
+        st = datetime.strptime(f"{date_from} {start_time}", '%Y-%m-%d %H:%M')
+        en = datetime.strptime(f"{date_from} {end_time}", '%Y-%m-%d %H:%M')
+        if en <= st:
+            raise ValueError('Время окончания должно быть позже времени начала')
+        if date_to:
+            if datetime.strptime(date_to, '%Y-%m-%d').date() < st.date():
+                raise ValueError('Дата окончания раньше даты начала')
+        else:
+            date_to = None
+        calendar = self._template_calendar()
+        next_id = max((t.id for t in calendar.templates()), default=0) + 1
+        template = ScheduleTemplate(next_id, master_id, weekdays, start_time, end_time, date_from, date_to)
+        self._put_template(template)
+        self.changes.publish(TemplateChanged(template))
+        return template
+
+    @_write_op
+    def skip_template_day(self, template_id: int, date: str) -> ScheduleTemplate:
+        """Выходной в день, когда мастер по правилу работает"""
+        template = self._get_template(template_id)
+        datetime.strptime(date, '%Y-%m-%d')
+        template = replace(template, skip_dates=tuple(sorted({*template.skip_dates, date})),
+                           overrides=tuple(o for o in template.overrides if o[0] != date))
+        self._put_template(template)
+        self.changes.publish(TemplateChanged(template, date))
+        return template
+
+    @_write_op
+    def override_template_day(self, template_id: int, date: str, start_time: str, end_time: str) -> ScheduleTemplate:
+        """Другие часы в этот день (в том числе в день, которого нет в правиле)"""
+        template = self._get_template(template_id)
+        st = datetime.strptime(f"{date} {start_time}", '%Y-%m-%d %H:%M')
+        en = datetime.strptime(f"{date} {end_time}", '%Y-%m-%d %H:%M')
+        if en <= st:
+            raise ValueError('Время окончания должно быть позже времени начала')
+        overrides = [o for o in template.overrides if o[0] != date] + [(date, start_time, end_time)]
+        template = replace(template, skip_dates=tuple(d for d in template.skip_dates if d != date),
+                           overrides=tuple(sorted(overrides)))
+        self._put_template(template)
+        self.changes.publish(TemplateChanged(template, date))
+        return template
+
+    def _get_template(self, template_id: int) -> ScheduleTemplate:
+        template = self._template_calendar().get(template_id)
+        if template is None:
+            raise ValueError('Шаблон графика не найден')
+        return template
+
+    def _put_template(self, template: ScheduleTemplate):
+        self._calendar.put(template)
+        # Правило затрагивает неизвестно сколько дней
+        self._free.clear()
+        self._rollups.schedule_changed()
+        self._persist('put_template', to_dict(template))
+
+    def get_schedules_for(self, master_id: int, date: str) -> List[ScheduleItem]:
+        return [*self._schedule_index.get((master_id, date), ()),
+                *self._template_calendar().items_for(master_id, date)]
+
+    def schedules_on(self, date: str) -> List[ScheduleItem]:
+        return [*self._schedules_by_date.get(date, ()), *self._template_calendar().items_on(date)]
+
+    def _archived(self, date: str) -> bool:
+        return self.archive is not None and date < self.archive.before
+
+    def appointments_on(self, date: str) -> List[Appointment]:
+        if self._archived(date):
+            return sorted((Appointment.from_dict(a) for a in self.archive.records_on(date)), key=lambda a: a.start)
+        self._materialize_day(date)
+        return sorted(self._appointments_by_date.get(date, ()), key=lambda a: a.start)
+
+    def client_history(self, client_id: int) -> List[Appointment]:
+        """Все записи клиента, включая архив, по времени"""
+        found = [a for a in self.appointments if a.client_id == client_id]
+        if self.archive is not None:
+            found.extend(Appointment.from_dict(a) for a in self.archive.iter_range() if a['client_id'] == client_id)
+        return sorted(found, key=lambda a: a.start)
+
+    def history_table(self, first=None, last=None) -> AppointmentTable:
+        """Записи столбцами, все или за даты first..last; отложенные дни читаются прямо из словарей"""
+        if first is None:
+            hot = self._appointments
+            cold = self._cold_appointments.values()
+        else:
+            # Записи и так разложены по дням: берём только нужные
+            days = [d.isoformat() for d in _date_range(as_date(first), as_date(last))]
+            hot = [a for d in days for a in self._appointments_by_date.get(d, ())]
+            cold = [self._cold_appointments[d] for d in days if d in self._cold_appointments]
+        rows = [(a.id, a.client_id, a.master_id, a.service_id, a.start, a.end) for a in hot]
+        if self.archive is not None:
+            cold = [*cold, self.archive.iter_range(first and as_date(first).isoformat(),
+                                                   last and as_date(last).isoformat())]
+        for day in cold:
+            rows.extend((a['id'], a['client_id'], a['master_id'], a['service_id'],
+                         iso_to_minutes(a['start']), iso_to_minutes(a['end'])) for a in day)
+        return AppointmentTable.from_rows(rows)
+
+    def period_report(self, first, last) -> PeriodReport:
+        """Загрузка мастеров, выручка и часы пик за даты first..last включительно"""
+        return period_report(self, self._rollup_cache(), as_date(first), as_date(last))
+
+    def _rollup_cache(self) -> DailyRollups:
+        return self._rollups
+
+    def dates_with_records(self) -> List[str]:
+        archived = self.archive.days() if self.archive is not None else ()
+        return sorted(self._schedules_by_date.keys() | self._appointments_by_date.keys()
+                      | self._cold_appointments.keys() | set(archived))
+
+    @staticmethod
+    def _schedule_bounds(s: ScheduleItem) -> Tuple[datetime, datetime]:
+        # Строки графика проверены в add_schedule, поэтому обходимся без strptime:
+        # он здесь самое дорогое место каждой записи
+        day = datetime.fromisoformat(s.date)
+        return day + _clock(s.start_time), day + _clock(s.end_time)
+
+    @_write_op
+    def add_appointment(self, client_id: int, master_id: int, service_id: int, start_dt: datetime) -> Appointment:
+        service, end_dt = self._check_booking(master_id, service_id, start_dt)
+        appt = self._insert_appointment(client_id, master_id, service_id, start_dt, end_dt)
+        self._free.booked(master_id, start_dt.strftime('%Y-%m-%d'), start_dt, end_dt)
+        self._rollups.booked(master_id, appt.start, appt.end, service.price)
+        self.changes.publish(AppointmentAdded(appt))
+        return appt
+
+    def _check_booking(self, master_id: int, service_id: int, start_dt: datetime) -> Tuple[Service, datetime]:
+        """Проверки add_appointment без самой записи: ValueError, если записаться нельзя"""
+        service = self._services_by_id.get(service_id)
+        if not service:
+            raise ValueError('Услуга не найдена')
+        end_dt = start_dt + timedelta(minutes=service.duration_min)
+        date = start_dt.strftime('%Y-%m-%d')
+        if self._archived(date):
+            raise ValueError('Эта дата уже в архиве, запись на неё невозможна')
+        schedules = self.get_schedules_for(master_id, date)
+        if not schedules:
+            raise ValueError('Мастер не принимает в этот день')
+        fits = False
+        for s in schedules:
+            s_start, s_end = self._schedule_bounds(s)
+            if start_dt >= s_start and end_dt <= s_end:
+                fits = True
+                break
+        if not fits:
+            raise ValueError('Запись не помещается в рабочий график мастера')
+        if self._has_conflict(master_id, start_dt, end_dt):
+            raise ValueError('Время уже занято')
+        return service, end_dt
+
+    def _has_conflict(self, master_id: int, start_dt: datetime, end_dt: datetime) -> bool:
+        self._materialize_day(start_dt.strftime('%Y-%m-%d'))
+        return self._intervals.overlaps(master_id, to_minutes(start_dt), to_minutes(end_dt))
+
+    def _busy_intervals(self, master_id: int, lo: datetime, hi: datetime) -> list:
+        self._materialize_day(lo.strftime('%Y-%m-%d'))
+        return [(from_minutes(s), from_minutes(e))
+                for s, e in self._intervals.between(master_id, to_minutes(lo), to_minutes(hi))]
+
+    def _free_intervals(self, master_id: int, date: str) -> list:
+        free = []
+        for s in self.get_schedules_for(master_id, date):
+            window = [self._schedule_bounds(s)]
+            for b_start, b_end in self._busy_intervals(master_id, *window[0]):
+                window = subtract(window, b_start, b_end)
+            free.extend(window)
+        free.sort()
+        return free
+
+    def free_intervals(self, master_id: int, date: str) -> List[Tuple[datetime, datetime]]:
+        """Свободные промежутки мастера в этот день: график за вычетом записей"""
+        if self._archived(date):
+            return []
+        return list(self._free.get(master_id, date))
+
+    def find_free_slots(self, service_id: int, date_range, master_ids: Optional[List[int]] = None,
+                        granularity: int = 15, limit: int = 10,
+                        not_before: Optional[datetime] = None) -> List[FreeSlot]:
+        """Ближайшие времена, на которые можно записаться на услугу.
+
+        date_range — пара дат (строки 'YYYY-MM-DD' или date) включительно.
+        Результат отсортирован по времени начала, затем по мастеру.
+        """
+        duration = self.get_service_duration(service_id)
+        if not duration:
+            raise ValueError('Услуга не найдена')
+        need = timedelta(minutes=duration)
+        step = timedelta(minutes=granularity)
+        masters = master_ids or [m.id for m in self.masters]
+        day, last_day = as_date(date_range[0]), as_date(date_range[1])
+        found: List[FreeSlot] = []
+        while day <= last_day and len(found) < limit:
+            candidates = set()
+            # В архивные дни не записывают: там только прошлое
+            for master_id in masters if not self._archived(day.isoformat()) else ():
+                for free_start, free_end in self._free.get(master_id, day.isoformat()):
+                    if not_before is not None and not_before > free_start:
+                        free_start = not_before
+                    start = align(free_start, granularity)
+                    while start + need <= free_end:
+                        candidates.add((start, master_id))
+                        start += step
+            found.extend(FreeSlot(start, start + need, master_id) for start, master_id in sorted(candidates))
+            day += timedelta(days=1)
+        return found[:limit]
+
+    def _insert_appointment(self, client_id: int, master_id: int, service_id: int,
+                            start_dt: datetime, end_dt: datetime) -> Appointment:
+        appt = Appointment(self._next_appointment_id, client_id, master_id, service_id,
+                           to_minutes(start_dt), to_minutes(end_dt))
+        self._next_appointment_id += 1
+        self._appointments.append(appt)
+        self._appointments_by_date.setdefault(start_dt.strftime('%Y-%m-%d'), []).append(appt)
+        self._intervals.add(master_id, appt.start, appt.end)
+        self._persist('add_appointment', appt.to_dict())
+        return appt
+
+    def get_client_name(self, client_id: int) -> str:
+        client = self._clients_by_id.get(client_id)
+        return client.name if client else "Неизвестный клиент"
+
+    def get_master_name(self, master_id: int) -> str:
+        master = self._masters_by_id.get(master_id)
+        return master.name if master else "Неизвестный мастер"
+
+    def get_service_name(self, service_id: int) -> str:
+        service = self._services_by_id.get(service_id)
+        return service.name if service else "Неизвестная услуга"
+    
+    def get_service_duration(self, service_id: int) -> int:
+        service = self._services_by_id.get(service_id)
         return service.duration_min if service else 0
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""Поиск клиента по мере набора: по началу имени или фамилии, по цифрам телефона
+и с допуском одной опечатки в слове.
+
+Имена хранятся отсортированным списком нормализованных ключей, так что
+поиск по префиксу — это бинарный поиск и короткий проход вперёд. Телефоны
+ищутся так же: с начала номера, с начала номера без кода и по последним
+цифрам. Для опечаток используется словарь «слово без одной буквы ->
+клиенты»: два слова на расстоянии одной правки обязательно дают общий
+такой вариант.
+"""
+import heapq
+import re
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, Iterator, List, Set, Tuple
+
+from models.entities import Client
+
+_NON_DIGIT = re.compile(r'\D')
+_PHONE_QUERY = re.compile(r'[\d\s+()\-]+')
+FUZZY_MIN_LENGTH = 4
+
+
+def normalize(text: str) -> str:
+    return ' '.join(text.lower().replace('ё', 'е').split())
+
+
+def phone_digits(phone: str) -> str:
+    """Цифры номера без кода страны: '+7 (900) 123-45-67' и '89001234567' дают '9001234567'"""
+    digits = _NON_DIGIT.sub('', phone)
+    if len(digits) == 11 and digits[0] in '78':
+        digits = digits[1:]
+    return digits
+
+
+def _deletes(word: str) -> Iterator[str]:
+    yield word
+    for i in range(len(word)):
+        yield word[:i] + word[i + 1:]
+
+
+def _prefix_range(items: list, prefix: str) -> Iterator[tuple]:
+    i = bisect_left(items, (prefix,))
+    while i < len(items) and items[i][0].startswith(prefix):
+        yield items[i]
+        i += 1
+
+
+class ClientSearchIndex:
+    def __init__(self, clients=()):
+        self.rebuild(clients)
+
+    def __len__(self):
+        return len(self._clients)
+
+    def rebuild(self, clients):
+        self._clients: Dict[int, Client] = {}
+        self._words: Dict[int, List[str]] = {}
+        # (ключ, id): имена целиком и отдельно «хвосты» имени со второго слова,
+        # чтобы находить и по фамилии, но ставить выше совпадения с начала имени
+        self._names: List[Tuple[str, int]] = []
+        self._name_tails: List[Tuple[str, int]] = []
+        self._phones: List[Tuple[str, int]] = []
+        # Перевёрнутые номера — для поиска по последним цифрам
+        self._phone_tails: List[Tuple[str, int]] = []
+        self._typos: Dict[str, Set[int]] = {}
+        self._similar_cache: Dict[str, Set[int]] = {}
+        for c in clients:
+            self._index(c, list.append)
+        for items in (self._names, self._name_tails, self._phones, self._phone_tails):
+            items.sort()
+
+    def add(self, client: Client):
+        self._index(client, insort)
+
+    def _index(self, client: Client, put):
+        words = normalize(client.name).split(' ')
+        self._clients[client.id] = client
+        self._words[client.id] = words
+        put(self._names, (' '.join(words), client.id))
+        for i in range(1, len(words)):
+            put(self._name_tails, (' '.join(words[i:]), client.id))
+        digits = phone_digits(client.phone)
+        put(self._phones, (digits, client.id))
+        if len(digits) == 10:
+            # Номер без кода города/оператора — его часто и диктуют
+            put(self._phones, (digits[3:], client.id))
+        put(self._phone_tails, (digits[::-1], client.id))
+        for word in words:
+            if len(word) >= FUZZY_MIN_LENGTH:
+                for variant in _deletes(word):
+                    self._typos.setdefault(variant, set()).add(client.id)
+        self._similar_cache.clear()
+
+    def search(self, query: str, limit: int = 10) -> List[Client]:
+        """До limit клиентов: сначала совпадения по началу имени, затем с опечаткой"""
+        text = query.strip()
+        if not text:
+            return []
+        if _PHONE_QUERY.fullmatch(text):
+            ids = self._search_phone(_NON_DIGIT.sub('', text), limit)
+        else:
+            query = normalize(text)
+            ids = self._search_prefix(query, limit)
+            if len(ids) < limit:
+                ids = list(dict.fromkeys(ids + self._search_typos(query, limit)))
+        return [self._clients[i] for i in ids[:limit]]
+
+    def _search_prefix(self, prefix: str, limit: int) -> List[int]:
+        ids = [i for _, i in islice(_prefix_range(self._names, prefix), limit)]
+        if len(ids) < limit:
+            ids.extend(i for _, i in islice(_prefix_range(self._name_tails, prefix), limit))
+        return list(dict.fromkeys(ids))
+
+    def _search_phone(self, digits: str, limit: int) -> List[int]:
+        if not digits:
+            return []
+        if digits[0] in '78' and len(digits) > 1 and next(_prefix_range(self._phones, digits), None) is None:
+            # Номер начали набирать с кода страны
+            digits = digits[1:]
+        ids = [i for _, i in islice(_prefix_range(self._phones, digits), limit)]
+        if len(ids) < limit:
+            ids.extend(i for _, i in islice(_prefix_range(self._phone_tails, digits[::-1]), limit))
+        return list(dict.fromkeys(ids))
+
+    def _word_prefix(self, prefix: str) -> Set[int]:
+        """Клиенты, у которых какое-то слово имени начинается с prefix"""
+        ids = {i for _, i in _prefix_range(self._names, prefix)}
+        ids.update(i for _, i in _prefix_range(self._name_tails, prefix))
+        return ids
+
+    def _similar(self, word: str) -> Set[int]:
+        # При наборе одни и те же законченные слова ищутся на каждом нажатии
+        ids = self._similar_cache.get(word)
+        if ids is None:
+            ids = set()
+            for variant in _deletes(word):
+                ids |= self._typos.get(variant, set())
+            if len(self._similar_cache) >= 256:
+                self._similar_cache.clear()
+            self._similar_cache[word] = ids
+        return ids
+
+    def _search_typos(self, query: str, limit: int) -> List[int]:
+        *complete, last = query.split(' ')
+        sets = [self._similar(w) for w in complete if len(w) >= FUZZY_MIN_LENGTH]
+        if not sets:
+            if len(last) < FUZZY_MIN_LENGTH:
+                return []
+            sets, last = [self._similar(last)], ''
+        matched = min(sets, key=len).intersection(*sets)
+        # Последнее слово может быть недобрано — ему хватает совпадения по началу
+        similar_last = self._similar(last) if len(last) >= FUZZY_MIN_LENGTH else set()
+        if len(last) >= 3 and len(matched) > 500:
+            # Редкое начало слова: пересечь множества дешевле, чем перебрать кандидатов
+            matched &= self._word_prefix(last) | similar_last
+            last = ''
+        found = (i for i in matched
+                 if not last or i in similar_last or any(w.startswith(last) for w in self._words[i]))
+        # Первые по имени, а не первые в порядке обхода множества: он зависит от хешей
+        return heapq.nsmallest(limit, found, key=lambda i: (self._clients[i].name, i))
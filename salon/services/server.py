@@ -0,0 +1,362 @@
+"""HTTP/JSON доступ к SalonData без окна программы.
+
+Запросы принимает ThreadingHTTPServer, по потоку на соединение. Чтение
+идёт прямо из индексов в памяти. Все изменения передаются одному потоку
+записи: он забирает из очереди всё, что накопилось, применяет внутри
+SalonData.batch() и отвечает каждому запросу после записи пачки на диск.
+
+SalonData не рассчитан на одновременный доступ из нескольких потоков,
+а чтение старого дня тоже меняет внутренние словари (день превращается
+в объекты при первом обращении), поэтому обращения к данным идут под
+общей блокировкой. Она держится микросекунды: разбор HTTP и JSON, запись
+журнала и снимка на диск идут вне её (поток записи берёт её только на
+изменения в памяти и на копию списков для снимка). Чтение между ними
+может увидеть запись, которая ещё не на диске, — ответ на сам запрос
+записи всё равно уходит только после неё. С SQLite соединение общее,
+и фиксация транзакции идёт под блокировкой.
+
+    GET  /masters, /services
+    GET  /clients?q=Ива&limit=10        GET /clients/<id>       POST /clients
+    GET  /clients/<id>/appointments     (вся история, включая архив)
+    GET  /schedules?date=2024-03-01[&master_id=1]               POST /schedules
+    GET  /appointments?date=2024-03-01                           POST /appointments
+    GET  /free-slots?service_id=1&from=2024-03-01[&to=...&master_id=...&limit=...]
+    GET  /metrics
+"""
+import json
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from models.entities import to_dict
+from services.salon_data import SalonData
+
+DEFAULT_PORT = 8765
+MAX_BATCH = 64
+LATENCY_SAMPLES = 10000
+
+
+class NotFound(Exception):
+    pass
+
+
+class LatencyStats:
+    """Последние LATENCY_SAMPLES замеров по каждому маршруту"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, list] = {}
+
+    def record(self, route: str, seconds: float, ok: bool):
+        with self._lock:
+            samples = self._samples.get(route)
+            if samples is None:
+                samples = self._samples[route] = deque(maxlen=LATENCY_SAMPLES)
+                self._counts[route] = [0, 0]
+            samples.append(seconds)
+            self._counts[route][0] += 1
+            if not ok:
+                self._counts[route][1] += 1
+
+    def report(self) -> dict:
+        with self._lock:
+            snapshot = {route: (sorted(s), list(self._counts[route])) for route, s in self._samples.items()}
+        result = {}
+        for route, (values, (count, errors)) in snapshot.items():
+            def pct(q):
+                return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 3)
+            result[route] = {'count': count, 'errors': errors, 'p50_ms': pct(0.5), 'p90_ms': pct(0.9),
+                             'p99_ms': pct(0.99), 'max_ms': round(values[-1] * 1000, 3)}
+        return result
+
+
+class _Writer(threading.Thread):
+    """Единственный поток, который меняет данные. Накопившиеся запросы пишет одной пачкой"""
+
+    def __init__(self, data: SalonData, lock: threading.RLock):
+        super().__init__(name='salon-api-writer', daemon=True)
+        self.data = data
+        self.lock = lock
+        self.queue = queue.Queue()
+
+    def submit(self, func: Callable, *args):
+        item = {'func': func, 'args': args, 'done': threading.Event()}
+        self.queue.put(item)
+        item['done'].wait()
+        if 'error' in item:
+            raise item['error']
+        return item['result']
+
+    def stop(self):
+        self.queue.put(None)
+        self.join()
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            items = [item]
+            while len(items) < MAX_BATCH:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.put(None)
+                    break
+                items.append(item)
+            try:
+                # Под блокировкой API только изменения в памяти: запись
+                # журнала на диск не задерживает чтение
+                with self.data.batch(self.lock):
+                    for item in items:
+                        try:
+                            item['result'] = item['func'](*item['args'])
+                        except Exception as e:
+                            item['error'] = e
+            except Exception as e:
+                # Пачка не записалась — подтверждать из неё нечего
+                for item in items:
+                    item.setdefault('error', e)
+            for item in items:
+                item['done'].set()
+
+
+def _int(params: dict, name: str, default: Optional[int] = None) -> int:
+    value = params.get(name)
+    if value is None:
+        if default is None:
+            raise ValueError(f'Не указан параметр {name}')
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Параметр {name} должен быть числом') from None
+
+
+def _date(params: dict, name: str) -> str:
+    value = params.get(name)
+    if not value:
+        raise ValueError(f'Не указан параметр {name}')
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'Неверная дата: {value}') from None
+    return value
+
+
+def _slot(slot) -> dict:
+    return {'start': slot.start.isoformat(), 'end': slot.end.isoformat(), 'master_id': slot.master_id}
+
+
+class SalonAPI:
+    """Маршруты API поверх SalonData; не зависит от HTTP и проверяется напрямую"""
+
+    def __init__(self, data: SalonData):
+        self.data = data
+        self.lock = threading.RLock()
+        self.writer = _Writer(data, self.lock)
+        self.metrics = LatencyStats()
+        self.routes = [
+            ('GET', re.compile(r'/masters'), self.masters),
+            ('GET', re.compile(r'/services'), self.services),
+            ('GET', re.compile(r'/clients'), self.clients),
+            ('GET', re.compile(r'/clients/(\d+)'), self.client),
+            ('GET', re.compile(r'/clients/(\d+)/appointments'), self.client_appointments),
+            ('POST', re.compile(r'/clients'), self.add_client),
+            ('GET', re.compile(r'/schedules'), self.schedules),
+            ('POST', re.compile(r'/schedules'), self.add_schedule),
+            ('GET', re.compile(r'/appointments'), self.appointments),
+            ('POST', re.compile(r'/appointments'), self.add_appointment),
+            ('GET', re.compile(r'/free-slots'), self.free_slots),
+            ('GET', re.compile(r'/metrics'), self.metrics_report),
+        ]
+
+    def start(self):
+        self.writer.start()
+
+    def stop(self):
+        self.writer.stop()
+
+    def handle(self, method: str, path: str, params: dict, body: Optional[dict]) -> Tuple[int, object]:
+        """(HTTP-код, ответ) и замер времени по шаблону маршрута"""
+        t0 = time.perf_counter()
+        route = f'{method} ?'
+        status = 500
+        try:
+            for route_method, pattern, func in self.routes:
+                match = pattern.fullmatch(path)
+                if match and route_method == method:
+                    route = f'{method} {pattern.pattern}'
+                    result = func(params, body, *match.groups())
+                    status = 201 if method == 'POST' else 200
+                    return status, result
+            status = 404
+            return status, {'error': 'Нет такого адреса'}
+        except NotFound as e:
+            status = 404
+            return status, {'error': str(e)}
+        except (ValueError, KeyError, TypeError) as e:
+            status = 400
+            return status, {'error': str(e) if isinstance(e, ValueError) else f'Неверный запрос: {e}'}
+        except Exception as e:
+            status = 500
+            return status, {'error': f'Ошибка сервера: {e}'}
+        finally:
+            if route != 'GET /metrics':
+                self.metrics.record(route, time.perf_counter() - t0, status < 500)
+
+    def masters(self, params, body):
+        return [to_dict(m) for m in self.data.masters]
+
+    def services(self, params, body):
+        return [to_dict(s) for s in self.data.services]
+
+    def clients(self, params, body):
+        limit = _int(params, 'limit', 20)
+        with self.lock:
+            if params.get('q'):
+                found = self.data.search_clients(params['q'], limit)
+            else:
+                found = self.data.clients[:limit]
+            return [to_dict(c) for c in found]
+
+    def client(self, params, body, client_id):
+        with self.lock:
+            client = self.data.get_client(int(client_id))
+        if not client:
+            raise NotFound('Клиент не найден')
+        return to_dict(client)
+
+    def client_appointments(self, params, body, client_id):
+        with self.lock:
+            if not self.data.get_client(int(client_id)):
+                raise NotFound('Клиент не найден')
+            return [a.to_dict() for a in self.data.client_history(int(client_id))]
+
+    def add_client(self, params, body):
+        client = self.writer.submit(self.data.add_client, body['name'], body['phone'], body['email'])
+        return to_dict(client)
+
+    def schedules(self, params, body):
+        day = _date(params, 'date')
+        with self.lock:
+            if 'master_id' in params:
+                items = self.data.get_schedules_for(_int(params, 'master_id'), day)
+            else:
+                items = self.data.schedules_on(day)
+            return [to_dict(s) for s in items]
+
+    def add_schedule(self, params, body):
+        sched = self.writer.submit(self.data.add_schedule, int(body['master_id']), body['date'],
+                                   body['start_time'], body['end_time'])
+        return to_dict(sched)
+
+    def appointments(self, params, body):
+        day = _date(params, 'date')
+        with self.lock:
+            return [a.to_dict() for a in self.data.appointments_on(day)]
+
+    def add_appointment(self, params, body):
+        try:
+            start_dt = datetime.fromisoformat(body['start'])
+        except (TypeError, ValueError):
+            raise ValueError(f'Неверное время начала: {body.get("start")}') from None
+        appt = self.writer.submit(self.data.add_appointment, int(body['client_id']), int(body['master_id']),
+                                  int(body['service_id']), start_dt)
+        return appt.to_dict()
+
+    def free_slots(self, params, body):
+        first = _date(params, 'from')
+        last = _date(params, 'to') if 'to' in params else \
+            (datetime.strptime(first, '%Y-%m-%d') + timedelta(days=13)).strftime('%Y-%m-%d')
+        master_ids = [_int(params, 'master_id')] if 'master_id' in params else None
+        with self.lock:
+            slots = self.data.find_free_slots(_int(params, 'service_id'), (first, last), master_ids=master_ids,
+                                              limit=_int(params, 'limit', 10))
+        return [_slot(s) for s in slots]
+
+    def metrics_report(self, params, body):
+        return self.metrics.report()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело уходят двумя записями; с алгоритмом Нейгла на
+    # keep-alive соединении второй кусок ждёт задержанного ACK ~40 мс
+    disable_nagle_algorithm = True
+    api: SalonAPI = None
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        body = None
+        if method == 'POST':
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self._reply(400, {'error': 'Тело запроса должно быть JSON'})
+                return
+            if not isinstance(body, dict):
+                self._reply(400, {'error': 'Тело запроса должно быть объектом JSON'})
+                return
+        status, result = self.api.handle(method, url.path.rstrip('/') or '/', params, body)
+        self._reply(status, result)
+
+    def _reply(self, status: int, result):
+        payload = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Журнал запросов в консоль на каждый запрос замедляет сервер; есть /metrics
+        pass
+
+
+def make_server(data: SalonData, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Сервер с запущенным потоком записи; остановка — stop_server"""
+    api = SalonAPI(data)
+    handler = type('SalonHandler', (_Handler,), {'api': api})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.api = api
+    api.start()
+    return server
+
+
+def stop_server(server: ThreadingHTTPServer):
+    server.shutdown()
+    server.server_close()
+    server.api.stop()
+
+
+def serve(data: SalonData, host: str = '127.0.0.1', port: int = DEFAULT_PORT):
+    server = make_server(data, host, port)
+    print(f'Salon API: http://{host}:{server.server_address[1]}/ (Ctrl+C — остановить)')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_server(server)
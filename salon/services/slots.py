@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Tuple, Union
+
+from services import perf
+
+
+@dataclass
+class FreeSlot:
+    start: datetime
+    end: datetime
+    master_id: int
+
+
+Interval = Tuple[datetime, datetime]
+
+
+def as_date(value: Union[str, date, datetime]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def subtract(intervals: List[Interval], start: datetime, end: datetime) -> List[Interval]:
+    """Вычитает [start, end) из списка свободных интервалов"""
+    result = []
+    for free_start, free_end in intervals:
+        if end <= free_start or start >= free_end:
+            result.append((free_start, free_end))
+            continue
+        if free_start < start:
+            result.append((free_start, start))
+        if end < free_end:
+            result.append((end, free_end))
+    return result
+
+
+def align(dt: datetime, granularity: int) -> datetime:
+    """Округляет время вверх до шага сетки от полуночи"""
+    midnight = datetime(dt.year, dt.month, dt.day)
+    minutes = (dt - midnight).total_seconds() / 60
+    steps = -(-minutes // granularity)
+    return midnight + timedelta(minutes=steps * granularity)
+
+
+class FreeTimeIndex:
+    """Свободные интервалы мастера по дням.
+
+    Список для пары (мастер, дата) строится один раз при первом запросе,
+    а дальше поддерживается на месте: новая запись вычитается из него,
+    новый график сбрасывает только свой день.
+    """
+
+    def __init__(self, compute: Callable[[int, str], List[Interval]]):
+        self._compute = compute
+        self._cache: Dict[Tuple[int, str], List[Interval]] = {}
+
+    def clear(self):
+        self._cache = {}
+
+    def get(self, master_id: int, day: str) -> List[Interval]:
+        key = (master_id, day)
+        free = self._cache.get(key)
+        if free is None:
+            if perf.ENABLED:
+                perf.count('free_time.miss')
+            free = self._cache[key] = self._compute(master_id, day)
+        return free
+
+    def booked(self, master_id: int, day: str, start: datetime, end: datetime):
+        key = (master_id, day)
+        if key in self._cache:
+            self._cache[key] = subtract(self._cache[key], start, end)
+
+    def invalidate(self, master_id: int, day: str):
+        self._cache.pop((master_id, day), None)
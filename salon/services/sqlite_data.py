@@ -0,0 +1,377 @@
+import json
+import sqlite3
+import sys
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from models.entities import (Client, Appointment, ScheduleItem, ScheduleTemplate, iso_to_minutes, minutes_to_iso,
+                             to_dict, to_minutes)
+from models.table import AppointmentTable
+from services.analytics import DailyRollups
+from services.archive import AppointmentArchive, archive_dir
+from services.changes import ChangeFeed, Cleared, Reloaded
+from services.perf import instrument
+from services.salon_data import SalonData
+from services.search import ClientSearchIndex
+from services.slots import FreeSlot, FreeTimeIndex, as_date
+from services.storage import JsonStorage
+from services.templates import TemplateCalendar
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    email TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_clients_name ON clients(name);
+CREATE INDEX IF NOT EXISTS ix_clients_phone ON clients(phone);
+
+CREATE TABLE IF NOT EXISTS appointments (
+    id INTEGER PRIMARY KEY,
+    client_id INTEGER NOT NULL,
+    master_id INTEGER NOT NULL,
+    service_id INTEGER NOT NULL,
+    start TEXT NOT NULL,
+    "end" TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_appointments_master_start ON appointments(master_id, start);
+CREATE INDEX IF NOT EXISTS ix_appointments_start ON appointments(start);
+CREATE INDEX IF NOT EXISTS ix_appointments_client ON appointments(client_id, start);
+
+CREATE TABLE IF NOT EXISTS schedules (
+    id INTEGER PRIMARY KEY,
+    master_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_schedules_master_date ON schedules(master_id, date);
+CREATE INDEX IF NOT EXISTS ix_schedules_date ON schedules(date);
+
+CREATE TABLE IF NOT EXISTS schedule_templates (
+    id INTEGER PRIMARY KEY,
+    rule TEXT NOT NULL
+);
+"""
+
+
+def _appointment(row) -> Appointment:
+    # В базе время хранится строками ISO, как и в salon_data.json
+    return Appointment(row[0], row[1], row[2], row[3], iso_to_minutes(row[4]), iso_to_minutes(row[5]))
+
+
+@instrument
+class SqliteSalonData(SalonData):
+    """SalonData, который хранит клиентов, записи и графики в SQLite.
+
+    Поиск клиента, графика и проверка пересечений идут индексными запросами,
+    а не перебором списков в памяти. Свойства clients / appointments /
+    schedules оставлены для совместимости с интерфейсом и читают таблицы целиком.
+    """
+
+    DB_FILE = 'salon_data.db'
+    # Файлового хранилища нет: запись и блокировки — забота SQLite
+    storage = None
+    # Старые записи не мешают: все выборки идут по индексам базы
+    archive = None
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or self.DB_FILE
+        # Сервер обращается к соединению из потоков запросов и потока записи,
+        # но всегда под SalonAPI.lock, поэтому проверку потока sqlite3 отключаем
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.changes = ChangeFeed()
+        self.services = self._build_services()
+        self.masters = self._build_masters()
+        self._index_catalog()
+        # Записи не пересекают полночь и не длиннее самой долгой услуги,
+        # поэтому проверку пересечений можно ограничить окном по start
+        self._max_duration = max(s.duration_min for s in self.services)
+        self._free = FreeTimeIndex(self._free_intervals)
+        self._client_search: Optional[ClientSearchIndex] = None
+        self._calendar = TemplateCalendar()
+        self._rollups = DailyRollups()
+        self._data_version = None
+        self._refreshed_version = self._version()
+
+    @property
+    def clients(self) -> List[Client]:
+        rows = self.conn.execute('SELECT id, name, phone, email FROM clients ORDER BY id')
+        return [Client(*r) for r in rows]
+
+    @property
+    def appointments(self) -> List[Appointment]:
+        rows = self.conn.execute(
+            'SELECT id, client_id, master_id, service_id, start, "end" FROM appointments ORDER BY id')
+        return [_appointment(r) for r in rows]
+
+    @property
+    def schedules(self) -> List[ScheduleItem]:
+        rows = self.conn.execute(
+            'SELECT id, master_id, date, start_time, end_time FROM schedules ORDER BY id')
+        return [ScheduleItem(*r) for r in rows]
+
+    def _load(self):
+        pass
+
+    def _sync_memory(self):
+        # Правила графика, сводки для отчётов, свободное время и индекс
+        # поиска клиентов держим в памяти; data_version меняется, когда базу
+        # изменило другое соединение, и тогда они перечитываются
+        version = self._version()
+        if version != self._data_version:
+            self._data_version = version
+            rows = self.conn.execute('SELECT rule FROM schedule_templates')
+            self._calendar.rebuild(ScheduleTemplate.from_dict(json.loads(r[0])) for r in rows)
+            self._rollups.clear()
+            self._free.clear()
+            self._client_search = None
+
+    def _template_calendar(self) -> TemplateCalendar:
+        self._sync_memory()
+        return self._calendar
+
+    def _rollup_cache(self) -> DailyRollups:
+        self._sync_memory()
+        return self._rollups
+
+    def free_intervals(self, master_id: int, date: str) -> list:
+        self._sync_memory()
+        return super().free_intervals(master_id, date)
+
+    def find_free_slots(self, service_id: int, date_range, master_ids: Optional[List[int]] = None,
+                        granularity: int = 15, limit: int = 10,
+                        not_before: Optional[datetime] = None) -> List[FreeSlot]:
+        # Кэш свободного времени мог устареть: в базу писало другое соединение
+        self._sync_memory()
+        return super().find_free_slots(service_id, date_range, master_ids, granularity, limit, not_before)
+
+    def _put_template(self, template: ScheduleTemplate):
+        self.conn.execute('INSERT OR REPLACE INTO schedule_templates (id, rule) VALUES (?, ?)',
+                          (template.id, json.dumps(to_dict(template), ensure_ascii=False)))
+        self._calendar.put(template)
+        self._free.clear()
+        self._persist('put_template')
+
+    def _save(self):
+        self.conn.commit()
+
+    @contextmanager
+    def _exclusive(self):
+        # BEGIN IMMEDIATE сразу берёт блокировку записи, поэтому другой процесс
+        # не вставит запись между проверкой пересечений и нашей вставкой
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            raise
+        else:
+            self.conn.commit()
+
+    def _version(self) -> int:
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    @property
+    def shared(self) -> bool:
+        # Базу могут менять сервер и другие окна, как общий каталог
+        return True
+
+    def refresh(self) -> bool:
+        # Что именно записало другое соединение, не узнать — только то, что база менялась
+        version = self._version()
+        if version == self._refreshed_version:
+            return False
+        self._refreshed_version = version
+        self.changes.publish(Reloaded())
+        return True
+
+    def _persist(self, op: str, data: Optional[dict] = None):
+        if self._batch is None:
+            self.conn.commit()
+
+    def _commit(self, ops, lock=None):
+        # Соединение общее с читателями, поэтому фиксация — под их блокировкой
+        with lock if lock is not None else nullcontext():
+            self.conn.commit()
+
+    def flush(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def clear(self):
+        self.conn.execute('DELETE FROM clients')
+        self.conn.execute('DELETE FROM appointments')
+        self.conn.execute('DELETE FROM schedules')
+        self.conn.execute('DELETE FROM schedule_templates')
+        self.conn.commit()
+        self._calendar.rebuild(())
+        self._rollups.clear()
+        self._free.clear()
+        self._client_search = None
+        self.changes.publish(Cleared())
+
+    def _insert_client(self, name: str, phone: str, email: str) -> Client:
+        cur = self.conn.execute(
+            'INSERT INTO clients (name, phone, email) VALUES (?, ?, ?)', (name, phone, email))
+        self._persist('add_client')
+        client = Client(cur.lastrowid, name, phone, email)
+        if self._client_search is not None:
+            self._client_search.add(client)
+        return client
+
+    def search_clients(self, query: str, limit: int = 10) -> List[Client]:
+        # Индекс строится при первом поиске одним проходом по таблице
+        self._sync_memory()
+        if self._client_search is None:
+            self._client_search = ClientSearchIndex(self.clients)
+        return self._client_search.search(query, limit)
+
+    def find_client_by_name(self, name: str) -> Optional[Client]:
+        row = self.conn.execute(
+            'SELECT id, name, phone, email FROM clients WHERE name = ? ORDER BY id LIMIT 1', (name,)).fetchone()
+        return Client(*row) if row else None
+
+    def find_client_by_phone(self, phone: str) -> Optional[Client]:
+        row = self.conn.execute(
+            'SELECT id, name, phone, email FROM clients WHERE phone = ? ORDER BY id LIMIT 1', (phone,)).fetchone()
+        return Client(*row) if row else None
+
+    def get_client(self, client_id: int) -> Optional[Client]:
+        row = self.conn.execute('SELECT id, name, phone, email FROM clients WHERE id = ?', (client_id,)).fetchone()
+        return Client(*row) if row else None
+
+    def _insert_schedule(self, master_id: int, date: str, start_time: str, end_time: str) -> ScheduleItem:
+        cur = self.conn.execute(
+            'INSERT INTO schedules (master_id, date, start_time, end_time) VALUES (?, ?, ?, ?)',
+            (master_id, date, start_time, end_time))
+        self._persist('add_schedule')
+        return ScheduleItem(cur.lastrowid, master_id, date, start_time, end_time)
+
+    def get_schedules_for(self, master_id: int, date: str) -> List[ScheduleItem]:
+        rows = self.conn.execute(
+            'SELECT id, master_id, date, start_time, end_time FROM schedules WHERE master_id = ? AND date = ?',
+            (master_id, date))
+        return [*(ScheduleItem(*r) for r in rows), *self._template_calendar().items_for(master_id, date)]
+
+    def schedules_on(self, date: str) -> List[ScheduleItem]:
+        rows = self.conn.execute(
+            'SELECT id, master_id, date, start_time, end_time FROM schedules WHERE date = ? ORDER BY id', (date,))
+        return [*(ScheduleItem(*r) for r in rows), *self._template_calendar().items_on(date)]
+
+    def appointments_on(self, date: str) -> List[Appointment]:
+        # 'U' идёт сразу после 'T', так что диапазон покрывает все времена дня
+        rows = self.conn.execute(
+            'SELECT id, client_id, master_id, service_id, start, "end" FROM appointments '
+            'WHERE start >= ? AND start < ? ORDER BY start', (date, date + 'U'))
+        return [_appointment(r) for r in rows]
+
+    def client_history(self, client_id: int) -> List[Appointment]:
+        rows = self.conn.execute(
+            'SELECT id, client_id, master_id, service_id, start, "end" FROM appointments '
+            'WHERE client_id = ? ORDER BY start', (client_id,))
+        return [_appointment(r) for r in rows]
+
+    def history_table(self, first=None, last=None) -> AppointmentTable:
+        if first is None:
+            rows = self.conn.execute('SELECT id, client_id, master_id, service_id, start, "end" FROM appointments')
+        else:
+            rows = self.conn.execute(
+                'SELECT id, client_id, master_id, service_id, start, "end" FROM appointments '
+                'WHERE start >= ? AND start < ?', (as_date(first).isoformat(), as_date(last).isoformat() + 'U'))
+        return AppointmentTable.from_rows((r[0], r[1], r[2], r[3], iso_to_minutes(r[4]), iso_to_minutes(r[5]))
+                                          for r in rows)
+
+    def dates_with_records(self) -> List[str]:
+        rows = self.conn.execute(
+            'SELECT date FROM schedules UNION SELECT substr(start, 1, 10) FROM appointments ORDER BY 1')
+        return [r[0] for r in rows]
+
+    def _has_conflict(self, master_id: int, start_dt: datetime, end_dt: datetime) -> bool:
+        lower = start_dt - timedelta(minutes=self._max_duration)
+        row = self.conn.execute(
+            'SELECT 1 FROM appointments WHERE master_id = ? AND start > ? AND start < ? AND "end" > ? LIMIT 1',
+            (master_id, lower.isoformat(), end_dt.isoformat(), start_dt.isoformat())).fetchone()
+        return row is not None
+
+    def _busy_intervals(self, master_id: int, lo: datetime, hi: datetime) -> list:
+        rows = self.conn.execute(
+            'SELECT start, "end" FROM appointments WHERE master_id = ? AND start > ? AND start < ? AND "end" > ? '
+            'ORDER BY start',
+            (master_id, (lo - timedelta(minutes=self._max_duration)).isoformat(), hi.isoformat(), lo.isoformat()))
+        return [(datetime.fromisoformat(a), datetime.fromisoformat(b)) for a, b in rows]
+
+    def _insert_appointment(self, client_id: int, master_id: int, service_id: int,
+                            start_dt: datetime, end_dt: datetime) -> Appointment:
+        start, end = start_dt.isoformat(), end_dt.isoformat()
+        cur = self.conn.execute(
+            'INSERT INTO appointments (client_id, master_id, service_id, start, "end") VALUES (?, ?, ?, ?, ?)',
+            (client_id, master_id, service_id, start, end))
+        self._persist('add_appointment')
+        return Appointment(cur.lastrowid, client_id, master_id, service_id, to_minutes(start_dt), to_minutes(end_dt))
+
+    def get_client_name(self, client_id: int) -> str:
+        row = self.conn.execute('SELECT name FROM clients WHERE id = ?', (client_id,)).fetchone()
+        return row[0] if row else "Неизвестный клиент"
+
+    def import_json(self, path: str) -> int:
+        """Переносит данные из salon_data.json (с журналом и архивом старых записей, если они есть)"""
+        if path.endswith('.json'):
+            from services.storage import JournalStorage
+            data = JournalStorage(path).load()
+        else:
+            data = JsonStorage(path).load()
+        if data is None:
+            return 0
+        clients, appointments, schedules, templates = self._parse_state(data)
+        # Старые записи SalonData уже мог перенести в архив рядом с файлом:
+        # в снимке и журнале их больше нет
+        for a in AppointmentArchive(archive_dir(path)).iter_range():
+            a = self._migrate_appointment(a)
+            if a is not None:
+                appointments.append(Appointment.from_dict(a))
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO clients (id, name, phone, email) VALUES (?, ?, ?, ?)',
+                ((c.id, c.name, c.phone, c.email) for c in clients))
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO appointments (id, client_id, master_id, service_id, start, "end") '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                ((a.id, a.client_id, a.master_id, a.service_id, minutes_to_iso(a.start), minutes_to_iso(a.end))
+                 for a in appointments))
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO schedules (id, master_id, date, start_time, end_time) VALUES (?, ?, ?, ?, ?)',
+                ((s.id, s.master_id, s.date, s.start_time, s.end_time) for s in schedules))
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO schedule_templates (id, rule) VALUES (?, ?)',
+                ((t.id, json.dumps(to_dict(t), ensure_ascii=False)) for t in templates))
+        self._data_version = None
+        self._client_search = None
+        self.changes.publish(Reloaded())
+        return len(clients) + len(appointments) + len(schedules) + len(templates)
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if not args:
+        print('Использование: python -m services.sqlite_data salon_data.json [salon_data.db]')
+        return 1
+    data = SqliteSalonData(args[1] if len(args) > 1 else None)
+    count = data.import_json(args[0])
+    data.close()
+    print(f'Перенесено записей: {count}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
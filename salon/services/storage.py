@@ -0,0 +1,243 @@
+import json
+import os
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from models.entities import to_dict
+from services.jsonstream import iter_blocks, write_sections
+
+# Разделы снимка соответствуют операциям журнала
+SECTION_OPS = {'clients': 'add_client', 'appointments': 'add_appointment', 'schedules': 'add_schedule',
+               'templates': 'put_template'}
+
+
+def _empty_state() -> dict:
+    return {'clients': [], 'appointments': [], 'schedules': [], 'templates': []}
+
+
+def _write_atomic(path: str, write: Callable):
+    # Пишем во временный файл и подменяем им основной: при падении посреди
+    # записи на диске остаётся либо старый, либо новый файл целиком.
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def file_key(path: str) -> Optional[tuple]:
+    """Отпечаток файла: меняется, когда файл подменяют или переписывают"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def apply_records(state: dict, op: str, records: List[dict]):
+    """Применяет пачку однотипных операций к состоянию в виде словарей"""
+    if op == 'clear':
+        state['clients'] = []
+        state['appointments'] = []
+        state['schedules'] = []
+        state['templates'] = []
+        return
+    if op == 'put_template':
+        # Правило графика записывается целиком и при изменении заменяет прежнее
+        changed = {t['id'] for t in records}
+        state['templates'] = [t for t in state['templates'] if t['id'] not in changed] + list(records)
+        return
+    for section, section_op in SECTION_OPS.items():
+        if section_op == op:
+            state[section].extend(records)
+
+
+def state_from_records(batches: Iterator[Tuple[str, List[dict]]]) -> dict:
+    state = _empty_state()
+    for op, records in batches:
+        apply_records(state, op, records)
+    return state
+
+
+def _iter_snapshot(path: str, seq_holder: Optional[list] = None):
+    with open(path, 'r', encoding='utf-8') as f:
+        for key, value in iter_blocks(f):
+            if key in SECTION_OPS:
+                yield SECTION_OPS[key], value
+            elif key == 'seq' and seq_holder is not None:
+                seq_holder.append(value)
+
+
+class JsonStorage:
+    """Прежний формат: весь файл переписывается при каждом сохранении."""
+
+    journaled = False
+    shared = False
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[dict]:
+        if not os.path.exists(self.path):
+            return None
+        return state_from_records(self.iter_load())
+
+    def iter_load(self) -> Iterator[Tuple[str, List[dict]]]:
+        """Содержимое файла в виде пачек операций ('add_client', [{...}, ...])"""
+        if os.path.exists(self.path):
+            yield from _iter_snapshot(self.path)
+
+    def append(self, op: str, data: Optional[dict] = None):
+        raise NotImplementedError('JsonStorage сохраняет только снимки')
+
+    def append_many(self, entries: List[Tuple[str, Optional[dict]]]):
+        raise NotImplementedError('JsonStorage сохраняет только снимки')
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def snapshot(self, state: dict):
+        _write_atomic(self.path, lambda f: json.dump(state, f, ensure_ascii=False, indent=2, default=to_dict))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JournalStorage:
+    """Снимок salon_data.json плюс журнал изменений (одна строка на операцию).
+
+    Каждая запись журнала имеет сквозной номер seq, а снимок помнит номер
+    последней вошедшей в него записи. Поэтому падение между заменой снимка
+    и очисткой журнала не приводит к повторному применению записей, а
+    оборванная последняя строка журнала просто отбрасывается при загрузке.
+    """
+
+    journaled = True
+    shared = False
+    SYNC_EVERY = 32
+    COMPACT_EVERY = 2000
+    # Сворачиваем журнал, только когда он дорос до этой доли снимка: иначе
+    # на больших данных (массовый импорт, сервер) снимок переписывался бы
+    # каждые COMPACT_EVERY операций и общее время росло бы квадратично
+    COMPACT_RATIO = 0.5
+
+    def __init__(self, path: str, journal_path: Optional[str] = None):
+        self.path = path
+        self.journal_path = journal_path or os.path.splitext(path)[0] + '.journal'
+        self.seq = 0
+        self._journal = None
+        self._journal_records = 0
+        self._unsynced = 0
+        # Сколько байт журнала уже прочитано или записано нами и какой снимок
+        # был загружен — по ним видно, дописывал ли файлы кто-то ещё
+        self._offset = 0
+        self._snapshot_key = None
+        self._snapshot_size = 0
+
+    def load(self) -> Optional[dict]:
+        if not os.path.exists(self.path) and not os.path.exists(self.journal_path):
+            return None
+        return state_from_records(self.iter_load())
+
+    def iter_load(self) -> Iterator[Tuple[str, List[dict]]]:
+        """Снимок и затем журнал пачками операций, без чтения файла целиком"""
+        seq_holder = []
+        self._snapshot_key = file_key(self.path)
+        self._offset = 0
+        self._snapshot_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if os.path.exists(self.path):
+            yield from _iter_snapshot(self.path, seq_holder)
+        snapshot_seq = seq_holder[0] if seq_holder else 0
+        self.seq = snapshot_seq
+        self._journal_records = 0
+        if os.path.exists(self.journal_path):
+            good_offset = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Оборванная при сбое запись — дальше читать нечего
+                        break
+                    if not line.endswith(b'\n'):
+                        break
+                    good_offset += len(line)
+                    if entry['seq'] <= snapshot_seq:
+                        continue
+                    self.seq = entry['seq']
+                    self._journal_records += 1
+                    data = entry.get('data')
+                    yield entry['op'], [data] if data is not None else []
+            if good_offset < os.path.getsize(self.journal_path):
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(good_offset)
+            self._offset = good_offset
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        return self._journal
+
+    def append(self, op: str, data: Optional[dict] = None):
+        self.seq += 1
+        entry = {'seq': self.seq, 'op': op}
+        if data is not None:
+            entry['data'] = data
+        f = self._open_journal()
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        f.flush()
+        self._offset = f.tell()
+        self._journal_records += 1
+        self._unsynced += 1
+        if self._unsynced >= self.SYNC_EVERY:
+            self.flush()
+
+    def append_many(self, entries: List[Tuple[str, Optional[dict]]]):
+        """Пачка операций одной записью в журнал и одним fsync"""
+        lines = []
+        for op, data in entries:
+            self.seq += 1
+            entry = {'seq': self.seq, 'op': op}
+            if data is not None:
+                entry['data'] = data
+            lines.append(json.dumps(entry, ensure_ascii=False) + '\n')
+        f = self._open_journal()
+        f.write(''.join(lines))
+        f.flush()
+        self._offset = f.tell()
+        self._journal_records += len(lines)
+        self._unsynced += len(lines)
+        self.flush()
+
+    def needs_compaction(self) -> bool:
+        return (self._journal_records >= self.COMPACT_EVERY
+                and self._offset >= self._snapshot_size * self.COMPACT_RATIO)
+
+    def snapshot(self, state: dict):
+        self.flush()
+        seq = self.seq
+        _write_atomic(self.path, lambda f: write_sections(f, {'seq': seq}, state, default=to_dict))
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_path, 'w', encoding='utf-8'):
+            pass
+        self._journal_records = 0
+        self._offset = 0
+        self._snapshot_key = file_key(self.path)
+        self._snapshot_size = os.path.getsize(self.path)
+
+    def flush(self):
+        if self._journal is not None and self._unsynced:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
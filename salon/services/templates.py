@@ -0,0 +1,84 @@
+"""Повторяющиеся графики мастеров.
+
+Вместо записи ScheduleItem на каждый день хранится правило: дни недели,
+часы, диапазон дат, выходные и дни с другими часами. В ScheduleItem
+правило разворачивается только для запрошенной даты, и результат
+запоминается в ограниченном кэше: проверка записи и вкладка расписания
+спрашивают одни и те же ближайшие дни много раз подряд.
+"""
+from collections import OrderedDict
+from datetime import date as Date
+from typing import Dict, List, Tuple
+
+from models.entities import ScheduleItem, ScheduleTemplate
+from services import perf
+
+CACHE_SIZE = 4096
+
+
+def expand(template: ScheduleTemplate, day: str) -> List[ScheduleItem]:
+    """График по правилу на дату; у таких ScheduleItem id равен -id правила"""
+    if day < template.date_from or (template.date_to is not None and day > template.date_to):
+        return []
+    if day in template.skip_dates:
+        return []
+    for override_day, start_time, end_time in template.overrides:
+        if override_day == day:
+            return [ScheduleItem(-template.id, template.master_id, day, start_time, end_time)]
+    if Date.fromisoformat(day).weekday() not in template.weekdays:
+        return []
+    return [ScheduleItem(-template.id, template.master_id, day, template.start_time, template.end_time)]
+
+
+class TemplateCalendar:
+    """Правила по мастерам и кэш развёрнутых дней (мастер, дата) -> графики"""
+
+    def __init__(self, templates=(), cache_size: int = CACHE_SIZE):
+        self.cache_size = cache_size
+        self.rebuild(templates)
+
+    def __len__(self):
+        return len(self._templates)
+
+    def rebuild(self, templates):
+        self._templates: Dict[int, ScheduleTemplate] = {}
+        self._by_master: Dict[int, List[ScheduleTemplate]] = {}
+        self._cache: 'OrderedDict[Tuple[int, str], Tuple[ScheduleItem, ...]]' = OrderedDict()
+        for t in templates:
+            self.put(t)
+
+    def put(self, template: ScheduleTemplate):
+        """Добавляет правило или заменяет правило с тем же id"""
+        old = self._templates.get(template.id)
+        if old is not None:
+            self._by_master[old.master_id].remove(old)
+        self._templates[template.id] = template
+        self._by_master.setdefault(template.master_id, []).append(template)
+        # Правила меняются редко, проще сбросить весь кэш
+        self._cache.clear()
+
+    def get(self, template_id: int):
+        return self._templates.get(template_id)
+
+    def templates(self) -> List[ScheduleTemplate]:
+        return sorted(self._templates.values(), key=lambda t: t.id)
+
+    def items_for(self, master_id: int, day: str) -> Tuple[ScheduleItem, ...]:
+        templates = self._by_master.get(master_id)
+        if not templates:
+            return ()
+        key = (master_id, day)
+        items = self._cache.get(key)
+        if items is not None:
+            self._cache.move_to_end(key)
+            return items
+        if perf.ENABLED:
+            perf.count('templates.expand')
+        items = tuple(s for t in templates for s in expand(t, day))
+        self._cache[key] = items
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return items
+
+    def items_on(self, day: str) -> List[ScheduleItem]:
+        return [s for master_id in sorted(self._by_master) for s in self.items_for(master_id, day)]
@@ -0,0 +1,5 @@
+"""Запуск из папки salon: python -m pytest tests"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
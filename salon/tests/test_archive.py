@@ -0,0 +1,90 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from services.archive import AppointmentArchive, archive_dir
+from services.salon_data import SalonData
+from services.sqlite_data import SqliteSalonData
+from services.storage import JournalStorage
+
+
+def _legacy_file(path: str, days_ago=(400, 200, 1)):
+    """salon_data.json старого вида: записи за давние даты и одна свежая"""
+    appointments = []
+    for i, ago in enumerate(days_ago, start=1):
+        start = (datetime.now() - timedelta(days=ago)).replace(hour=10, minute=0, second=0, microsecond=0)
+        appointments.append({'id': i, 'client_id': 1, 'master_id': 1, 'service_id': 4,
+                             'start': start.isoformat(), 'end': (start + timedelta(minutes=15)).isoformat()})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'clients': [{'id': 1, 'name': 'Анна', 'phone': '+7900', 'email': 'a@a.ru'}],
+                   'appointments': appointments, 'schedules': []}, f, ensure_ascii=False)
+    return appointments
+
+
+def test_import_json_takes_archived_appointments(tmp_path):
+    path = str(tmp_path / 'salon_data.json')
+    expected = _legacy_file(path)
+    # Загрузка переносит записи старше ARCHIVE_DAYS в архив и убирает их из снимка
+    SalonData(storage=JournalStorage(path)).close()
+    assert os.listdir(archive_dir(path))
+
+    db = SqliteSalonData(str(tmp_path / 'salon_data.db'))
+    try:
+        db.import_json(path)
+        assert sorted(a.id for a in db.appointments) == [a['id'] for a in expected]
+        assert [a.id for a in db.client_history(1)] == [a['id'] for a in expected]
+    finally:
+        db.close()
+
+
+def test_clear_keeps_archive_until_clear_is_written(tmp_path, monkeypatch):
+    path = str(tmp_path / 'salon_data.json')
+    _legacy_file(path)
+    data = SalonData(storage=JournalStorage(path))
+    assert data.client_history(1)
+
+    # Сбой сразу после записи очистки: файлы архива ещё на месте
+    def crash(self):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(AppointmentArchive, 'clear', crash)
+    try:
+        data.clear()
+    except KeyboardInterrupt:
+        pass
+    assert os.path.isdir(archive_dir(path))
+    data.storage.close()
+    monkeypatch.undo()
+
+    # Следующая загрузка видит очистку в журнале и доудаляет архив
+    data = SalonData(storage=JournalStorage(path))
+    assert data.clients == [] and data.client_history(1) == [] and data.dates_with_records() == []
+    assert not os.path.isdir(archive_dir(path))
+    data.close()
+
+
+def test_clear_in_batch_removes_archive_after_commit(tmp_path):
+    path = str(tmp_path / 'salon_data.json')
+    _legacy_file(path)
+    data = SalonData(storage=JournalStorage(path))
+    with data.batch():
+        data.clear()
+        assert data.client_history(1) == []
+        assert os.path.isdir(archive_dir(path))
+    assert not os.path.isdir(archive_dir(path))
+    data.close()
+
+
+def test_no_free_slots_on_archived_days(tmp_path):
+    path = str(tmp_path / 'salon_data.json')
+    appointments = _legacy_file(path)
+    day = appointments[1]['start'][:10]
+    with open(path, encoding='utf-8') as f:
+        state = json.load(f)
+    state['schedules'] = [{'id': 1, 'master_id': 1, 'date': day, 'start_time': '9:00', 'end_time': '18:00'}]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    data = SalonData(storage=JournalStorage(path))
+    # Запись этого дня ушла в архив, а график остался: день всё равно не свободен
+    assert data.appointments_on(day) and data.free_intervals(1, day) == []
+    assert data.find_free_slots(4, (day, day), master_ids=[1]) == []
+    data.close()
@@ -0,0 +1,28 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from models.entities import Branch, Master
+from services.branches import SalonNetwork, save_branches
+
+
+def test_failed_booking_does_not_copy_client(tmp_path):
+    root = str(tmp_path)
+    save_branches(root, [Branch('center', 'Центр', (Master(1, 'Анна'),)),
+                         Branch('north', 'Север', (Master(2, 'Ольга'),))])
+    network = SalonNetwork(root)
+    day = date.today() + timedelta(days=1)
+    ten = datetime(day.year, day.month, day.day, 10)
+    client = network.add_client('center', 'Иван', '+7900', 'i@x.ru')
+    north = network.branch('north')
+
+    # У мастера другого филиала в этот день нет графика
+    with pytest.raises(ValueError):
+        network.add_appointment(client, 2, 4, ten)
+    assert north.clients == []
+
+    north.add_schedule(2, day.isoformat(), '9:00', '18:00')
+    branch_id, appt = network.add_appointment(client, 2, 4, ten)
+    assert branch_id == 'north' and [c.phone for c in north.clients] == ['+7900']
+    assert appt.client_id == north.clients[0].id
+    network.close()
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from services.bulk import import_rows, iter_export
+from services.salon_data import SalonData
+from services.storage import JournalStorage
+
+
+def test_appointment_with_timezone_is_a_row_error(tmp_path):
+    data = SalonData(storage=JournalStorage(str(tmp_path / 'salon_data.json')))
+    day = (date.today() + timedelta(days=1)).isoformat()
+    client = data.add_client('Анна', '+7900', 'a@a.ru')
+    data.add_schedule(1, day, '9:00', '18:00')
+    rows = [(2, {'client_id': client.id, 'master_id': 1, 'service_id': 4, 'start': f'{day}T10:00'}),
+            (3, {'client_id': client.id, 'master_id': 1, 'service_id': 4, 'start': f'{day}T11:00+03:00'}),
+            (4, {'client_id': client.id, 'master_id': 1, 'service_id': 4, 'start': f'{day} 12:00'})]
+    report = import_rows(data, 'appointments', rows)
+    assert report.added == 2
+    assert [e.line for e in report.errors] == [3]
+    assert [a.start_dt.hour for a in data.appointments_on(day)] == [10, 12]
+    data.close()
+
+
+def test_schedule_export_skips_template_days(tmp_path):
+    data = SalonData(storage=JournalStorage(str(tmp_path / 'salon_data.json')))
+    first = date.today() + timedelta(days=1)
+    data.add_schedule_template(2, range(7), '9:00', '18:00', first.isoformat(),
+                               (first + timedelta(days=30)).isoformat())
+    data.add_schedule(1, first.isoformat(), '10:00', '14:00')
+    assert any(s.id < 0 for s in data.schedules_on(first.isoformat()))
+    rows = list(iter_export(data, 'schedules'))
+    assert rows == [{'id': 1, 'master_id': 1, 'date': first.isoformat(), 'start_time': '10:00', 'end_time': '14:00'}]
+    data.close()
+
+
+def test_import_writes_one_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(JournalStorage, 'COMPACT_EVERY', 10)
+    path = str(tmp_path / 'salon_data.json')
+    data = SalonData(storage=JournalStorage(path))
+    snapshots = []
+    real = JournalStorage.snapshot
+    monkeypatch.setattr(JournalStorage, 'snapshot', lambda self, state: (snapshots.append(1), real(self, state)))
+    rows = [(i, {'name': f'Клиент {i}', 'phone': f'+79{i:09d}', 'email': f'c{i}@a.ru'}) for i in range(200)]
+    report = import_rows(data, 'clients', rows, batch_size=20)
+    assert report.added == 200 and len(snapshots) == 1
+    data.close()
+    assert len(SalonData(storage=JournalStorage(path)).clients) == 200
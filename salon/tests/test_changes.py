@@ -0,0 +1,48 @@
+from models.entities import Client, ScheduleItem
+from services.changes import ChangeFeed, ClientAdded, Cleared, Reloaded, ScheduleAdded
+
+ANNA = Client(1, 'Анна', '+7900', 'a@a.ru')
+BORIS = Client(2, 'Борис', '+7901', 'b@a.ru')
+SCHEDULE = ScheduleItem(1, 1, '2024-03-01', '9:00', '18:00')
+
+
+def test_hold_delivers_one_batch_at_outer_exit():
+    feed = ChangeFeed()
+    calls = []
+    feed.subscribe(calls.append)
+    with feed.hold():
+        feed.publish(ClientAdded(ANNA))
+        with feed.hold():
+            feed.publish(ClientAdded(BORIS))
+        assert calls == []
+    assert calls == [[ClientAdded(ANNA), ClientAdded(BORIS)]]
+    feed.publish(ClientAdded(ANNA))
+    assert calls[-1] == [ClientAdded(ANNA)]
+
+
+def test_hold_drops_events_before_last_reset():
+    feed = ChangeFeed()
+    calls = []
+    feed.subscribe(calls.append)
+    with feed.hold():
+        feed.publish(ClientAdded(ANNA))
+        feed.publish(Cleared())
+        feed.publish(ClientAdded(BORIS))
+        feed.publish(Reloaded())
+        feed.publish(ScheduleAdded(SCHEDULE))
+    assert calls == [[Reloaded(), ScheduleAdded(SCHEDULE)]]
+
+
+def test_subscription_by_kind_and_unsubscribe():
+    feed = ChangeFeed()
+    clients, everything = [], []
+    unsubscribe = feed.subscribe(clients.append, ClientAdded, Cleared)
+    feed.subscribe(everything.append)
+    with feed.hold():
+        feed.publish(ScheduleAdded(SCHEDULE))
+        feed.publish(ClientAdded(ANNA))
+    assert clients == [[ClientAdded(ANNA)]]
+    assert everything == [[ScheduleAdded(SCHEDULE), ClientAdded(ANNA)]]
+    unsubscribe()
+    feed.publish(Cleared())
+    assert clients == [[ClientAdded(ANNA)]] and everything[-1] == [Cleared()]
@@ -0,0 +1,49 @@
+from services.changes import ClientAdded, Reloaded
+from services.locking import SharedJournalStorage
+from services.salon_data import SalonData
+
+
+def _pair(tmp_path):
+    path = str(tmp_path / 'salon_data.json')
+    return SalonData(storage=SharedJournalStorage(path)), SalonData(storage=SharedJournalStorage(path))
+
+
+def test_refresh_pulls_other_process_journal(tmp_path):
+    a, b = _pair(tmp_path)
+    events = []
+    b.changes.subscribe(events.extend)
+    anna = a.add_client('Анна', '+7900', 'a@a.ru')
+    assert b.refresh()
+    assert [c.name for c in b.clients] == ['Анна'] and b.find_client_by_phone('+7900')
+    assert events == [ClientAdded(anna)]
+    assert not b.refresh()
+    a.close()
+    b.close()
+
+
+def test_write_pulls_changes_before_checks(tmp_path):
+    a, b = _pair(tmp_path)
+    a.add_client('Анна', '+7900', 'a@a.ru')
+    # Запись во втором процессе сначала подтягивает журнал: номер не повторяется
+    boris = b.add_client('Борис', '+7901', 'b@a.ru')
+    assert boris.id == 2
+    assert a.refresh() and [c.id for c in a.clients] == [1, 2]
+    a.close()
+    b.close()
+
+
+def test_compaction_by_other_process_reloads(tmp_path):
+    a, b = _pair(tmp_path)
+    a.add_client('Анна', '+7900', 'a@a.ru')
+    b.refresh()
+    events = []
+    b.changes.subscribe(events.extend)
+    a.add_client('Борис', '+7901', 'b@a.ru')
+    with a._exclusive():
+        a._save()
+    # Снимок заменён, а журнал очищен: b перечитывает всё
+    assert b.refresh()
+    assert [c.name for c in b.clients] == ['Анна', 'Борис']
+    assert events == [Reloaded()]
+    a.close()
+    b.close()
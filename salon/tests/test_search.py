@@ -0,0 +1,11 @@
+from models.entities import Client
+from services.search import ClientSearchIndex
+
+
+def test_typo_search_returns_first_by_name():
+    # Больше совпадений с опечаткой, чем limit: выдача — первые по имени
+    clients = [Client(i, f'Иванова {name}', f'+7900{i:07d}', '')
+               for i, name in enumerate(['Яна', 'Вера', 'Юлия', 'Анна', 'Ольга', 'Мария', 'Дарья'], start=1)]
+    index = ClientSearchIndex(clients)
+    found = index.search('Ивонова', 3)
+    assert [c.name for c in found] == ['Иванова Анна', 'Иванова Вера', 'Иванова Дарья']
@@ -0,0 +1,75 @@
+import http.client
+import json
+import threading
+from datetime import date, timedelta
+from urllib.parse import quote
+
+from services.salon_data import SalonData
+from services.server import SalonAPI, make_server, stop_server
+from services.sqlite_data import SqliteSalonData
+from services.storage import JournalStorage
+
+
+def _request(port: int, method: str, path: str, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        conn.request(method, path, payload, {'Content-Type': 'application/json'} if payload else {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_server_on_sqlite(tmp_path):
+    # Соединение открыто в этом потоке, а запросы обслуживают потоки сервера
+    data = SqliteSalonData(str(tmp_path / 'salon_data.db'))
+    server = make_server(data, port=0)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        day = (date.today() + timedelta(days=1)).isoformat()
+        status, client = _request(port, 'POST', '/clients', {'name': 'Анна', 'phone': '+7900', 'email': 'a@a.ru'})
+        assert status == 201, client
+        status, _ = _request(port, 'POST', '/schedules',
+                             {'master_id': 1, 'date': day, 'start_time': '9:00', 'end_time': '18:00'})
+        assert status == 201
+        status, appt = _request(port, 'POST', '/appointments', {'client_id': client['id'], 'master_id': 1,
+                                                                'service_id': 4, 'start': f'{day}T10:00'})
+        assert status == 201, appt
+        status, found = _request(port, 'GET', f"/clients?q={quote('Ан')}")
+        assert status == 200 and [c['id'] for c in found] == [client['id']]
+        status, day_appointments = _request(port, 'GET', f'/appointments?date={day}')
+        assert status == 200 and [a['id'] for a in day_appointments] == [appt['id']]
+        status, slots = _request(port, 'GET', f'/free-slots?service_id=4&from={day}&to={day}&master_id=1')
+        assert status == 200 and slots and all(s['start'] != f'{day}T10:00:00' for s in slots)
+    finally:
+        stop_server(server)
+        data.close()
+
+
+def test_writer_releases_lock_for_disk_write(tmp_path, monkeypatch):
+    data = SalonData(storage=JournalStorage(str(tmp_path / 'salon_data.json')))
+    api = SalonAPI(data)
+    readable = []
+    real = JournalStorage.append_many
+
+    def read():
+        if api.lock.acquire(timeout=1):
+            api.lock.release()
+            readable.append(True)
+
+    def append_many(self, ops):
+        # Пока пачка пишется на диск, чтение из другого потока не ждёт
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join()
+        real(self, ops)
+    monkeypatch.setattr(JournalStorage, 'append_many', append_many)
+    api.start()
+    try:
+        api.add_client({}, {'name': 'Анна', 'phone': '+7900', 'email': 'a@a.ru'})
+    finally:
+        api.stop()
+    assert readable == [True]
+    data.close()
@@ -0,0 +1,41 @@
+from datetime import date, datetime, timedelta
+
+from services.sqlite_data import SqliteSalonData
+
+
+def test_free_slots_see_other_connection(tmp_path):
+    path = str(tmp_path / 'salon_data.db')
+    a, b = SqliteSalonData(path), SqliteSalonData(path)
+    day = date.today() + timedelta(days=1)
+    nine = datetime(day.year, day.month, day.day, 9)
+    a.add_schedule(1, day.isoformat(), '9:00', '12:00')
+    client = a.add_client('Анна', '+7900', 'a@a.ru')
+    # Первый запрос заполняет кэш свободного времени во втором соединении
+    assert b.find_free_slots(4, (day, day), master_ids=[1], limit=1)[0].start == nine
+    a.add_appointment(client.id, 1, 4, nine)
+    assert b.find_free_slots(4, (day, day), master_ids=[1], limit=1)[0].start == nine + timedelta(minutes=15)
+    a.close()
+    b.close()
+
+
+def test_search_sees_other_connection(tmp_path):
+    path = str(tmp_path / 'salon_data.db')
+    a, b = SqliteSalonData(path), SqliteSalonData(path)
+    a.add_client('Анастасия Иванова', '+7900', 'a@a.ru')
+    # Первый поиск строит индекс во втором соединении
+    assert [c.name for c in b.search_clients('Ана')] == ['Анастасия Иванова']
+    a.add_client('Анастасия Петрова', '+7901', 'p@a.ru')
+    assert 'Анастасия Петрова' in [c.name for c in b.search_clients('Ана')]
+    a.close()
+    b.close()
+
+
+def test_refresh_reports_other_connection(tmp_path):
+    path = str(tmp_path / 'salon_data.db')
+    a, b = SqliteSalonData(path), SqliteSalonData(path)
+    # Окно опрашивает refresh() только у данных, которые могут менять другие
+    assert b.shared and not b.refresh()
+    a.add_client('Анна', '+7900', 'a@a.ru')
+    assert b.refresh() and not b.refresh()
+    a.close()
+    b.close()
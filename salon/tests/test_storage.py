@@ -0,0 +1,88 @@
+import json
+import os
+
+from services.salon_data import SalonData
+from services.storage import JournalStorage
+
+
+def _add_clients(data: SalonData, names):
+    for name in names:
+        data.add_client(name, f'+7900{len(data.clients)}', f'{len(data.clients)}@a.ru')
+
+
+def _journal_lines(storage: JournalStorage):
+    with open(storage.journal_path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_truncated_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / 'salon_data.json')
+    data = SalonData(storage=JournalStorage(path))
+    _add_clients(data, ['Анна', 'Борис'])
+    journal_path = data.storage.journal_path
+    data.storage.close()
+    good_size = os.path.getsize(journal_path)
+    # Сбой посреди записи третьей операции
+    with open(journal_path, 'ab') as f:
+        f.write('{"seq": 3, "op": "add_client", "data": {"id": 3, "name": "Ве'.encode('utf-8'))
+
+    data = SalonData(storage=JournalStorage(path))
+    assert [c.name for c in data.clients] == ['Анна', 'Борис']
+    assert os.path.getsize(journal_path) == good_size
+    # Следующая операция продолжает нумерацию с целой записи
+    _add_clients(data, ['Вера'])
+    assert [e['seq'] for e in _journal_lines(data.storage)] == [1, 2, 3]
+    data.close()
+    assert [c.name for c in SalonData(storage=JournalStorage(path)).clients] == ['Анна', 'Борис', 'Вера']
+
+
+def test_records_in_snapshot_are_not_replayed(tmp_path):
+    path = str(tmp_path / 'salon_data.json')
+    data = SalonData(storage=JournalStorage(path))
+    _add_clients(data, ['Анна', 'Борис'])
+    journal_path = data.storage.journal_path
+    with open(journal_path, 'rb') as f:
+        old_journal = f.read()
+    data._save()
+    _add_clients(data, ['Вера'])
+    data.storage.close()
+    # Сбой между заменой снимка и очисткой журнала: записи 1 и 2 уже в снимке
+    with open(journal_path, 'rb') as f:
+        new_journal = f.read()
+    with open(journal_path, 'wb') as f:
+        f.write(old_journal + new_journal)
+
+    data = SalonData(storage=JournalStorage(path))
+    assert [c.name for c in data.clients] == ['Анна', 'Борис', 'Вера']
+    assert data.storage.seq == 3
+    data.close()
+
+
+def test_journal_is_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(JournalStorage, 'COMPACT_EVERY', 5)
+    path = str(tmp_path / 'salon_data.json')
+    data = SalonData(storage=JournalStorage(path))
+    _add_clients(data, ['Анна', 'Борис', 'Вера', 'Глеб'])
+    assert len(_journal_lines(data.storage)) == 4 and not os.path.exists(path)
+    _add_clients(data, ['Дина'])
+    assert _journal_lines(data.storage) == [] and os.path.exists(path)
+    _add_clients(data, ['Егор'])
+    data.close()
+
+    data = SalonData(storage=JournalStorage(path))
+    assert [c.name for c in data.clients] == ['Анна', 'Борис', 'Вера', 'Глеб', 'Дина', 'Егор']
+    assert data.storage.seq == 6
+    data.close()
+
+
+def test_small_journal_is_not_compacted_against_large_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(JournalStorage, 'COMPACT_EVERY', 2)
+    path = str(tmp_path / 'salon_data.json')
+    data = SalonData(storage=JournalStorage(path))
+    _add_clients(data, [f'Клиент {i}' for i in range(50)])
+    data._save()
+    # Две операции — это меньше половины снимка: переписывать его рано
+    _add_clients(data, ['Анна', 'Борис'])
+    assert not data.storage.needs_compaction()
+    assert len(_journal_lines(data.storage)) == 2
+    data.close()